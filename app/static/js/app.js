@@ -109,6 +109,11 @@ function initUploadForm() {
             
             // Show success message
             showNotification(data.message || 'Document uploaded successfully', 'success');
+            
+            // Follow the background ingestion job until it finishes
+            if (data.status_url) {
+                watchIngestionJob(data.status_url, data.filename);
+            }
         })
         .catch(error => {
             console.error('Upload error:', error);
@@ -121,6 +126,24 @@ function initUploadForm() {
     });
 }
 
+// Poll an ingestion job until it is done or failed
+function watchIngestionJob(statusUrl, filename) {
+    fetch(statusUrl)
+    .then(response => response.json())
+    .then(job => {
+        if (job.state === 'done') {
+            showNotification(`Successfully processed ${filename}`, 'success');
+        } else if (job.state === 'failed') {
+            showNotification(`Error processing ${filename}: ${job.error}`, 'error');
+        } else {
+            setTimeout(() => watchIngestionJob(statusUrl, filename), 1000);
+        }
+    })
+    .catch(error => {
+        console.error('Job status error:', error);
+    });
+}
+
 // Show notifications
 function showNotification(message, type = 'info') {
     // Create notification element
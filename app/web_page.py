@@ -1,9 +1,18 @@
 import os
 import uuid
 import json
-from flask import Flask, request, render_template, redirect, url_for, flash, jsonify, session, send_from_directory
+import time
+import hashlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from flask import Flask, request, render_template, redirect, url_for, flash, jsonify, session, send_from_directory, Response, stream_with_context
 from werkzeug.utils import secure_filename
-from src import loaders, text_processing, embeddings, vector_store, prompts, llm
+from src import embeddings, vector_store, prompts, llm, ingestion, jobs, context_builder, retrieval, ollama_client
+from src.store_manager import VectorStoreManager
+from src.lexical_index import LexicalIndex
+from src.reranker import get_shared_reranker
+from src.answer_cache import AnswerCache, SemanticAnswerCache, normalize_query
+from src.single_flight import SingleFlight
 
 app = Flask(__name__, 
            template_folder=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'templates'),
@@ -41,53 +50,122 @@ os.makedirs(app.template_folder, exist_ok=True)
 os.makedirs(os.path.join(app.static_folder, 'css'), exist_ok=True)
 os.makedirs(os.path.join(app.static_folder, 'js'), exist_ok=True)
 
-# Initialize embeddings and vector store
-embedding_model = embeddings.get_embeddings(model="nomic-embed-text")
-vs = vector_store.create_vector_store(
-    embedding_model, 
-    collection_name="pdf_documents",
-    persist_directory="./chroma_db"
+# Initialize embeddings and the per-document vector stores
+EMBEDDING_MODEL_NAME = "nomic-embed-text"
+PERSIST_DIRECTORY = "./chroma_db"
+embedding_model = embeddings.get_embeddings(model=EMBEDDING_MODEL_NAME)
+store_manager = VectorStoreManager(
+    embedding_model,
+    persist_directory=PERSIST_DIRECTORY,
+    max_open=int(os.environ.get('MAX_OPEN_COLLECTIONS', '16'))
 )
+COLLECTION_NAME = store_manager.namespace
+
+# Chunking parameters. Lengths are measured in CHUNK_LENGTH_UNIT: 'chars',
+# 'tokens' (the embedding model's tokenizer) or 'approx_tokens'
+CHUNK_LENGTH_UNIT = os.environ.get('CHUNK_LENGTH_UNIT', 'chars')
+CHUNK_SIZE = int(os.environ.get('CHUNK_SIZE', '1000'))
+CHUNK_OVERLAP = int(os.environ.get('CHUNK_OVERLAP', '200'))
+CHUNK_TARGET_LENGTH = int(os.environ.get('CHUNK_TARGET_LENGTH', '800'))
+
+# Persistent record of ingested documents, stored next to the vectors
+manifest = ingestion.IngestionManifest(PERSIST_DIRECTORY)
+
+# BM25 index of the same chunks, fused with vector search results
+lexical_index = LexicalIndex(PERSIST_DIRECTORY)
 
 # Track processed files to avoid reprocessing
 processed_files = set()
 
+# Generated answers keyed by query, document content, model and prompt version
+answer_cache = AnswerCache(
+    max_entries=int(os.environ.get('ANSWER_CACHE_SIZE', '1024')),
+    ttl=float(os.environ.get('ANSWER_CACHE_TTL', '3600'))
+)
+
+# Recent answers looked up by query embedding, for paraphrased questions
+semantic_cache = SemanticAnswerCache(
+    threshold=float(os.environ.get('SEMANTIC_CACHE_THRESHOLD', '0.95')),
+    max_entries=int(os.environ.get('SEMANTIC_CACHE_SIZE', '256'))
+)
+
+# Identical questions in flight at the same time share one generation
+inflight_answers = SingleFlight()
+
 def allowed_file(filename):
     """Check if the file has an allowed extension."""
     return '.' in filename and \
            filename.rsplit('.', 1)[1].lower() in app.config['ALLOWED_EXTENSIONS']
 
+def is_processed(filename):
+    """Check whether an uploaded file has been ingested, in this run or a previous one."""
+    file_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
+    return file_path in processed_files or filename in manifest.sources(COLLECTION_NAME)
+
+def ingest_file(file_path, splitting_strategy="hybrid", progress_callback=None):
+    """Ingest a PDF into the vector store, raising on failure."""
+    entry = ingestion.ingest_pdf(
+        file_path,
+        None,
+        manifest,
+        embedding_model=EMBEDDING_MODEL_NAME,
+        collection_name=COLLECTION_NAME,
+        source=os.path.basename(file_path),
+        splitting_strategy=splitting_strategy,
+        chunk_size=CHUNK_SIZE,
+        chunk_overlap=CHUNK_OVERLAP,
+        target_length=CHUNK_TARGET_LENGTH,
+        length_unit=CHUNK_LENGTH_UNIT,
+        progress_callback=progress_callback,
+        store_factory=store_manager.get,
+        lexical_index=lexical_index
+    )
+    
+    # Answers generated from an earlier version of the document are stale
+    if not entry['cached']:
+        answer_cache.invalidate_document(entry['source'])
+        semantic_cache.invalidate_document(entry['source'])
+    
+    # Mark file as processed
+    processed_files.add(file_path)
+    
+    return entry
+
 def process_pdf(file_path, splitting_strategy="hybrid"):
     """Process a PDF file and add it to the vector store."""
     if file_path in processed_files:
-        return
+        return True
 
     try:
-        # Load the document
-        docs = loaders.load_pdf(file_path)
-        
-        # Add filename to metadata
-        filename = os.path.basename(file_path)
-        for doc in docs:
-            doc.metadata['source'] = filename
-        
-        # Split the document with the selected strategy
-        splits = text_processing.split_documents(docs, splitting_strategy=splitting_strategy)
-        
-        # Normalize chunk lengths for better embeddings
-        normalized_splits = text_processing.normalize_chunk_lengths(splits)
-        
-        # Add documents to the vector store
-        vector_store.add_documents_to_store(vs, normalized_splits)
-        
-        # Mark file as processed
-        processed_files.add(file_path)
-        
+        # Load, split and embed the document unless the manifest already has it
+        ingest_file(file_path, splitting_strategy)
         return True
     except Exception as e:
         print(f"Error processing {file_path}: {e}")
         return False
 
+def run_ingestion_job(params, progress_callback):
+    """Run one background ingestion job queued by /upload."""
+    entry = ingest_file(params['file_path'], params['splitting_strategy'], progress_callback)
+    return {
+        'filename': os.path.basename(params['file_path']),
+        'chunk_count': entry['chunk_count'],
+        'cached': entry['cached']
+    }
+
+# Background ingestion so uploads return before the PDF is embedded
+ingestion_jobs = jobs.IngestionJobQueue(
+    os.path.join(PERSIST_DIRECTORY, 'jobs'),
+    run_ingestion_job,
+    max_workers=int(os.environ.get('INGEST_WORKERS', '2'))
+)
+
+@app.before_request
+def resume_ingestion_jobs():
+    """Resume interrupted ingestion jobs in the process that serves requests."""
+    # Not at import: the debug reloader imports this module in two processes
+    ingestion_jobs.resume()
+
 def get_document_metadata(filename):
     """Get document metadata for enhancing prompt capabilities."""
     # This could be enhanced to extract real document structure
@@ -97,67 +175,330 @@ def get_document_metadata(filename):
         "total_chunks": "N/A",  # You could calculate this
     }
 
+# Questions without an active document search at most this many documents,
+# so the open collection handles are not evicted and reopened on every query
+MAX_SEARCH_DOCUMENTS = min(int(os.environ.get('MAX_SEARCH_DOCUMENTS', '8')), store_manager.max_open)
+
+def route_documents(query, document_ids):
+    """
+    Pick the documents searched for a question asked across all documents.
+    
+    Documents whose chunks match the question's terms in the lexical index
+    come first, then documents whose collections are already open, up to
+    MAX_SEARCH_DOCUMENTS.
+    """
+    if len(document_ids) <= MAX_SEARCH_DOCUMENTS:
+        return document_ids
+    routed = lexical_index.rank_documents(query or '', document_ids, limit=MAX_SEARCH_DOCUMENTS)
+    open_names = set(store_manager.open_collections())
+    for document_id in document_ids:
+        if len(routed) >= MAX_SEARCH_DOCUMENTS:
+            break
+        if document_id not in routed and store_manager.collection_name(document_id) in open_names:
+            routed.append(document_id)
+    for document_id in document_ids:
+        if len(routed) >= MAX_SEARCH_DOCUMENTS:
+            break
+        if document_id not in routed:
+            routed.append(document_id)
+    return routed
+
+def search_documents(query_embedding, active_file=None, k=5, query=None, **filters):
+    """
+    Search the active document's collection, or the documents picked by
+    route_documents if there is none.
+    
+    With the query text, vector results are fused with BM25 results from the
+    lexical index, which catches exact terms such as names and table labels.
+    """
+    if active_file:
+        source = manifest.resolve_source(active_file)
+        document_ids = [source]
+        def vector_search(k, **filters):
+            return vector_store.similarity_search(store_manager.get(source), query_embedding, k=k, **filters)
+    else:
+        document_ids = route_documents(query, sorted(manifest.documents(COLLECTION_NAME)))
+        def vector_search(k, **filters):
+            return store_manager.search(query_embedding, document_ids, k=k, **filters)
+    
+    if query is None:
+        return vector_search(k, **filters)
+    return retrieval.hybrid_search(vector_search, lexical_index, query, document_ids, k=k, **filters)
+
+def search_documents_batch(query_embeddings, queries, active_file=None, k=5, **filters):
+    """
+    Run search_documents for several questions with one vector store request per document.
+    
+    Returns one list of results per question.
+    """
+    if active_file:
+        source = manifest.resolve_source(active_file)
+        document_ids = [source]
+        def vector_search(k, **filters):
+            return vector_store.similarity_search_batch(store_manager.get(source), query_embeddings, k=k, **filters)
+    else:
+        document_ids = route_documents(' '.join(queries), sorted(manifest.documents(COLLECTION_NAME)))
+        def vector_search(k, **filters):
+            return store_manager.search_batch(query_embeddings, document_ids, k=k, **filters)
+    
+    return retrieval.hybrid_search_batch(vector_search, lexical_index, queries, document_ids, k=k, **filters)
+
+NO_RESULTS_MESSAGE = "No relevant information found in the uploaded documents."
+
+# Tokens of retrieved context per prompt, sized to the LLM's context window
+CONTEXT_TOKEN_BUDGET = context_builder.token_budget()
+
+# A wide candidate set is retrieved and re-ranked down to the chunks sent to the LLM
+RERANK_CANDIDATES = int(os.environ.get('RERANK_CANDIDATES', '50'))
+RERANK_TOP_N = int(os.environ.get('RERANK_TOP_N', '4'))
+
+# Time-to-first-token and tokens/sec of recent streamed answers
+generation_metrics = deque(maxlen=100)
+
+def build_question_prompt(query, active_file=None, query_embedding=None, context_report=None):
+    """
+    Retrieve context for a question and build the LLM prompt.
+
+    Returns None when no relevant chunks were found. context_report is
+    filled in with the tokens and chunks used, see context_builder.build_context,
+    and the re-ranking report under 'rerank'.
+    """
+    if context_report is None:
+        context_report = {}
+    # Generate query embedding
+    if query_embedding is None:
+        query_embedding = embedding_model.embed_query(query)
+    
+    # Get the most relevant results from the active document's collection
+    results = search_documents(query_embedding, active_file, k=RERANK_CANDIDATES, query=query)
+    return prompt_from_candidates(query, results, context_report)
+
+def prompt_from_candidates(query, results, context_report=None):
+    """
+    Re-rank the chunks retrieved for a question and build the LLM prompt.
+    
+    Returns None when no relevant chunks were found; context_report is
+    filled in as by build_question_prompt.
+    """
+    if context_report is None:
+        context_report = {}
+    context_report['rerank'] = {}
+    results = get_shared_reranker().rerank(query, results, top_n=RERANK_TOP_N, report=context_report['rerank'])
+    
+    if not results:
+        return None
+    
+    # Extract document metadata for advanced prompting
+    document_metadata = {}
+    if results and "source" in results[0].metadata:
+        document_metadata = get_document_metadata(results[0].metadata["source"])
+    
+    # Pack the most relevant chunks into the model's context budget
+    context = context_builder.build_context(results, max_tokens=CONTEXT_TOKEN_BUDGET, report=context_report)
+    
+    # Generate prompt (use advanced prompt for complex questions)
+    if len(query.split()) > 8 or '?' in query or any(word in query.lower() for word in ['explain', 'compare', 'analyze', 'why', 'how']):
+        # Likely a complex question - use advanced prompt
+        prompt = prompts.generate_advanced_prompt(context, query, document_metadata)
+    else:
+        # Simple question - use standard prompt
+        prompt = prompts.generate_prompt(context, query)
+    
+    return prompt
+
+def document_state(active_file=None):
+    """
+    Identify the document(s) a question is answered from and their content.
+    
+    Returns a (document_id, content_hash) pair; content_hash is None when the
+    document has not been ingested yet.
+    """
+    if active_file:
+        source = manifest.resolve_source(active_file)
+        return source, manifest.content_hash(source, COLLECTION_NAME)
+    hashes = sorted(
+        f"{source}:{manifest.content_hash(source, COLLECTION_NAME)}"
+        for source in manifest.documents(COLLECTION_NAME)
+    )
+    if not hashes:
+        return '*', None
+    return '*', hashlib.sha256("\n".join(hashes).encode('utf-8')).hexdigest()
+
+def lookup_cached_answer(query, model, active_file=None, query_embedding=None):
+    """
+    Look a question up in the exact and then the semantic answer cache.
+    
+    Returns (answer, cache_hit, lookup): answer is None on a miss, cache_hit
+    is 'exact', 'semantic' or None, and lookup is passed on to
+    remember_answer and build_question_prompt. query_embedding, if already
+    computed, is used instead of embedding the query again.
+    """
+    document_id, document_hash = document_state(active_file)
+    lookup = {'document_id': document_id, 'cache_key': None, 'partition': None, 'query_embedding': None}
+    if document_hash is None:
+        return None, None, lookup
+    
+    lookup['cache_key'] = answer_cache.make_key(query, document_hash, model, prompts.PROMPT_TEMPLATE_VERSION)
+    cached_answer = answer_cache.get(lookup['cache_key'])
+    if cached_answer is not None:
+        return cached_answer, 'exact', lookup
+    
+    # The query embedding is needed for retrieval anyway, so compute it once here
+    lookup['partition'] = (document_hash, model, prompts.PROMPT_TEMPLATE_VERSION)
+    if query_embedding is None:
+        query_embedding = embedding_model.embed_query(query)
+    lookup['query_embedding'] = query_embedding
+    cached_answer, _ = semantic_cache.get(lookup['query_embedding'], lookup['partition'], query)
+    if cached_answer is not None:
+        return cached_answer, 'semantic', lookup
+    
+    return None, None, lookup
+
+def remember_answer(query, answer, lookup):
+    """Store a freshly generated answer in the answer caches."""
+    if lookup['cache_key'] is not None:
+        answer_cache.put(lookup['cache_key'], answer, lookup['document_id'])
+    if lookup['query_embedding'] is not None:
+        semantic_cache.put(lookup['query_embedding'], lookup['partition'], query, answer, lookup['document_id'])
+
+def inflight_key(query, model, lookup):
+    """Identity of a question for request coalescing: document, normalized query and model."""
+    return (lookup['document_id'], lookup['cache_key'] or (normalize_query(query), model))
+
 def answer_question(query, model="gemma3:1b", active_file=None):
     """
     Answer a question based on the uploaded PDFs with enhanced context awareness.
+    
+    Returns an (answer, cache_hit) pair, where cache_hit is 'exact' or
+    'semantic' when the answer was served from a cache, otherwise None.
     """
     try:
-        # Generate query embedding
-        query_embedding = embedding_model.embed_query(query)
-        
-        # First get all relevant results
-        results = vector_store.similarity_search(vs, query_embedding)
-        
-        # If we have an active file, filter results manually
-        if active_file and results:
-            filtered_results = [r for r in results if r.metadata.get('source') == active_file]
-            
-            # Only use the filtered results if we found some, otherwise fall back to all results
-            if filtered_results:
-                results = filtered_results
+        cached_answer, cache_hit, lookup = lookup_cached_answer(query, model, active_file)
+        if cached_answer is not None:
+            return cached_answer, cache_hit
         
-        if not results:
-            return "No relevant information found in the uploaded documents."
-        
-        # Extract document metadata for advanced prompting
-        document_metadata = {}
-        if results and "source" in results[0].metadata:
-            document_metadata = get_document_metadata(results[0].metadata["source"])
-        
-        # Format results
-        formatted_chunks = []
-        for i, result in enumerate(results):
-            # Extract metadata
-            metadata = result.metadata
-            source = metadata.get('source', 'Unknown')
-            page_num = metadata.get('page', 'Unknown')
-            section_title = metadata.get('section_title', '')
+        def generate():
+            prompt = build_question_prompt(query, active_file, lookup['query_embedding'])
+            if prompt is None:
+                return NO_RESULTS_MESSAGE
             
-            # Format chunk with metadata
-            chunk_header = f"[CHUNK {i+1} | Source: {source} | Page: {page_num}"
-            if section_title:
-                chunk_header += f" | Section: {section_title}"
-            chunk_header += "]"
+            # Generate response
+            response = llm.generate_response(model, prompt)
             
-            formatted_chunks.append(f"{chunk_header}\n{result.page_content}")
+            remember_answer(query, response, lookup)
+            return response
         
-        # Join with clear separation
-        context = "\n\n" + "\n\n---\n\n".join(formatted_chunks) + "\n\n"
+        # Concurrent identical questions wait for the first one's answer
+        response, _ = inflight_answers.run(inflight_key(query, model, lookup), generate)
         
-        # Generate prompt (use advanced prompt for complex questions)
-        if len(query.split()) > 8 or '?' in query or any(word in query.lower() for word in ['explain', 'compare', 'analyze', 'why', 'how']):
-            # Likely a complex question - use advanced prompt
-            prompt = prompts.generate_advanced_prompt(context, query, document_metadata)
+        return response, None
+    except Exception as e:
+        return f"Error processing your question: {str(e)}", None
+
+# Batch questions: generations in flight per batch, and questions per request
+BATCH_CONCURRENCY = int(os.environ.get('BATCH_CONCURRENCY', '4'))
+MAX_BATCH_QUESTIONS = int(os.environ.get('MAX_BATCH_QUESTIONS', '100'))
+
+def answer_questions(queries, model="gemma3:1b", active_file=None, max_concurrency=BATCH_CONCURRENCY):
+    """
+    Answer several questions about the same document(s) in one pass.
+    
+    All questions are embedded in one request, looked up in the answer
+    caches, and the misses are searched as one batch. Their answers are
+    generated with at most max_concurrency generations in flight.
+    
+    Returns one dict per question, in order, with 'query', 'answer',
+    'cache_hit', 'error', 'retrieval_seconds', 'generation_seconds' and
+    'seconds' from the start of the batch until the answer was ready.
+    """
+    start = time.perf_counter()
+    query_embeddings = embedding_model.embed_documents(queries)
+    
+    answers = [None] * len(queries)
+    misses = []
+    for i, (query, query_embedding) in enumerate(zip(queries, query_embeddings)):
+        cached_answer, cache_hit, lookup = lookup_cached_answer(query, model, active_file, query_embedding)
+        if cached_answer is not None:
+            answers[i] = {
+                'query': query, 'answer': cached_answer, 'cache_hit': cache_hit, 'error': None,
+                'retrieval_seconds': 0.0, 'generation_seconds': 0.0, 'seconds': time.perf_counter() - start
+            }
         else:
-            # Simple question - use standard prompt
-            prompt = prompts.generate_prompt(context, query)
+            misses.append((i, lookup))
+    if not misses:
+        return answers
+    
+    retrieval_start = time.perf_counter()
+    batch_results = search_documents_batch(
+        [query_embeddings[i] for i, _ in misses], [queries[i] for i, _ in misses],
+        active_file, k=RERANK_CANDIDATES
+    )
+    retrieval_seconds = time.perf_counter() - retrieval_start
+    
+    def answer(i, lookup, results):
+        query = queries[i]
+        generation_start = time.perf_counter()
         
-        # Generate response
-        response = llm.generate_response(model, prompt)
+        def generate():
+            prompt = prompt_from_candidates(query, results)
+            if prompt is None:
+                return NO_RESULTS_MESSAGE
+            response = llm.generate_response(model, prompt)
+            remember_answer(query, response, lookup)
+            return response
         
-        return response
-    except Exception as e:
-        return f"Error processing your question: {str(e)}"
+        try:
+            response, _ = inflight_answers.run(inflight_key(query, model, lookup), generate)
+            error = None
+        except Exception as e:
+            response, error = None, str(e)
+        finished = time.perf_counter()
+        answers[i] = {
+            'query': query, 'answer': response, 'cache_hit': None, 'error': error,
+            'retrieval_seconds': retrieval_seconds, 'generation_seconds': finished - generation_start,
+            'seconds': finished - start
+        }
+    
+    with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+        list(executor.map(answer, [i for i, _ in misses], [lookup for _, lookup in misses], batch_results))
+    return answers
+
+def stream_answer(query, model="gemma3:1b", active_file=None, metrics=None):
+    """
+    Answer a question, yielding the response tokens as the model produces them.
+    """
+    if metrics is None:
+        metrics = {}
+    cached_answer, cache_hit, lookup = lookup_cached_answer(query, model, active_file)
+    metrics['cached'] = cache_hit is not None
+    metrics['cache_hit'] = cache_hit
+    if cached_answer is not None:
+        yield cached_answer
+        return
+    
+    def generate():
+        start = time.perf_counter()
+        context_report = {}
+        prompt = build_question_prompt(query, active_file, lookup['query_embedding'], context_report)
+        metrics['retrieval_seconds'] = time.perf_counter() - start
+        metrics['context_tokens'] = context_report.get('tokens_used')
+        metrics['rerank_seconds'] = context_report.get('rerank', {}).get('seconds')
+        if prompt is None:
+            yield NO_RESULTS_MESSAGE
+            return
+        
+        answer_parts = []
+        for token in llm.generate_response_stream(model, prompt, metrics):
+            answer_parts.append(token)
+            yield token
+        
+        remember_answer(query, ''.join(answer_parts), lookup)
+    
+    # Concurrent identical questions attach to the first one's token stream;
+    # generation metrics are only recorded by the request that started it
+    tokens, shared = inflight_answers.stream(inflight_key(query, model, lookup), generate)
+    metrics['coalesced'] = shared
+    yield from tokens
 
 @app.route('/')
 def index():
@@ -169,7 +510,7 @@ def index():
             file_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
             uploaded_files.append({
                 'name': filename,
-                'processed': file_path in processed_files,
+                'processed': is_processed(filename),
                 'size': os.path.getsize(file_path),
                 'url': url_for('serve_pdf', filename=filename)
             })
@@ -213,8 +554,11 @@ def upload_file():
         file_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
         file.save(file_path)
         
-        # Process the file with the selected splitting strategy
-        success = process_pdf(file_path, splitting_strategy)
+        # Queue the file for processing with the selected splitting strategy
+        job_id = ingestion_jobs.submit({
+            'file_path': file_path,
+            'splitting_strategy': splitting_strategy
+        })
         
         # Set as active document
         session['active_document'] = filename
@@ -222,17 +566,16 @@ def upload_file():
         # AJAX response
         if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
             return jsonify({
-                'success': success,
+                'success': True,
                 'filename': filename,
-                'message': f'Successfully processed {filename}' if success else f'Error processing {filename}',
+                'job_id': job_id,
+                'status_url': url_for('job_status', job_id=job_id),
+                'message': f'Uploaded {filename}, processing in the background',
                 'url': url_for('serve_pdf', filename=filename)
-            })
+            }), 202
             
         # Regular form submission response
-        if success:
-            flash(f'Successfully uploaded and processed {filename}')
-        else:
-            flash(f'Uploaded {filename}, but there was an error processing it')
+        flash(f'Uploaded {filename}, processing in the background')
         
         return redirect(url_for('index'))
     
@@ -242,6 +585,67 @@ def upload_file():
     flash('Invalid file type. Please upload a PDF.')
     return redirect(url_for('index'))
 
+@app.route('/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    """Report the state, per-stage timings and progress of an ingestion job."""
+    job = ingestion_jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown job'}), 404
+    # The job's params hold the server path of the upload; only its name is reported
+    file_path = job['params'].get('file_path') or ''
+    filename = os.path.basename(file_path)
+    error = job['error']
+    if error and file_path:
+        error = error.replace(file_path, filename)
+    return jsonify({
+        'id': job['id'],
+        'filename': filename,
+        'state': job['state'],
+        'created_at': job['created_at'],
+        'updated_at': job['updated_at'],
+        'stages': job['stages'],
+        'progress': job['progress'],
+        'result': job['result'],
+        'error': error
+    })
+
+@app.route('/documents/<filename>', methods=['DELETE'])
+def delete_document(filename):
+    """Delete one document's vectors without touching the other documents."""
+    source = manifest.resolve_source(secure_filename(filename))
+    removed = manifest.remove_source(source)
+    store_manager.delete(source)
+    lexical_index.remove_document(source)
+    answer_cache.invalidate_document(source)
+    semantic_cache.invalidate_document(source)
+    processed_files.discard(os.path.join(app.config['UPLOAD_FOLDER'], source))
+    return jsonify({'success': True, 'document': source, 'manifest_entries_removed': len(removed)})
+
+@app.route('/documents/<filename>/rebuild', methods=['POST'])
+def rebuild_document(filename):
+    """Drop one document's vectors and queue it for ingestion again."""
+    source = manifest.resolve_source(secure_filename(filename))
+    file_path = os.path.join(app.config['UPLOAD_FOLDER'], source)
+    if not os.path.exists(file_path):
+        return jsonify({'error': 'Unknown document'}), 404
+    removed = manifest.remove_source(source)
+    store_manager.delete(source)
+    lexical_index.remove_document(source)
+    answer_cache.invalidate_document(source)
+    semantic_cache.invalidate_document(source)
+    processed_files.discard(file_path)
+    splitting_strategy = removed[-1]['splitting_strategy'] if removed else 'hybrid'
+    job_id = ingestion_jobs.submit({
+        'file_path': file_path,
+        'splitting_strategy': request.form.get('splitting_strategy', splitting_strategy)
+    })
+    return jsonify({
+        'success': True,
+        'document': source,
+        'job_id': job_id,
+        'status_url': url_for('job_status', job_id=job_id)
+    }), 202
+
 @app.route('/set_active_document', methods=['POST'])
 def set_active_document():
     """Set the currently active document for the chat interface."""
@@ -262,7 +666,7 @@ def ask_question():
     if not query:
         return jsonify({'error': 'No question provided'})
     
-    if not processed_files:
+    if not processed_files and not manifest.sources(COLLECTION_NAME):
         return jsonify({'error': 'No documents have been processed yet. Please upload and process a PDF first.'})
     
     # Get chat history or initialize if not exists
@@ -280,7 +684,7 @@ def ask_question():
     })
     
     # Generate answer considering active document
-    answer = answer_question(query, active_file=active_document if active_document else None)
+    answer, cache_hit = answer_question(query, active_file=active_document if active_document else None)
     
     # Add assistant response to history
     chat_history.append({
@@ -297,9 +701,89 @@ def ask_question():
     return jsonify({
         'query': query,
         'answer': answer,
+        'cached': cache_hit is not None,
+        'cache_hit': cache_hit,
         'chat_history': chat_history
     })
 
+@app.route('/ask_batch', methods=['POST'])
+def ask_batch():
+    """
+    Answer a list of questions about the active (or given) document in one request.
+    
+    Expects a JSON body with 'queries' and optionally 'model' and
+    'active_document'. Questions are not added to the chat history.
+    """
+    payload = request.get_json(silent=True) or {}
+    queries = payload.get('queries')
+    if not isinstance(queries, list) or not queries or not all(isinstance(q, str) and q for q in queries):
+        return jsonify({'error': 'Expected a non-empty list of questions in "queries"'}), 400
+    if len(queries) > MAX_BATCH_QUESTIONS:
+        return jsonify({'error': f'At most {MAX_BATCH_QUESTIONS} questions per batch'}), 400
+    if not processed_files and not manifest.sources(COLLECTION_NAME):
+        return jsonify({'error': 'No documents have been processed yet. Please upload and process a PDF first.'})
+    
+    active_document = payload.get('active_document', session.get('active_document', ''))
+    start = time.perf_counter()
+    answers = answer_questions(queries, payload.get('model', 'gemma3:1b'),
+                               active_file=active_document if active_document else None)
+    return jsonify({'answers': answers, 'seconds': time.perf_counter() - start})
+
+def sse_event(data, event=None):
+    """Format a server-sent event."""
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data)}\n\n"
+
+@app.route('/ask_stream', methods=['POST'])
+def ask_question_stream():
+    """Streaming variant of /ask that sends answer tokens as server-sent events."""
+    query = request.form.get('query', '')
+    active_document = request.form.get('active_document', session.get('active_document', ''))
+    
+    if not query:
+        return jsonify({'error': 'No question provided'})
+    
+    if not processed_files and not manifest.sources(COLLECTION_NAME):
+        return jsonify({'error': 'No documents have been processed yet. Please upload and process a PDF first.'})
+    
+    import datetime
+    current_time = datetime.datetime.now().strftime('%H:%M')
+    
+    # The session cookie is sent with the response headers, before the answer
+    # exists, so only the user's message can be added to the chat history here
+    chat_history = session.get('chat_history', [])
+    chat_history.append({
+        'role': 'user',
+        'content': query,
+        'timestamp': current_time
+    })
+    session['chat_history'] = chat_history
+    session['last_query'] = query
+    
+    def events():
+        request_start = time.perf_counter()
+        metrics = {}
+        answer_parts = []
+        try:
+            for token in stream_answer(query, active_file=active_document if active_document else None, metrics=metrics):
+                if not answer_parts:
+                    metrics['request_time_to_first_token'] = time.perf_counter() - request_start
+                answer_parts.append(token)
+                yield sse_event({'token': token})
+        except Exception as e:
+            yield sse_event({'error': f"Error processing your question: {str(e)}"}, event='error')
+        metrics['request_seconds'] = time.perf_counter() - request_start
+        generation_metrics.append(dict(metrics, query=query))
+        yield sse_event({
+            'query': query,
+            'answer': ''.join(answer_parts),
+            'timestamp': current_time,
+            'metrics': metrics
+        }, event='done')
+    
+    return Response(stream_with_context(events()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
 @app.route('/clear_chat', methods=['POST'])
 def clear_chat():
     """Clear the chat history."""
@@ -343,7 +827,8 @@ def test_model():
         return jsonify({
             'success': True,
             'response': response,
-            'message': 'Model is working correctly'
+            'message': 'Model is working correctly',
+            'client': ollama_client.get_client().stats()
         })
     except Exception as e:
         return jsonify({
@@ -356,13 +841,21 @@ def test_model():
 def debug_search():
     """Debug endpoint to test search functionality."""
     query = request.args.get('query', 'test')
+    source = request.args.get('source')
+    first_page = request.args.get('first_page', type=int)
+    last_page = request.args.get('last_page', type=int)
     
     try:
         # Generate query embedding
         query_embedding = embedding_model.embed_query(query)
         
-        # Get all search results
-        results = vector_store.similarity_search(vs, query_embedding)
+        # Get search results, optionally filtered by document and pages
+        results = search_documents(
+            query_embedding,
+            source,
+            query=query,
+            page_range=(first_page, last_page) if first_page is not None or last_page is not None else None
+        )
         
         # Format results for display
         formatted_results = []
@@ -386,6 +879,30 @@ def debug_search():
             'message': 'Error testing search functionality'
         })
 
+@app.route('/debug/cache', methods=['GET'])
+def debug_cache():
+    """Debug endpoint reporting cache hit/miss counters."""
+    return jsonify({
+        'embeddings': embedding_model.stats(),
+        'answers': answer_cache.stats(),
+        'semantic_answers': semantic_cache.stats(),
+        'reranker': get_shared_reranker().stats(),
+        'inflight_answers': inflight_answers.stats()
+    })
+
+@app.route('/debug/generation', methods=['GET'])
+def debug_generation():
+    """Debug endpoint reporting time-to-first-token and tokens/sec of recent streamed answers."""
+    recent = list(generation_metrics)
+    ttfts = [m['time_to_first_token'] for m in recent if m.get('time_to_first_token') is not None]
+    rates = [m['tokens_per_sec'] for m in recent if m.get('tokens_per_sec')]
+    return jsonify({
+        'requests': len(recent),
+        'mean_time_to_first_token': sum(ttfts) / len(ttfts) if ttfts else None,
+        'mean_tokens_per_sec': sum(rates) / len(rates) if rates else None,
+        'recent': recent
+    })
+
 def import_datetime():
     """Import datetime module (helper for timestamp generation)."""
     import datetime
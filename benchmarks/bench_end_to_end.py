@@ -0,0 +1,256 @@
+"""
+End-to-end benchmark of ingestion and question answering against a fake Ollama server.
+
+Usage:
+    python -m benchmarks.bench_end_to_end [pdf ...] [--queries FILE] [--concurrency N]
+        [--latency S] [--token-rate N] [--answer-tokens N] [--output report.json] [--compare old.json]
+
+Starts benchmarks.fake_ollama on a free port and runs each scenario in a
+fresh process pointed at it through OLLAMA_HOST, inside a scratch
+directory, so nothing is read from or written to the working tree:
+
+- ingest: ingestion.ingest_pdf (loaders, text_processing, vector_store)
+  of every PDF into an empty index, one latency sample per file
+- analyze_pdf: main.analyze_pdf for every PDF and question, reusing the
+  index built by the ingest scenario
+- answer_question: the web app's ingest_file for every PDF, then
+  answer_question for every PDF and question on --concurrency threads
+
+Reports, per scenario, the throughput, p50/p95/p99 latency and the peak
+resident memory of its process, plus the request counts seen by the fake
+server. The report is JSON with stable keys; --output saves it and
+--compare prints the change of every metric against an earlier report.
+"""
+import argparse
+import glob
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from benchmarks.fake_ollama import FakeOllamaServer
+from src import cli, ingestion, main as analysis, ollama_client
+
+SCENARIOS = ("ingest", "analyze_pdf", "answer_question")
+
+DEFAULT_QUERIES = [
+    "Who are the authors of the paper?",
+    "What problem does the paper address?",
+    "Which datasets are used in the evaluation?",
+    "What are the main results?",
+    "What are the limitations of the approach?",
+]
+
+MODEL = "gemma3:1b"
+EMBEDDING_MODEL = "nomic-embed-text"
+
+# Metrics compared by --compare, and whether higher is better
+COMPARED_METRICS = {
+    "throughput_per_sec": True,
+    "p50_ms": False,
+    "p95_ms": False,
+    "p99_ms": False,
+    "peak_rss_mb": False,
+}
+
+
+def peak_rss_mb():
+    # Peak resident set size of this process; ru_maxrss is in KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def summarize(latencies, seconds, **extra):
+    """
+    Summarize the latency samples of a scenario.
+
+    Args:
+        latencies (list): Seconds taken by each operation
+        seconds (float): Wall time of the whole scenario
+        **extra: Additional fields for the summary
+
+    Returns:
+        dict: Operation count, wall time, operations per second, latency
+        percentiles in milliseconds and peak memory
+    """
+    summary = {
+        "operations": len(latencies),
+        "seconds": seconds,
+        "throughput_per_sec": len(latencies) / seconds if seconds > 0 else 0.0,
+        "p50_ms": float(np.percentile(latencies, 50) * 1000) if latencies else None,
+        "p95_ms": float(np.percentile(latencies, 95) * 1000) if latencies else None,
+        "p99_ms": float(np.percentile(latencies, 99) * 1000) if latencies else None,
+    }
+    summary.update(extra)
+    summary["peak_rss_mb"] = peak_rss_mb()
+    summary["ollama_requests"] = ollama_client.get_client().stats()["requests"]
+    return summary
+
+
+def run_ingest(pdf_paths, queries, concurrency):
+    index = analysis.DocumentIndex(EMBEDDING_MODEL)
+    latencies, pages, chunks = [], 0, 0
+    start = time.perf_counter()
+    for pdf_path in pdf_paths:
+        file_start = time.perf_counter()
+        entry = index.ingest(pdf_path)
+        latencies.append(time.perf_counter() - file_start)
+        pages += len(entry["pages"])
+        chunks += entry["chunk_count"]
+    seconds = time.perf_counter() - start
+    return summarize(latencies, seconds, pages=pages, chunks=chunks,
+                     pages_per_sec=pages / seconds if seconds > 0 else 0.0)
+
+
+def run_analyze_pdf(pdf_paths, queries, concurrency):
+    index = analysis.DocumentIndex(EMBEDDING_MODEL)
+    latencies = []
+    start = time.perf_counter()
+    for pdf_path in pdf_paths:
+        for query in queries:
+            query_start = time.perf_counter()
+            analysis.analyze_pdf(pdf_path, query, model=MODEL, index=index)
+            latencies.append(time.perf_counter() - query_start)
+    return summarize(latencies, time.perf_counter() - start)
+
+
+def run_answer_question(pdf_paths, queries, concurrency):
+    # The web app creates its upload folder and stores in the working
+    # directory on import, so it is only imported inside the scratch directory
+    from app import web_page
+
+    start = time.perf_counter()
+    for pdf_path in pdf_paths:
+        web_page.ingest_file(pdf_path)
+    ingest_seconds = time.perf_counter() - start
+
+    def answer(pdf_path, query):
+        query_start = time.perf_counter()
+        web_page.answer_question(query, model=MODEL, active_file=os.path.basename(pdf_path))
+        return time.perf_counter() - query_start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = [executor.submit(answer, pdf_path, query) for pdf_path in pdf_paths for query in queries]
+        latencies = [future.result() for future in futures]
+    return summarize(latencies, time.perf_counter() - start, ingest_seconds=ingest_seconds,
+                     concurrency=concurrency)
+
+
+RUNNERS = {
+    "ingest": run_ingest,
+    "analyze_pdf": run_analyze_pdf,
+    "answer_question": run_answer_question,
+}
+
+
+def compare(report, baseline):
+    """
+    Print the change of every compared metric against an earlier report.
+
+    Args:
+        report (dict): The new report
+        baseline (dict): The earlier report
+    """
+    print(f"Compared with {baseline.get('commit') or 'baseline'}:")
+    for scenario, metrics in report["scenarios"].items():
+        old = baseline.get("scenarios", {}).get(scenario)
+        if not old:
+            continue
+        for metric, higher_is_better in COMPARED_METRICS.items():
+            if not metrics.get(metric) or not old.get(metric):
+                continue
+            change = metrics[metric] / old[metric] - 1
+            better = (change > 0) == higher_is_better
+            print(f"  {scenario:16} {metric:20} {old[metric]:10.2f} -> {metrics[metric]:10.2f} "
+                  f"({change:+.1%}{'' if abs(change) < 0.05 else ', better' if better else ', worse'})")
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], check=True, capture_output=True,
+                              text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("pdfs", nargs="*", help="PDFs to use (default: pdf_files/*.pdf)")
+    parser.add_argument("--queries", help="question file, see cli.load_queries (default: built-in questions)")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--concurrency", type=int, default=4, help="answer_question threads")
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds before the first token")
+    parser.add_argument("--token-rate", type=float, default=200.0, help="generated tokens per second")
+    parser.add_argument("--answer-tokens", type=int, default=64)
+    parser.add_argument("--embed-latency", type=float, default=0.01, help="seconds per embed request")
+    parser.add_argument("--embed-text-latency", type=float, default=0.0005, help="seconds per embedded text")
+    parser.add_argument("--dimension", type=int, default=768)
+    parser.add_argument("--parse-workers", type=int, default=ingestion.PARSE_WORKERS)
+    parser.add_argument("--output", help="write the JSON report to this file")
+    parser.add_argument("--compare", help="earlier JSON report to compare with")
+    parser.add_argument("--worker", choices=SCENARIOS, help=argparse.SUPPRESS)
+    parser.add_argument("--workdir", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    pdf_paths = [os.path.abspath(path) for path in (args.pdfs or sorted(glob.glob("pdf_files/*.pdf")))]
+    queries = cli.load_queries(args.queries) if args.queries else DEFAULT_QUERIES
+
+    if args.worker:
+        os.chdir(args.workdir)
+        result = RUNNERS[args.worker](pdf_paths, queries, args.concurrency)
+        print(json.dumps(result))
+        return
+
+    server = FakeOllamaServer(dimension=args.dimension, latency=args.latency, token_rate=args.token_rate,
+                              answer_tokens=args.answer_tokens, embed_latency=args.embed_latency,
+                              embed_text_latency=args.embed_text_latency).start()
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, OLLAMA_HOST=server.url, INGEST_PARSE_WORKERS=str(args.parse_workers),
+               PYTHONPATH=os.pathsep.join(filter(None, [root, os.environ.get("PYTHONPATH")])))
+    queries_args = ["--queries", os.path.abspath(args.queries)] if args.queries else []
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": time.time(),
+        "pdfs": [os.path.basename(path) for path in pdf_paths],
+        "queries": len(queries),
+        "fake_ollama": {"latency": args.latency, "token_rate": args.token_rate,
+                        "answer_tokens": args.answer_tokens, "embed_latency": args.embed_latency,
+                        "embed_text_latency": args.embed_text_latency, "dimension": args.dimension},
+        "scenarios": {},
+    }
+    try:
+        with tempfile.TemporaryDirectory() as workdir:
+            # analyze_pdf reuses the index that the ingest scenario builds in workdir
+            for scenario in args.scenarios:
+                before = dict(server.stats)
+                output = subprocess.run(
+                    [sys.executable, "-m", "benchmarks.bench_end_to_end", *pdf_paths, *queries_args,
+                     "--worker", scenario, "--workdir", workdir, "--concurrency", str(args.concurrency)],
+                    check=True, capture_output=True, text=True, cwd=root, env=env
+                ).stdout
+                result = json.loads(output.strip().splitlines()[-1])
+                result["server"] = {name: server.stats[name] - before[name] for name in server.stats}
+                report["scenarios"][scenario] = result
+                print(f"{scenario}: {result['throughput_per_sec']:.2f}/s, p50 {result['p50_ms']:.1f} ms, "
+                      f"p99 {result['p99_ms']:.1f} ms, peak {result['peak_rss_mb']:.0f} MB", file=sys.stderr)
+    finally:
+        server.stop()
+
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            compare(report, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Benchmark of the "hybrid" splitting strategy against its previous implementation.
+
+Usage:
+    python -m benchmarks.bench_hybrid_splitter [--repeat N] [pdf ...]
+
+The previous implementation ran the semantic strategy (header split, then a
+size split at chunk_size // 2) followed by a second size split at chunk_size.
+Reports pages/sec for both, the speedup, and whether both produce the same
+chunk boundaries and section metadata.
+"""
+import argparse
+import glob
+import json
+import re
+import time
+
+from langchain_core.documents import Document
+from langchain_text_splitters import MarkdownHeaderTextSplitter, RecursiveCharacterTextSplitter
+
+from src import loaders, text_processing
+
+
+def legacy_hybrid_split(docs, chunk_size=1000, chunk_overlap=200):
+    """The previous "hybrid" implementation, unchanged."""
+    headers_to_split_on = [
+        ("#", "Header 1"),
+        ("##", "Header 2"),
+        ("###", "Header 3"),
+        ("####", "Header 4"),
+        ("Abstract", "Abstract"),
+        ("Introduction", "Introduction"),
+        ("Conclusion", "Conclusion"),
+        ("References", "References")
+    ]
+    markdown_splitter = MarkdownHeaderTextSplitter(headers_to_split_on=headers_to_split_on)
+    split_docs = []
+    for doc in docs:
+        text = doc.page_content
+        text = re.sub(r'^(Abstract|Introduction|Methodology|Results|Discussion|Conclusion|References)(\s*\n)', r'# \1\2', text, flags=re.MULTILINE)
+        md_splits = markdown_splitter.split_text(text)
+        for split in md_splits:
+            split_metadata = doc.metadata.copy()
+            for header_key in split.metadata:
+                split_metadata[f"section_{header_key}"] = split.metadata[header_key]
+            split_docs.append(Document(page_content=split.page_content, metadata=split_metadata))
+    text_splitter = RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size // 2,
+        chunk_overlap=chunk_overlap,
+        add_start_index=True
+    )
+    semantic_docs = text_splitter.split_documents(split_docs)
+
+    text_splitter = RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        add_start_index=True
+    )
+    return text_splitter.split_documents(semantic_docs)
+
+
+def current_split(docs):
+    return text_processing.split_documents(docs, splitting_strategy="hybrid")
+
+
+def boundaries(chunks):
+    # start_index was reset to 0 by the removed second pass; compare everything else
+    return [
+        (chunk.page_content, {key: value for key, value in chunk.metadata.items() if key != "start_index"})
+        for chunk in chunks
+    ]
+
+
+def best_time(function, docs, repeat):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function(docs)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("pdfs", nargs="*", default=sorted(glob.glob("pdf_files/*.pdf")))
+    parser.add_argument("--repeat", type=int, default=5, help="runs per implementation; the best is kept")
+    args = parser.parse_args()
+
+    docs = [doc for path in args.pdfs for doc in loaders.load_pdf(path)]
+
+    legacy_seconds, legacy_chunks = best_time(legacy_hybrid_split, docs, args.repeat)
+    current_seconds, current_chunks = best_time(current_split, docs, args.repeat)
+
+    report = {
+        "pdfs": args.pdfs,
+        "pages": len(docs),
+        "legacy_pages_per_sec": len(docs) / legacy_seconds,
+        "current_pages_per_sec": len(docs) / current_seconds,
+        "speedup": legacy_seconds / current_seconds,
+        "chunks": len(current_chunks),
+        "identical_boundaries": boundaries(legacy_chunks) == boundaries(current_chunks),
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
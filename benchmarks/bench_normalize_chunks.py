@@ -0,0 +1,97 @@
+"""
+Micro-benchmark of normalize_chunk_lengths against its previous implementation.
+
+Usage:
+    python -m benchmarks.bench_normalize_chunks [--chunks N] [--repeat N]
+
+Normalizes synthetic chunks of mixed lengths at a typical target length and
+at a large one (long merged buffers), and reports chunks/sec for both
+implementations and whether their outputs are identical.
+"""
+import argparse
+import json
+import random
+import time
+
+from langchain_core.documents import Document
+
+from src import text_processing
+
+
+def legacy_normalize_chunk_lengths(chunks, target_length=800):
+    """The previous implementation, unchanged."""
+    normalized_chunks = []
+    buffer = ""
+    buffer_metadata = None
+    for chunk in chunks:
+        if not buffer:
+            buffer = chunk.page_content
+            buffer_metadata = chunk.metadata
+            continue
+        if len(buffer) < target_length and len(buffer) + len(chunk.page_content) <= target_length * 1.5:
+            buffer += "\n\n" + chunk.page_content
+            if 'page' in chunk.metadata and 'page' in buffer_metadata:
+                buffer_metadata = {**chunk.metadata, 'page': buffer_metadata['page']}
+            else:
+                buffer_metadata = {**buffer_metadata, **chunk.metadata}
+        else:
+            normalized_chunks.append(Document(page_content=buffer, metadata=buffer_metadata))
+            buffer = chunk.page_content
+            buffer_metadata = chunk.metadata
+    if buffer:
+        normalized_chunks.append(Document(page_content=buffer, metadata=buffer_metadata))
+    return normalized_chunks
+
+
+def without_offsets(metadata):
+    return {key: value for key, value in metadata.items() if key not in ("start_index", "end_index")}
+
+
+def make_chunks(count, seed=0):
+    rng = random.Random(seed)
+    return [
+        Document(
+            page_content="x" * rng.randint(20, 600),
+            metadata={"source": "bench.pdf", "page": i // 4, "start_index": rng.randint(0, 3000)}
+        )
+        for i in range(count)
+    ]
+
+
+def best_time(function, chunks, target_length, repeat):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function(chunks, target_length)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--chunks", type=int, default=50000)
+    parser.add_argument("--repeat", type=int, default=5, help="runs per implementation; the best is kept")
+    args = parser.parse_args()
+
+    chunks = make_chunks(args.chunks)
+    report = {"chunks": args.chunks, "targets": {}}
+    for target_length in (800, 100000):
+        legacy_seconds, legacy_output = best_time(legacy_normalize_chunk_lengths, chunks, target_length, args.repeat)
+        current_seconds, current_output = best_time(text_processing.normalize_chunk_lengths, chunks, target_length, args.repeat)
+        report["targets"][target_length] = {
+            "legacy_chunks_per_sec": args.chunks / legacy_seconds,
+            "current_chunks_per_sec": args.chunks / current_seconds,
+            "speedup": legacy_seconds / current_seconds,
+            "output_chunks": len(current_output),
+            # Merged chunks now keep their first part's start_index and record an end_index
+            "identical_output": (
+                [(d.page_content, without_offsets(d.metadata)) for d in legacy_output]
+                == [(d.page_content, without_offsets(d.metadata)) for d in current_output]
+            ),
+        }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
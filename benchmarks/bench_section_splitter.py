@@ -0,0 +1,145 @@
+"""
+Benchmark of the "section" splitting strategy against its previous implementation.
+
+Usage:
+    python -m benchmarks.bench_section_splitter [--repeat N] [pdf ...]
+
+Pages are loaded once; each implementation then splits every page of every
+PDF in pdf_files/ (or the given PDFs). Reports lines/sec for both, the
+speedup, and whether both produce the same chunks.
+"""
+import argparse
+import glob
+import json
+import re
+import time
+
+from langchain_core.documents import Document
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+from src import loaders, text_processing
+
+
+def legacy_section_split(doc, chunk_size=1000, chunk_overlap=200):
+    """The previous "section" implementation, unchanged, for a single document."""
+    section_patterns = [
+        r'^(\d+\.(?:\d+\.?)*)\s+([^\n]+)$',
+        r'^([IVXivx]+\.(?:\d+\.?)*)\s+([^\n]+)$',
+        r'^([A-Za-z]\.(?:\d+\.?)*)\s+([^\n]+)$',
+        r'^(Abstract|Introduction|Methods|Materials and Methods|Results|Discussion|Conclusion|References|Acknowledgments|Appendix)(\s*\n)',
+        r'^(#{1,6})\s+([^\n]+)$'
+    ]
+    split_docs = []
+    text = doc.page_content
+    lines = text.split('\n')
+    sections = []
+    current_section = {"title": "", "content": [], "level": 0}
+    for line in lines:
+        is_section_header = False
+        section_level = 0
+        for pattern in section_patterns:
+            match = re.match(pattern, line, re.MULTILINE)
+            if match:
+                is_section_header = True
+                if '#' in pattern:
+                    section_level = len(match.group(1))
+                elif r'\d+\.' in pattern:
+                    section_level = match.group(1).count('.') + 1
+                else:
+                    section_level = 1
+                break
+        if is_section_header:
+            if current_section["content"]:
+                sections.append(current_section)
+            current_section = {"title": line, "content": [], "level": section_level}
+        else:
+            current_section["content"].append(line)
+    if current_section["content"]:
+        sections.append(current_section)
+
+    organized_sections = []
+    for section in sections:
+        section_text = section["title"] + "\n" + "\n".join(section["content"])
+        section_metadata = doc.metadata.copy()
+        section_metadata["section_title"] = section["title"].strip()
+        section_metadata["section_level"] = section["level"]
+        organized_sections.append({"text": section_text, "metadata": section_metadata, "level": section["level"]})
+
+    text_splitter = RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        length_function=len,
+        add_start_index=True,
+        separators=["\n\n", "\n", ". ", " ", ""]
+    )
+    for section in organized_sections:
+        title = section["text"].split("\n")[0]
+        content = "\n".join(section["text"].split("\n")[1:])
+        if len(section["text"]) <= chunk_size:
+            split_docs.append(Document(page_content=section["text"], metadata=section["metadata"]))
+        else:
+            dummy_doc = Document(page_content=content, metadata={})
+            content_splits = text_splitter.split_documents([dummy_doc])
+            for i, chunk in enumerate(content_splits):
+                chunk_content = chunk.page_content
+                if i == 0:
+                    chunk_content = title + "\n\n" + chunk_content
+                else:
+                    chunk_content = title + " (continued)\n\n" + chunk_content
+                split_docs.append(Document(page_content=chunk_content, metadata=section["metadata"]))
+    return split_docs
+
+
+def legacy_split(docs):
+    # The previous implementation returned after the first document; call it
+    # once per document so both sides do the same work
+    split_docs = []
+    for doc in docs:
+        split_docs.extend(legacy_section_split(doc))
+    return split_docs
+
+
+def current_split(docs):
+    return text_processing.split_documents(docs, splitting_strategy="section")
+
+
+def best_time(function, docs, repeat):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function(docs)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("pdfs", nargs="*", default=sorted(glob.glob("pdf_files/*.pdf")))
+    parser.add_argument("--repeat", type=int, default=5, help="runs per implementation; the best is kept")
+    args = parser.parse_args()
+
+    docs = [doc for path in args.pdfs for doc in loaders.load_pdf(path)]
+    lines = sum(doc.page_content.count("\n") + 1 for doc in docs)
+
+    legacy_seconds, legacy_chunks = best_time(legacy_split, docs, args.repeat)
+    current_seconds, current_chunks = best_time(current_split, docs, args.repeat)
+
+    report = {
+        "pdfs": args.pdfs,
+        "pages": len(docs),
+        "lines": lines,
+        "legacy_lines_per_sec": lines / legacy_seconds,
+        "current_lines_per_sec": lines / current_seconds,
+        "speedup": legacy_seconds / current_seconds,
+        "chunks": len(current_chunks),
+        "identical_chunks": (
+            [(d.page_content, d.metadata) for d in legacy_chunks]
+            == [(d.page_content, d.metadata) for d in current_chunks]
+        ),
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""
+Benchmark of the vector store backends: Chroma against the numpy backend.
+
+Usage:
+    python -m benchmarks.bench_vector_backends [--chunks N] [--dimension N] [--queries N] [--k N]
+
+Stores the same synthetic, clustered embeddings in Chroma and in the numpy
+backend (float16 and int8), then opens each store in a fresh process and
+runs the same queries through vector_store.similarity_search. Reports
+build time, open time, query latency, resident memory of the querying
+process, on-disk size and recall@k against an exact float32 search.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+from langchain_core.documents import Document
+
+from src import vector_store
+
+BACKENDS = {
+    "chroma": {"backend": "chroma"},
+    "numpy-float16": {"backend": "numpy", "dtype": "float16"},
+    "numpy-int8": {"backend": "numpy", "dtype": "int8"},
+}
+
+
+class TableEmbeddings:
+    """Embeddings looked up by text, so no embedding server is needed."""
+
+    def __init__(self, texts, vectors):
+        self.table = dict(zip(texts, vectors))
+
+    def embed_documents(self, texts):
+        return [self.table[text].tolist() for text in texts]
+
+    def embed_query(self, text):
+        return self.table[text].tolist()
+
+
+def make_vectors(count, dimension, seed):
+    # Clustered like chunk embeddings of one document, then L2-normalized
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(max(count // 50, 1), dimension))
+    vectors = centers[rng.integers(len(centers), size=count)] + 0.5 * rng.normal(size=(count, dimension))
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+
+def rss_mb():
+    # Current resident set size of this process
+    with open("/proc/self/status", "r", encoding="utf-8") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return None
+
+
+def directory_size_mb(path):
+    total = 0
+    for root, _, files in os.walk(path):
+        total += sum(os.path.getsize(os.path.join(root, name)) for name in files)
+    return total / (1024 * 1024)
+
+
+def percentile(values, q):
+    return float(np.percentile(values, q) * 1000)
+
+
+def query_worker(name, directory, k):
+    """Open a built store, run the saved queries and print the measurements as JSON."""
+    queries = np.load(os.path.join(directory, "queries.npy"))
+    baseline = rss_mb()
+    start = time.perf_counter()
+    store = vector_store.create_vector_store(None, "bench", os.path.join(directory, name), **BACKENDS[name])
+    vector_store.similarity_search(store, queries[0].tolist(), k=k)
+    open_seconds = time.perf_counter() - start
+
+    latencies = []
+    results = []
+    for query in queries:
+        start = time.perf_counter()
+        docs = vector_store.similarity_search(store, query.tolist(), k=k)
+        latencies.append(time.perf_counter() - start)
+        results.append([doc.id for doc in docs])
+    print(json.dumps({
+        "open_seconds": open_seconds,
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "rss_mb": rss_mb() - baseline,
+        "results": results,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--chunks", type=int, default=5000)
+    parser.add_argument("--dimension", type=int, default=768)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    parser.add_argument("--directory", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        query_worker(args.worker, args.directory, args.k)
+        return
+
+    vectors = make_vectors(args.chunks, args.dimension, seed=0)
+    queries = make_vectors(args.queries, args.dimension, seed=1)
+    texts = [f"chunk {i}" for i in range(args.chunks)]
+    documents = [
+        Document(page_content=text, metadata={"source": "bench.pdf", "page": i // 10}, id=f"chunk-{i}")
+        for i, text in enumerate(texts)
+    ]
+    exact = [[f"chunk-{i}" for i in np.argsort(-(vectors @ query))[:args.k]] for query in queries]
+
+    report = {"chunks": args.chunks, "dimension": args.dimension, "queries": args.queries, "k": args.k,
+              "backends": {}}
+    with tempfile.TemporaryDirectory() as directory:
+        np.save(os.path.join(directory, "queries.npy"), queries)
+        for name, options in BACKENDS.items():
+            store = vector_store.create_vector_store(TableEmbeddings(texts, vectors), "bench",
+                                                     os.path.join(directory, name), **options)
+            start = time.perf_counter()
+            vector_store.add_documents_to_store(store, documents, max_workers=1)
+            build_seconds = time.perf_counter() - start
+            del store
+
+            output = subprocess.run(
+                [sys.executable, "-m", "benchmarks.bench_vector_backends", "--worker", name,
+                 "--directory", directory, "--k", str(args.k)],
+                check=True, capture_output=True, text=True
+            ).stdout
+            measured = json.loads(output.strip().splitlines()[-1])
+            results = measured.pop("results")
+            recall = np.mean([len(set(found) & set(expected)) / args.k for found, expected in zip(results, exact)])
+            report["backends"][name] = {
+                "build_seconds": build_seconds,
+                **measured,
+                "disk_mb": directory_size_mb(os.path.join(directory, name)),
+                "recall_at_k": float(recall),
+            }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
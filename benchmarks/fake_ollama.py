@@ -0,0 +1,275 @@
+"""
+Deterministic local stand-in for the Ollama HTTP API.
+
+Usage:
+    python -m benchmarks.fake_ollama [--port N] [--latency S] [--token-rate N] [--answer-tokens N]
+
+Serves /api/generate (streamed and not), /api/embed, /api/tags and
+/api/version, so the pipeline can be run and measured without an Ollama
+daemon. Point the app at it with OLLAMA_HOST=http://127.0.0.1:PORT.
+
+Answers are words drawn from a generator seeded with a hash of the prompt,
+emitted at token_rate tokens per second after a fixed latency. Embeddings
+are hashed bags of words, so texts sharing words are close and retrieval
+still ranks related chunks first. The same input always gives the same
+output.
+"""
+import argparse
+import hashlib
+import json
+import math
+import random
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+WORDS = (
+    "the model retrieval document answer context section results method data analysis paper "
+    "experiment evaluation performance baseline approach system query table figure authors "
+    "propose show improve dataset training evidence"
+).split()
+
+
+def fake_embedding(text, dimension):
+    """
+    Embed a text as an L2-normalized hashed bag of words.
+
+    Args:
+        text (str): Text to embed
+        dimension (int): Length of the vector
+
+    Returns:
+        list: The embedding vector
+    """
+    vector = [0.0] * dimension
+    for word in re.findall(r"\w+", text.lower()):
+        digest = hashlib.blake2b(word.encode("utf-8"), digest_size=8).digest()
+        bucket = int.from_bytes(digest[:4], "little") % dimension
+        vector[bucket] += 1.0 if digest[4] & 1 else -1.0
+    norm = math.sqrt(sum(value * value for value in vector))
+    if norm == 0:
+        # Texts without words still get a valid, non-zero vector
+        vector[0], norm = 1.0, 1.0
+    return [value / norm for value in vector]
+
+
+def fake_answer(prompt, tokens):
+    """
+    Build the answer tokens for a prompt.
+
+    Args:
+        prompt (str): The prompt
+        tokens (int): Number of tokens to produce
+
+    Returns:
+        list: The tokens, each a word with its leading space
+    """
+    rng = random.Random(hashlib.sha256(prompt.encode("utf-8")).digest())
+    return [" " + rng.choice(WORDS) for _ in range(tokens)]
+
+
+class FakeOllamaServer:
+    """
+    Threaded HTTP server answering like Ollama, with configurable speed.
+
+    Every request waits `latency` seconds before its first token (generate)
+    or before its vectors (embed, plus `embed_text_latency` per text).
+    Generation then emits answer_tokens tokens at token_rate tokens per
+    second. Request counts are kept in `stats`.
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, dimension=768, latency=0.05, token_rate=200.0,
+                 answer_tokens=64, embed_latency=0.01, embed_text_latency=0.0005):
+        """
+        Args:
+            host (str): Interface to listen on
+            port (int): Port to listen on (0 picks a free one)
+            dimension (int): Length of the embedding vectors
+            latency (float): Seconds before the first generated token
+            token_rate (float): Generated tokens per second
+            answer_tokens (int): Tokens in every answer
+            embed_latency (float): Seconds per embed request
+            embed_text_latency (float): Additional seconds per embedded text
+        """
+        self.dimension = dimension
+        self.latency = latency
+        self.token_rate = token_rate
+        self.answer_tokens = answer_tokens
+        self.embed_latency = embed_latency
+        self.embed_text_latency = embed_text_latency
+        self.stats = {"generate": 0, "embed": 0, "embedded_texts": 0, "generated_tokens": 0}
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), _handler(self))
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        """Base URL of the server, for OLLAMA_HOST."""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        """Serve requests on a background thread."""
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop serving and close the socket."""
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def serve_forever(self):
+        """Serve requests on the calling thread until interrupted."""
+        try:
+            self._server.serve_forever()
+        finally:
+            self._server.server_close()
+
+    def _count(self, **counts):
+        with self._lock:
+            for name, value in counts.items():
+                self.stats[name] += value
+
+    def generate(self, request):
+        """
+        Yield the response parts of a generate request as they become due.
+
+        Args:
+            request (dict): The /api/generate request body
+
+        Yields:
+            dict: Response parts; the last one has done=True
+        """
+        model = request.get("model", "")
+        tokens = fake_answer(request.get("prompt", ""), self.answer_tokens)
+        start = time.perf_counter()
+        time.sleep(self.latency)
+        first_token_at = time.perf_counter()
+        for i, token in enumerate(tokens):
+            # Keep to the token rate overall instead of sleeping per token
+            delay = first_token_at + i / self.token_rate - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            yield {"model": model, "created_at": _now(), "response": token, "done": False}
+        end = time.perf_counter()
+        self._count(generate=1, generated_tokens=len(tokens))
+        yield {
+            "model": model,
+            "created_at": _now(),
+            "response": "",
+            "done": True,
+            "done_reason": "stop",
+            "total_duration": int((end - start) * 1e9),
+            "prompt_eval_count": len(request.get("prompt", "").split()),
+            "prompt_eval_duration": int((first_token_at - start) * 1e9),
+            "eval_count": len(tokens),
+            "eval_duration": int((end - first_token_at) * 1e9),
+        }
+
+    def embed(self, request):
+        """
+        Answer an embed request.
+
+        Args:
+            request (dict): The /api/embed request body
+
+        Returns:
+            dict: The response, with one vector per input text
+        """
+        texts = request.get("input", [])
+        if isinstance(texts, str):
+            texts = [texts]
+        time.sleep(self.embed_latency + self.embed_text_latency * len(texts))
+        self._count(embed=1, embedded_texts=len(texts))
+        return {
+            "model": request.get("model", ""),
+            "embeddings": [fake_embedding(text, self.dimension) for text in texts],
+        }
+
+
+def _now():
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _handler(server):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            # One line per request would swamp the benchmark output
+            pass
+
+        def send_json(self, body, status=200):
+            data = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            if self.path == "/api/tags":
+                self.send_json({"models": []})
+            elif self.path == "/api/version":
+                self.send_json({"version": "0.0.0-fake"})
+            else:
+                self.send_json({"error": f"not found: {self.path}"}, status=404)
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            request = json.loads(self.rfile.read(length) or b"{}")
+            if self.path == "/api/embed":
+                self.send_json(server.embed(request))
+            elif self.path == "/api/generate":
+                parts = server.generate(request)
+                if request.get("stream", True):
+                    self.send_stream(parts)
+                else:
+                    *pieces, last = list(parts)
+                    last["response"] = "".join(piece["response"] for piece in pieces)
+                    self.send_json(last)
+            else:
+                self.send_json({"error": f"not found: {self.path}"}, status=404)
+
+        def send_stream(self, parts):
+            # Newline-delimited JSON in HTTP chunks, like Ollama
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            for part in parts:
+                data = (json.dumps(part) + "\n").encode("utf-8")
+                self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+                self.wfile.flush()
+            self.wfile.write(b"0\r\n\r\n")
+
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--dimension", type=int, default=768)
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds before the first token")
+    parser.add_argument("--token-rate", type=float, default=200.0, help="generated tokens per second")
+    parser.add_argument("--answer-tokens", type=int, default=64)
+    parser.add_argument("--embed-latency", type=float, default=0.01, help="seconds per embed request")
+    parser.add_argument("--embed-text-latency", type=float, default=0.0005, help="seconds per embedded text")
+    args = parser.parse_args()
+
+    server = FakeOllamaServer(args.host, args.port, dimension=args.dimension, latency=args.latency,
+                              token_rate=args.token_rate, answer_tokens=args.answer_tokens,
+                              embed_latency=args.embed_latency, embed_text_latency=args.embed_text_latency)
+    print(f"Fake Ollama listening on {server.url}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,5 @@
-from src import main
+from src import cli
 
 if __name__ == "__main__":
-    # Example usage
-    file_path = "pdf_files/2306.13549v4.pdf"
-    query = "who are the authors of the paper?"
-    response = main.analyze_pdf(file_path, query)
-    print(response) 
\ No newline at end of file
+    # e.g. python run.py pdf_files/ --queries questions.txt --output results.jsonl --workers 4
+    cli.main() 
\ No newline at end of file
@@ -0,0 +1,289 @@
+import re
+import threading
+import time
+from collections import OrderedDict, deque
+
+import numpy as np
+
+
+def normalize_query(query):
+    """
+    Normalize a question so trivially different spellings share a cache entry.
+
+    Args:
+        query (str): The user's question
+
+    Returns:
+        str: Lower-cased question with collapsed whitespace and no trailing punctuation
+    """
+    query = re.sub(r"\s+", " ", query.strip().lower())
+    return query.rstrip(" ?!.")
+
+
+class AnswerCache:
+    """
+    LRU cache of generated answers with a time-to-live.
+
+    Keys combine the normalized query, the content hash of the document the
+    answer was generated from, the model and the prompt template version, so
+    re-ingesting a changed document or changing the prompt never serves a
+    stale answer.
+    """
+
+    def __init__(self, max_entries=1024, ttl=3600):
+        """
+        Args:
+            max_entries (int): Maximum number of cached answers
+            ttl (float): Seconds an answer stays valid, or None for no expiry
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "expired": 0, "evictions": 0, "invalidations": 0}
+
+    @staticmethod
+    def make_key(query, document_hash, model, template_version):
+        """
+        Build the cache key of a question.
+
+        Args:
+            query (str): The user's question
+            document_hash (str): Content hash of the document(s) searched
+            model (str): Name of the LLM
+            template_version: Version of the prompt templates
+
+        Returns:
+            tuple: The cache key
+        """
+        return (normalize_query(query), document_hash, model, template_version)
+
+    def get(self, key):
+        """
+        Return a cached answer, or None.
+
+        Args:
+            key (tuple): Key built with make_key
+
+        Returns:
+            str: The cached answer, or None on a miss
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+            answer, expires_at, _ = entry
+            if expires_at is not None and expires_at < time.time():
+                del self._entries[key]
+                self._stats["expired"] += 1
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return answer
+
+    def put(self, key, answer, document_id=None):
+        """
+        Cache an answer.
+
+        Args:
+            key (tuple): Key built with make_key
+            answer (str): The generated answer
+            document_id (str, optional): Document the answer belongs to, used
+                by invalidate_document
+        """
+        expires_at = time.time() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            self._entries[key] = (answer, expires_at, document_id)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def invalidate_document(self, document_id):
+        """
+        Drop every answer generated from a document.
+
+        Args:
+            document_id (str): Document passed to put
+
+        Returns:
+            int: Number of dropped answers
+        """
+        with self._lock:
+            keys = [key for key, entry in self._entries.items() if entry[2] == document_id]
+            for key in keys:
+                del self._entries[key]
+            self._stats["invalidations"] += len(keys)
+            return len(keys)
+
+    def stats(self):
+        """
+        Return the cache counters.
+
+        Returns:
+            dict: Hits, misses, expirations, evictions, invalidations, size and hit rate
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+
+class SemanticAnswerCache:
+    """
+    Cache of recent answers looked up by query embedding similarity.
+
+    Paraphrased questions about the same document ("who wrote this paper",
+    "who are the authors?") have close embeddings; a lookup returns the
+    answer of the most similar earlier question when its cosine similarity
+    reaches the threshold. Entries are partitioned by document content, model
+    and prompt version, and evicted least recently used first.
+    """
+
+    # Upper bounds of the buckets of the best-match similarity histogram
+    HISTOGRAM_BOUNDS = (0.5, 0.7, 0.8, 0.85, 0.9, 0.925, 0.95, 0.975, 1.0)
+
+    def __init__(self, threshold=0.95, max_entries=256):
+        """
+        Args:
+            threshold (float): Minimum cosine similarity for a hit
+            max_entries (int): Maximum number of cached questions
+        """
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._matrices = {}
+        self._lock = threading.Lock()
+        self._stats = {"lookups": 0, "hits": 0, "evictions": 0, "invalidations": 0}
+        self._histogram = [0] * len(self.HISTOGRAM_BOUNDS)
+        self._hit_similarity_sum = 0.0
+        self._min_hit_similarity = None
+        self._recent = deque(maxlen=20)
+
+    def _matrix(self, partition):
+        # Caller holds the lock; the matrix is rebuilt only after the partition changed
+        cached = self._matrices.get(partition)
+        if cached is None:
+            keys = [key for key in self._entries if key[0] == partition]
+            vectors = np.stack([self._entries[key][0] for key in keys]) if keys else None
+            cached = (keys, vectors)
+            self._matrices[partition] = cached
+        return cached
+
+    def get(self, embedding, partition, query=None):
+        """
+        Return the answer of the most similar cached question, if similar enough.
+
+        Args:
+            embedding (list): Embedding of the new question
+            partition (tuple): Document content hash, model and prompt version
+            query (str, optional): The new question, recorded for tuning
+
+        Returns:
+            tuple: (answer, similarity), or (None, best_similarity) on a miss
+        """
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        if norm == 0:
+            return None, 0.0
+        vector = vector / norm
+
+        with self._lock:
+            self._stats["lookups"] += 1
+            keys, vectors = self._matrix(partition)
+            if vectors is None:
+                return None, 0.0
+            similarities = vectors @ vector
+            best = int(np.argmax(similarities))
+            similarity = float(similarities[best])
+
+            for i, bound in enumerate(self.HISTOGRAM_BOUNDS):
+                if similarity <= bound or i == len(self.HISTOGRAM_BOUNDS) - 1:
+                    self._histogram[i] += 1
+                    break
+            hit = similarity >= self.threshold
+            self._recent.append({
+                "query": query,
+                "closest_query": keys[best][1],
+                "similarity": similarity,
+                "hit": hit
+            })
+            if not hit:
+                return None, similarity
+
+            self._stats["hits"] += 1
+            self._hit_similarity_sum += similarity
+            if self._min_hit_similarity is None or similarity < self._min_hit_similarity:
+                self._min_hit_similarity = similarity
+            self._entries.move_to_end(keys[best])
+            return self._entries[keys[best]][1], similarity
+
+    def put(self, embedding, partition, query, answer, document_id=None):
+        """
+        Cache the answer to a question.
+
+        Args:
+            embedding (list): Embedding of the question
+            partition (tuple): Document content hash, model and prompt version
+            query (str): The question
+            answer (str): The generated answer
+            document_id (str, optional): Document the answer belongs to
+        """
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        if norm == 0:
+            return
+        key = (partition, normalize_query(query))
+        with self._lock:
+            self._entries[key] = (vector / norm, answer, document_id)
+            self._entries.move_to_end(key)
+            self._matrices.pop(partition, None)
+            while len(self._entries) > self.max_entries:
+                evicted, _ = self._entries.popitem(last=False)
+                self._matrices.pop(evicted[0], None)
+                self._stats["evictions"] += 1
+
+    def invalidate_document(self, document_id):
+        """
+        Drop every answer generated from a document.
+
+        Args:
+            document_id (str): Document passed to put
+
+        Returns:
+            int: Number of dropped answers
+        """
+        with self._lock:
+            keys = [key for key, entry in self._entries.items() if entry[2] == document_id]
+            for key in keys:
+                del self._entries[key]
+                self._matrices.pop(key[0], None)
+            self._stats["invalidations"] += len(keys)
+            return len(keys)
+
+    def stats(self):
+        """
+        Return hit-rate and similarity metrics for tuning the threshold.
+
+        Returns:
+            dict: Counters, hit rate, mean similarity of hits, a histogram of
+            best-match similarities over all lookups and the latest lookups
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+            stats["threshold"] = self.threshold
+            stats["hit_rate"] = stats["hits"] / stats["lookups"] if stats["lookups"] else 0.0
+            stats["mean_hit_similarity"] = (
+                self._hit_similarity_sum / stats["hits"] if stats["hits"] else None
+            )
+            stats["min_hit_similarity"] = self._min_hit_similarity
+            stats["similarity_histogram"] = {
+                f"<={bound}": count for bound, count in zip(self.HISTOGRAM_BOUNDS, self._histogram)
+            }
+            stats["recent_lookups"] = list(self._recent)
+        return stats
@@ -0,0 +1,183 @@
+"""
+Answer a set of questions about many PDFs from the command line.
+
+Usage:
+    python run.py PATH [PATH ...] --queries FILE [--output results.jsonl] [--workers N]
+
+PATH is a PDF file, a directory (searched recursively) or a glob pattern.
+Documents are ingested into a persistent index, so files already ingested
+by an earlier run are not embedded again. One JSON line per (file,
+question) is written to the output as soon as a file is done.
+"""
+import argparse
+import glob
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from src import ingestion
+from src.main import COLLECTION_NAME, PERSIST_DIRECTORY, DocumentIndex, analyze_pdf_batch
+
+
+def find_pdfs(patterns):
+    """
+    Expand files, directories and glob patterns into PDF paths.
+
+    Args:
+        patterns (list): Files, directories (searched recursively) or glob patterns
+
+    Returns:
+        list: Unique PDF paths, in the order they were found
+    """
+    paths = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            matches = sorted(glob.glob(os.path.join(pattern, "**", "*.pdf"), recursive=True))
+        else:
+            matches = sorted(glob.glob(pattern, recursive=True))
+        for path in matches:
+            if os.path.isfile(path) and path.lower().endswith(".pdf") and path not in paths:
+                paths.append(path)
+    return paths
+
+
+def load_queries(path):
+    """
+    Read the questions from a query file.
+
+    Plain text files hold one question per line; blank lines and lines
+    starting with '#' are skipped. .jsonl files hold one JSON object per
+    line with the question under 'query' or 'question'. .json files hold a
+    list of questions or of such objects.
+
+    Args:
+        path (str): Path to the query file
+
+    Returns:
+        list: The questions
+    """
+    def question(item):
+        if isinstance(item, str):
+            return item
+        return item.get("query") or item.get("question")
+
+    with open(path, "r", encoding="utf-8") as f:
+        if path.endswith(".jsonl"):
+            items = [json.loads(line) for line in f if line.strip()]
+        elif path.endswith(".json"):
+            items = json.load(f)
+        else:
+            items = [line.strip() for line in f if line.strip() and not line.lstrip().startswith("#")]
+    queries = [question(item) for item in items]
+    return [query for query in queries if query]
+
+
+def process_file(index, pdf_path, queries, model, max_concurrency):
+    """
+    Answer the questions about one PDF.
+
+    Args:
+        index (DocumentIndex): Index the PDF is ingested into
+        pdf_path (str): Path to the PDF file
+        queries (list): The questions
+        model (str): LLM model to use for generation
+        max_concurrency (int): Maximum number of concurrent generations
+
+    Returns:
+        list: One result record per question
+    """
+    start = time.perf_counter()
+    try:
+        results = analyze_pdf_batch(pdf_path, queries, model=model, max_concurrency=max_concurrency, index=index)
+    except Exception as e:
+        # The document could not be ingested; report it for every question
+        seconds = time.perf_counter() - start
+        results = [{"query": query, "answer": None, "error": f"{type(e).__name__}: {e}", "seconds": seconds}
+                   for query in queries]
+    return [{"file": pdf_path, **result} for result in results]
+
+
+def run(pdf_paths, queries, output, workers=2, model="gemma3:1b", embedding_model="llama3", max_concurrency=4,
+        persist_directory=PERSIST_DIRECTORY, collection_name=COLLECTION_NAME, parse_workers=ingestion.PARSE_WORKERS):
+    """
+    Answer the questions about every PDF and write the results as JSON lines.
+
+    Args:
+        pdf_paths (list): PDF files to process
+        queries (list): Questions asked of every file
+        output (str): Path of the JSONL output file
+        workers (int): Number of files ingested and answered concurrently
+        model (str): LLM model to use for generation
+        embedding_model (str): Model to use for embeddings
+        max_concurrency (int): Maximum number of concurrent generations per file
+        persist_directory (str): Directory of the persistent index
+        collection_name (str): Name of the vector store collection
+        parse_workers (int): Processes parsing page windows of a PDF
+
+    Returns:
+        dict: Summary with the number of files, questions and errors, the
+        wall time and the questions answered per second
+    """
+    start = time.perf_counter()
+    index = DocumentIndex(embedding_model, persist_directory, collection_name, parse_workers=parse_workers)
+    output_dir = os.path.dirname(output)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+
+    summary = {"files": len(pdf_paths), "questions": 0, "errors": 0}
+    with open(output, "w", encoding="utf-8") as f, ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(process_file, index, pdf_path, queries, model, max_concurrency)
+            for pdf_path in pdf_paths
+        ]
+        for done, future in enumerate(as_completed(futures), start=1):
+            records = future.result()
+            for record in records:
+                f.write(json.dumps(record) + "\n")
+            f.flush()
+            summary["questions"] += len(records)
+            summary["errors"] += sum(1 for record in records if record["error"])
+            print(f"[{done}/{len(pdf_paths)}] {records[0]['file'] if records else ''} "
+                  f"({time.perf_counter() - start:.1f}s elapsed)")
+
+    summary["seconds"] = time.perf_counter() - start
+    summary["questions_per_sec"] = summary["questions"] / summary["seconds"] if summary["seconds"] > 0 else 0.0
+    summary["output"] = output
+    return summary
+
+
+def main(argv=None):
+    """Parse the command line and run the batch."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("paths", nargs="+", help="PDF files, directories or glob patterns")
+    parser.add_argument("-q", "--queries", required=True, help="question file (.txt, .jsonl or .json)")
+    parser.add_argument("-o", "--output", default="results.jsonl", help="JSONL output file")
+    parser.add_argument("--workers", type=int, default=2, help="files processed concurrently")
+    parser.add_argument("--max-concurrency", type=int, default=4, help="concurrent generations per file")
+    parser.add_argument("--parse-workers", type=int, default=ingestion.PARSE_WORKERS,
+                        help="processes parsing each PDF (0 parses in-process)")
+    parser.add_argument("--model", default="gemma3:1b", help="LLM used for the answers")
+    parser.add_argument("--embedding-model", default="llama3", help="model used for the embeddings")
+    parser.add_argument("--persist-directory", default=PERSIST_DIRECTORY, help="directory of the index")
+    parser.add_argument("--collection", default=COLLECTION_NAME, help="vector store collection")
+    args = parser.parse_args(argv)
+
+    pdf_paths = find_pdfs(args.paths)
+    if not pdf_paths:
+        parser.error("no PDF files found")
+    queries = load_queries(args.queries)
+    if not queries:
+        parser.error(f"no questions in {args.queries}")
+    if args.workers < 1 or args.max_concurrency < 1:
+        parser.error("--workers and --max-concurrency must be at least 1")
+
+    print(f"Answering {len(queries)} questions about {len(pdf_paths)} files with {args.workers} workers")
+    summary = run(
+        pdf_paths, queries, args.output, workers=args.workers, model=args.model,
+        embedding_model=args.embedding_model, max_concurrency=args.max_concurrency,
+        persist_directory=args.persist_directory, collection_name=args.collection,
+        parse_workers=args.parse_workers
+    )
+    print(json.dumps(summary, indent=2))
+    return summary
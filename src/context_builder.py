@@ -1,25 +1,139 @@
-def build_context(results):
+import os
+
+from src import tokenization
+
+# Context window Ollama runs models with unless configured otherwise
+NUM_CTX = int(os.environ.get("OLLAMA_NUM_CTX", "2048"))
+
+# Tokens kept free for the prompt instructions, the question and the answer
+RESERVED_TOKENS = int(os.environ.get("CONTEXT_RESERVED_TOKENS", "768"))
+
+# A chunk is a duplicate when at least this fraction of it overlaps a chunk
+# already in the context
+DUPLICATE_OVERLAP = 0.5
+
+def token_budget(num_ctx=NUM_CTX, reserved=RESERVED_TOKENS):
+    """
+    Return the number of context tokens a prompt can hold for the target model.
+
+    Args:
+        num_ctx (int): Context window of the model, in tokens
+        reserved (int): Tokens kept for the instructions, question and answer
+
+    Returns:
+        int: Token budget for retrieved chunks
+    """
+    return max(num_ctx - reserved, 0)
+
+def _chunk_header(index, metadata):
+    source = metadata.get('source')
+    page_num = metadata.get('page', 'Unknown')
+    section_title = metadata.get('section_title', '')
+
+    chunk_header = f"[CHUNK {index}"
+    if source:
+        chunk_header += f" | Source: {source}"
+    chunk_header += f" | Page: {page_num}"
+    if section_title:
+        chunk_header += f" | Section: {section_title}"
+    return chunk_header + "]"
+
+def _span(result):
+    # Position of a chunk within its page or section, keyed by everything else
+    # the chunk's metadata says about where it comes from
+    metadata = result.metadata
+    start = metadata.get('start_index')
+    if not isinstance(start, int):
+        return None, None
+    key = tuple(sorted((k, str(v)) for k, v in metadata.items() if k not in ('start_index', 'end_index')))
+    # Merged chunks record where they end; their joined text is not a page slice
+    end = metadata.get('end_index')
+    if not isinstance(end, int):
+        end = start + len(result.page_content)
+    return key, (start, end)
+
+def _is_duplicate(result, seen_texts, spans):
+    if result.page_content in seen_texts:
+        return True
+    key, span = _span(result)
+    if key is None:
+        return False
+    length = span[1] - span[0]
+    for start, end in spans.get(key, ()):
+        overlap = min(end, span[1]) - max(start, span[0])
+        if length and overlap >= DUPLICATE_OVERLAP * length:
+            return True
+    return False
+
+def build_context(results, max_tokens=None, scores=None, length_function=None, report=None):
     """
     Build a structured context from search results for use in prompts.
-    
+
+    Chunks are taken most relevant first. Chunks that repeat text already in
+    the context (same text, or mostly the same start_index range of the same
+    page and section) are dropped, and chunks are added while they fit in
+    max_tokens.
+
     Args:
-        results (list): List of document objects from vector store search
-        
+        results (list): List of document objects from vector store search, most relevant first
+        max_tokens (int, optional): Token budget of the context, see token_budget
+        scores (list, optional): Distance of each result (lower is more relevant);
+            results are reordered by it when given
+        length_function (callable, optional): Counts tokens (default: tokenization.approximate_token_count)
+        report (dict, optional): Filled in with 'tokens_used', 'max_tokens',
+            'chunks_used', 'duplicates_dropped' and 'over_budget_dropped'
+
     Returns:
         str: Formatted context string with metadata and clear separation
     """
+    if report is None:
+        report = {}
+    if length_function is None:
+        length_function = tokenization.approximate_token_count
+    if scores is not None:
+        order = sorted(range(len(results)), key=lambda i: scores[i])
+        results = [results[i] for i in order]
+
+    separator = "\n\n---\n\n"
+    separator_tokens = length_function(separator)
     formatted_chunks = []
-    for i, result in enumerate(results):
-        # Extract metadata if available
-        metadata = result.metadata
-        page_num = metadata.get('page', 'Unknown')
-        start_idx = metadata.get('start_index', 'Unknown')
-        
+    seen_texts = set()
+    spans = {}
+    tokens_used = 0
+    duplicates = 0
+    over_budget = 0
+
+    for result in results:
+        if _is_duplicate(result, seen_texts, spans):
+            duplicates += 1
+            continue
+
         # Format chunk with metadata and index
-        chunk_header = f"[CHUNK {i+1} | Page: {page_num} | Index: {start_idx}]"
-        formatted_chunks.append(f"{chunk_header}\n{result.page_content}")
-    
+        formatted = f"{_chunk_header(len(formatted_chunks) + 1, result.metadata)}\n{result.page_content}"
+        tokens = length_function(formatted) + (separator_tokens if formatted_chunks else 0)
+        if max_tokens is not None and tokens_used + tokens > max_tokens:
+            if formatted_chunks:
+                over_budget += 1
+                continue
+            # Not even the most relevant chunk fits; keep as much of it as does
+            while formatted and tokens > max_tokens:
+                formatted = formatted[:len(formatted) * max_tokens // (tokens + 1)]
+                tokens = length_function(formatted)
+
+        formatted_chunks.append(formatted)
+        tokens_used += tokens
+        seen_texts.add(result.page_content)
+        key, span = _span(result)
+        if key is not None:
+            spans.setdefault(key, []).append(span)
+
+    report['tokens_used'] = tokens_used
+    report['max_tokens'] = max_tokens
+    report['chunks_used'] = len(formatted_chunks)
+    report['duplicates_dropped'] = duplicates
+    report['over_budget_dropped'] = over_budget
+
     # Join with clear separation between chunks
-    context = "\n\n" + "\n\n---\n\n".join(formatted_chunks) + "\n\n"
-    
-    return context 
\ No newline at end of file
+    context = "\n\n" + separator.join(formatted_chunks) + "\n\n"
+
+    return context
\ No newline at end of file
@@ -1,13 +1,242 @@
-from langchain_ollama import OllamaEmbeddings
+import hashlib
+import os
+import sqlite3
+import threading
+from array import array
+from collections import OrderedDict
 
-def get_embeddings(model="nomic-embed-text"):
+from langchain_core.embeddings import Embeddings
+
+from src import ollama_client
+
+DEFAULT_CACHE_DIR = "./embedding_cache"
+
+
+def text_hash(text):
+    """
+    Hash a text for use as an embedding cache key.
+
+    Args:
+        text (str): The embedded text
+
+    Returns:
+        str: Hex digest of the text
+    """
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Embeddings wrapper backed by an on-disk store with an in-memory LRU.
+
+    Vectors are keyed by (model, text hash). Lookups go to the LRU first,
+    then to a SQLite file, and only the remaining misses are sent to the
+    wrapped embeddings object in one batched call.
+    """
+
+    def __init__(self, underlying, model, cache_dir=DEFAULT_CACHE_DIR, memory_size=4096):
+        """
+        Args:
+            underlying (Embeddings): The embeddings object to call on a miss
+            model (str): Name of the embedding model, part of every key
+            cache_dir (str): Directory holding the SQLite cache file
+            memory_size (int): Maximum number of vectors kept in memory
+        """
+        self.underlying = underlying
+        self.model = model
+        self.memory_size = memory_size
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0}
+
+        os.makedirs(cache_dir, exist_ok=True)
+        self.path = os.path.join(cache_dir, "embeddings.sqlite3")
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "model TEXT NOT NULL, text_hash TEXT NOT NULL, vector BLOB NOT NULL, "
+            "PRIMARY KEY (model, text_hash))"
+        )
+        self._db.commit()
+
+    def _remember(self, key, vector):
+        # Caller holds the lock
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    def embed_documents(self, texts):
+        """
+        Embed a list of texts, calling the model only for uncached ones.
+
+        Args:
+            texts (list): Texts to embed
+
+        Returns:
+            list: One vector (list of floats) per text
+        """
+        keys = [text_hash(text) for text in texts]
+        vectors = [None] * len(texts)
+        missing = {}
+
+        with self._lock:
+            for i, key in enumerate(keys):
+                vector = self._memory.get(key)
+                if vector is not None:
+                    self._memory.move_to_end(key)
+                    self._stats["hits"] += 1
+                    vectors[i] = vector
+                else:
+                    missing.setdefault(key, []).append(i)
+
+            if missing:
+                for key in list(missing):
+                    row = self._db.execute(
+                        "SELECT vector FROM embeddings WHERE model = ? AND text_hash = ?",
+                        (self.model, key)
+                    ).fetchone()
+                    if row is None:
+                        continue
+                    vector = array("d", row[0]).tolist()
+                    self._remember(key, vector)
+                    for i in missing.pop(key):
+                        vectors[i] = vector
+                        self._stats["disk_hits"] += 1
+
+        if missing:
+            miss_keys = list(missing)
+            new_vectors = self.underlying.embed_documents([texts[missing[key][0]] for key in miss_keys])
+            with self._lock:
+                # A text repeated within the batch is embedded once; its repeats are hits
+                self._stats["misses"] += len(miss_keys)
+                self._stats["hits"] += sum(len(missing[key]) - 1 for key in miss_keys)
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO embeddings (model, text_hash, vector) VALUES (?, ?, ?)",
+                    [(self.model, key, array("d", vector).tobytes())
+                     for key, vector in zip(miss_keys, new_vectors)]
+                )
+                self._db.commit()
+                for key, vector in zip(miss_keys, new_vectors):
+                    vector = list(vector)
+                    self._remember(key, vector)
+                    for i in missing[key]:
+                        vectors[i] = vector
+
+        return vectors
+
+    def embed_query(self, text):
+        """
+        Embed a single query text.
+
+        Args:
+            text (str): Text to embed
+
+        Returns:
+            list: The embedding vector
+        """
+        return self.embed_documents([text])[0]
+
+    def stats(self):
+        """
+        Return the cache counters.
+
+        Returns:
+            dict: Memory hits, disk hits, misses, evictions and hit rate
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["memory_entries"] = len(self._memory)
+        lookups = stats["hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = (stats["hits"] + stats["disk_hits"]) / lookups if lookups else 0.0
+        return stats
+
+
+class OllamaEmbeddings(Embeddings):
+    """
+    Ollama embeddings sent through the shared client pool.
+
+    Requests share pooled connections, the per-model concurrency limit and
+    the retry policy with generation, see ollama_client.OllamaPool.
+    """
+
+    def __init__(self, model, client=None):
+        """
+        Args:
+            model (str): Name of the embedding model
+            client (OllamaPool, optional): Pool to use (default: the shared pool)
+        """
+        self.model = model
+        self.client = client or ollama_client.get_client()
+
+    def embed_documents(self, texts):
+        """
+        Embed a list of texts in one request.
+
+        Args:
+            texts (list): Texts to embed
+
+        Returns:
+            list: One vector per text
+        """
+        if not texts:
+            return []
+        return self.client.embed(self.model, texts)
+
+    def embed_query(self, text):
+        """
+        Embed a single query text.
+
+        Args:
+            text (str): Text to embed
+
+        Returns:
+            list: The embedding vector
+        """
+        return self.embed_documents([text])[0]
+
+    async def aembed_documents(self, texts):
+        """
+        Embed a list of texts without blocking the event loop.
+
+        Args:
+            texts (list): Texts to embed
+
+        Returns:
+            list: One vector per text
+        """
+        if not texts:
+            return []
+        return await self.client.aembed(self.model, texts)
+
+    async def aembed_query(self, text):
+        """
+        Embed a single query text without blocking the event loop.
+
+        Args:
+            text (str): Text to embed
+
+        Returns:
+            list: The embedding vector
+        """
+        return (await self.aembed_documents([text]))[0]
+
+
+def get_embeddings(model="nomic-embed-text", cache_dir=DEFAULT_CACHE_DIR, memory_size=4096):
     """
     Create and return an embeddings object.
-    
+
     Args:
         model (str): Name of the model to use
-        
+        cache_dir (str, optional): Directory of the persistent embedding cache,
+            or None to call the model for every text
+        memory_size (int): Number of vectors kept in the in-memory LRU
+
     Returns:
-        OllamaEmbeddings: An embeddings object
+        Embeddings: An embeddings object
     """
-    return OllamaEmbeddings(model=model) 
\ No newline at end of file
+    ollama_embeddings = OllamaEmbeddings(model=model)
+    if cache_dir is None:
+        return ollama_embeddings
+    return CachedEmbeddings(ollama_embeddings, model, cache_dir=cache_dir, memory_size=memory_size)
@@ -0,0 +1,670 @@
+import hashlib
+import json
+import multiprocessing
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from src import loaders, text_processing, tokenization, vector_store
+
+MANIFEST_FILENAME = "ingestion_manifest.json"
+
+# Number of pages split and normalized together while streaming a PDF
+PAGE_WINDOW = 16
+
+# Processes used to parse and split page windows; 0 or 1 parses in-process
+PARSE_WORKERS = int(os.environ.get("INGEST_PARSE_WORKERS", "0"))
+
+
+def file_content_hash(file_path, block_size=1024 * 1024):
+    """
+    Compute the SHA-256 hash of a file's content.
+
+    Args:
+        file_path (str): Path to the file
+        block_size (int): Number of bytes read at a time
+
+    Returns:
+        str: Hex digest of the file content
+    """
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def manifest_key(content_hash, splitting_strategy, chunk_size, chunk_overlap, target_length,
+                 embedding_model, collection_name, length_unit="chars"):
+    """
+    Build the manifest key for one ingestion of a document.
+
+    Every parameter that changes the stored vectors is part of the key, so
+    changing the model or a chunking parameter only misses the entries that
+    were built with the old value.
+
+    Args:
+        content_hash (str): Hash of the PDF content
+        splitting_strategy (str): Splitting strategy used
+        chunk_size (int): Chunk size passed to the splitter
+        chunk_overlap (int): Chunk overlap passed to the splitter
+        target_length (int): Target length used to normalize chunks
+        embedding_model (str): Name of the embedding model
+        collection_name (str): Name of the vector store collection
+        length_unit (str): Unit of chunk_size, chunk_overlap and target_length
+
+    Returns:
+        str: The manifest key
+    """
+    parts = [content_hash, splitting_strategy, chunk_size, chunk_overlap,
+             target_length, embedding_model, collection_name]
+    # Keys of character-sized ingestions predate length units and stay unchanged
+    if length_unit != "chars":
+        parts.append(length_unit)
+    return "|".join(str(part) for part in parts)
+
+
+class IngestionManifest:
+    """
+    Persistent record of the documents already embedded into a vector store.
+
+    The manifest is a JSON file stored inside the vector store's persist
+    directory, so it survives restarts and travels with the vectors it
+    describes.
+    """
+
+    def __init__(self, persist_directory):
+        """
+        Load (or create) the manifest for a persist directory.
+
+        Args:
+            persist_directory (str): Directory of the vector store
+        """
+        self.path = os.path.join(persist_directory, MANIFEST_FILENAME)
+        self._lock = threading.Lock()
+        self._entries = {}
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    self._entries = json.load(f).get("entries", {})
+            except (OSError, ValueError) as e:
+                print(f"WARNING: Ignoring unreadable ingestion manifest {self.path}: {e}")
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": 1, "entries": self._entries}, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def lookup(self, key):
+        """
+        Return the entry stored under a key, or None.
+
+        Args:
+            key (str): Manifest key built with manifest_key
+
+        Returns:
+            dict: The manifest entry, or None on a miss
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            return dict(entry) if entry else None
+
+    def record(self, key, entry):
+        """
+        Store an entry and persist the manifest.
+
+        Args:
+            key (str): Manifest key built with manifest_key
+            entry (dict): Description of the ingested document
+        """
+        with self._lock:
+            self._entries[key] = dict(entry)
+            self._save()
+
+    def add_alias(self, key, filename):
+        """
+        Remember that a file with another name has the content of an entry.
+
+        Args:
+            key (str): Manifest key of the existing entry
+            filename (str): Name the same content was uploaded under
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or filename == entry["source"] or filename in entry["aliases"]:
+                return
+            entry["aliases"].append(filename)
+            self._save()
+
+    def sources(self, collection_name=None):
+        """
+        Return every file name known to the manifest, aliases included.
+
+        Args:
+            collection_name (str, optional): Only consider entries of this collection
+
+        Returns:
+            set: File names that have been ingested
+        """
+        with self._lock:
+            names = set()
+            for entry in self._entries.values():
+                if collection_name is not None and entry["collection_name"] != collection_name:
+                    continue
+                names.add(entry["source"])
+                names.update(entry["aliases"])
+            return names
+
+    def documents(self, collection_name=None):
+        """
+        Return the source names chunks were stored under, without aliases.
+
+        Args:
+            collection_name (str, optional): Only consider entries of this collection
+
+        Returns:
+            set: Stored source names
+        """
+        with self._lock:
+            return {
+                entry["source"] for entry in self._entries.values()
+                if collection_name is None or entry["collection_name"] == collection_name
+            }
+
+    def _latest(self, source, collection_name):
+        # Caller holds the lock
+        items = [
+            (key, entry) for key, entry in self._entries.items()
+            if entry["source"] == source
+            and (collection_name is None or entry["collection_name"] == collection_name)
+        ]
+        if not items:
+            return None, None
+        return max(items, key=lambda item: item[1]["ingested_at"])
+
+    def latest(self, source, collection_name=None):
+        """
+        Return the most recent ingestion of a source.
+
+        Args:
+            source (str): Stored source name
+            collection_name (str, optional): Only consider entries of this collection
+
+        Returns:
+            tuple: (key, entry), or (None, None) if the source was never ingested
+        """
+        with self._lock:
+            key, entry = self._latest(source, collection_name)
+            return key, dict(entry) if entry else None
+
+    def content_hash(self, source, collection_name=None):
+        """
+        Return the content hash of the most recent ingestion of a source.
+
+        Args:
+            source (str): Stored source name
+            collection_name (str, optional): Only consider entries of this collection
+
+        Returns:
+            str: The content hash, or None if the source was never ingested
+        """
+        with self._lock:
+            _, entry = self._latest(source, collection_name)
+            return entry["content_hash"] if entry else None
+
+    def remove(self, key):
+        """
+        Forget one entry.
+
+        Args:
+            key (str): Manifest key of the entry
+
+        Returns:
+            dict: The removed entry, or None if the key is unknown
+        """
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._save()
+            return entry
+
+    def remove_source(self, source):
+        """
+        Forget every entry whose chunks were stored under a source name.
+
+        Args:
+            source (str): Stored source name
+
+        Returns:
+            list: The removed entries
+        """
+        with self._lock:
+            keys = [key for key, entry in self._entries.items() if entry["source"] == source]
+            removed = [self._entries.pop(key) for key in keys]
+            if removed:
+                self._save()
+            return removed
+
+    def resolve_source(self, filename):
+        """
+        Map a file name to the source name its chunks were stored under.
+
+        Args:
+            filename (str): Name of an uploaded file
+
+        Returns:
+            str: The stored source name (the file name itself if unknown)
+        """
+        with self._lock:
+            entries = sorted(self._entries.values(), key=lambda e: e["ingested_at"], reverse=True)
+            for entry in entries:
+                if filename == entry["source"]:
+                    return filename
+            for entry in entries:
+                if filename in entry["aliases"]:
+                    return entry["source"]
+            return filename
+
+
+def page_content_hash(page):
+    """
+    Compute the SHA-256 hash of a page's text.
+
+    Args:
+        page (Document): Page document
+
+    Returns:
+        str: Hex digest of the page text
+    """
+    return hashlib.sha256(page.page_content.encode("utf-8")).hexdigest()
+
+
+def chunk_id(document_id, page, page_hash, splitting_strategy, start_index, ordinal):
+    """
+    Build the stable vector store ID of a chunk.
+
+    The ID depends on the text of the chunk's page rather than the whole
+    file, so splitting an unchanged page again gives the same IDs and
+    storing them replaces the existing chunks instead of duplicating them.
+
+    Args:
+        document_id (str): Source name of the document
+        page (int): Page number the chunk comes from
+        page_hash (str): Hash of the page text
+        splitting_strategy (str): Splitting strategy used
+        start_index (int): Offset of the chunk in its page or section, or None
+        ordinal (int): Position of the chunk among the chunks of its page
+
+    Returns:
+        str: The chunk ID
+    """
+    parts = [document_id, page, page_hash, splitting_strategy, start_index, ordinal]
+    return hashlib.sha256("|".join(str(part) for part in parts).encode("utf-8")).hexdigest()[:32]
+
+
+def split_page_window(pages, splitting_strategy="hybrid", chunk_size=1000, chunk_overlap=200, target_length=800,
+                      length_unit="chars", known_pages=None, page_hashes=None):
+    """
+    Split a window of pages and normalize the chunks of each page.
+
+    Every strategy splits each page independently and chunks are only
+    merged with chunks of the same page, so windows can be processed
+    separately and a changed page can be split again on its own. Every
+    chunk gets a stable 'id', see chunk_id.
+
+    Args:
+        pages (list): Page documents, in page order
+        splitting_strategy (str): Strategy passed to split_documents
+        chunk_size (int): Chunk size passed to split_documents
+        chunk_overlap (int): Chunk overlap passed to split_documents
+        target_length (int): Target length passed to normalize_chunk_lengths
+        length_unit (str): Unit of the lengths, see tokenization.get_length_function
+        known_pages (dict, optional): Page number -> hash of pages that are
+            already stored; they are skipped if their text is unchanged
+        page_hashes (dict, optional): Filled with page number -> hash of
+            every page of the window
+
+    Returns:
+        list: Normalized chunks of the pages that were split, in page order
+    """
+    length_function = tokenization.get_length_function(length_unit)
+    known_pages = known_pages or {}
+    chunks = []
+    for page in pages:
+        number = page.metadata.get("page")
+        page_hash = page_content_hash(page)
+        if page_hashes is not None:
+            page_hashes[number] = page_hash
+        if known_pages.get(number) == page_hash:
+            continue
+        splits = text_processing.split_documents(
+            [page], chunk_size=chunk_size, chunk_overlap=chunk_overlap,
+            splitting_strategy=splitting_strategy, length_function=length_function
+        )
+        page_chunks = text_processing.normalize_chunk_lengths(splits, target_length=target_length,
+                                                              length_function=length_function)
+        for ordinal, chunk in enumerate(page_chunks):
+            chunk.id = chunk_id(page.metadata.get("source"), number, page_hash, splitting_strategy,
+                                chunk.metadata.get("start_index"), ordinal)
+        chunks.extend(page_chunks)
+    return chunks
+
+
+def _stamp_pages(pages, source, splitting_strategy):
+    for page in pages:
+        if source is not None:
+            page.metadata['source'] = source
+        page.metadata['splitting_strategy'] = splitting_strategy
+
+
+def _split_window(pages, source, splitting_strategy, chunk_size, chunk_overlap, target_length, length_unit,
+                  known_pages):
+    _stamp_pages(pages, source, splitting_strategy)
+    page_hashes = {}
+    chunks = split_page_window(pages, splitting_strategy, chunk_size, chunk_overlap, target_length, length_unit,
+                               known_pages, page_hashes)
+    return page_hashes, chunks
+
+
+def _parse_and_split_window(file_path, first_page, last_page, document_metadata, source, splitting_strategy,
+                            chunk_size, chunk_overlap, target_length, length_unit, known_pages):
+    """Process pool task: parse one page window of a PDF and split it."""
+    pages = loaders.load_pdf_pages(file_path, first_page, last_page, document_metadata)
+    return _split_window(pages, source, splitting_strategy, chunk_size, chunk_overlap, target_length, length_unit,
+                         known_pages)
+
+
+_parse_pools = {}
+_parse_pools_lock = threading.Lock()
+
+
+def _get_parse_pool(workers):
+    # Pools are reused across documents; "spawn" keeps worker start-up safe
+    # in the multi-threaded web server
+    with _parse_pools_lock:
+        pool = _parse_pools.get(workers)
+        if pool is None:
+            pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+            _parse_pools[workers] = pool
+        return pool
+
+
+def iter_pdf_chunks(file_path, source=None, splitting_strategy="hybrid", chunk_size=1000, chunk_overlap=200,
+                    target_length=800, page_window=PAGE_WINDOW, progress_callback=None,
+                    parse_workers=PARSE_WORKERS, length_unit="chars", known_pages=None, page_hashes=None):
+    """
+    Stream the normalized chunks of a PDF, a window of pages at a time.
+
+    With parse_workers > 1, page windows are parsed and split in a process
+    pool and merged back in page order; the chunks are identical to the
+    in-process path, including their 'page' and 'start_index' metadata.
+    Otherwise pages are parsed lazily in-process. Either way memory holds a
+    bounded number of page windows rather than the whole document.
+
+    Args:
+        file_path (str): Path to the PDF file
+        source (str, optional): Value for the 'source' metadata of every chunk
+        splitting_strategy (str): Strategy passed to split_documents
+        chunk_size (int): Chunk size passed to split_documents
+        chunk_overlap (int): Chunk overlap passed to split_documents
+        target_length (int): Target length passed to normalize_chunk_lengths
+        page_window (int): Number of pages parsed and split together
+        progress_callback (callable, optional): Called as progress_callback(stage, info)
+            with the number of pages read and chunks produced so far
+        parse_workers (int): Number of processes parsing page windows
+        length_unit (str): Unit of the lengths, see tokenization.get_length_function
+        known_pages (dict, optional): Page number -> hash of pages that are
+            already stored; unchanged ones are read but not split
+        page_hashes (dict, optional): Filled with page number -> hash of every page read
+
+    Yields:
+        Document: Normalized chunks, in page order
+    """
+    def report(stage, info):
+        if progress_callback:
+            progress_callback(stage, info)
+
+    if parse_workers and parse_workers > 1:
+        windows = _iter_parallel_windows(file_path, source, splitting_strategy, chunk_size, chunk_overlap,
+                                         target_length, page_window, parse_workers, length_unit, known_pages)
+    else:
+        windows = _iter_serial_windows(file_path, source, splitting_strategy, chunk_size, chunk_overlap,
+                                       target_length, page_window, length_unit, known_pages)
+
+    pages_read = 0
+    chunks_produced = 0
+    report("loading", {"pages": 0})
+    for window_hashes, chunks in windows:
+        if page_hashes is not None:
+            page_hashes.update(window_hashes)
+        pages_read += len(window_hashes)
+        chunks_produced += len(chunks)
+        report("splitting" if chunks_produced == len(chunks) else "embedding", {"pages": pages_read})
+        report("embedding", {"chunks": chunks_produced})
+        yield from chunks
+
+
+def _iter_serial_windows(file_path, source, splitting_strategy, chunk_size, chunk_overlap, target_length,
+                         page_window, length_unit, known_pages):
+    window = []
+    for page in loaders.lazy_load_pdf(file_path):
+        window.append(page)
+        if len(window) == page_window:
+            yield _split_window(window, source, splitting_strategy, chunk_size, chunk_overlap, target_length,
+                                length_unit, known_pages)
+            window = []
+    if window:
+        yield _split_window(window, source, splitting_strategy, chunk_size, chunk_overlap, target_length,
+                            length_unit, known_pages)
+
+
+def _iter_parallel_windows(file_path, source, splitting_strategy, chunk_size, chunk_overlap, target_length,
+                           page_window, parse_workers, length_unit, known_pages):
+    total_pages = loaders.count_pdf_pages(file_path)
+    document_metadata = loaders.pdf_document_metadata(file_path)
+    pool = _get_parse_pool(parse_workers)
+    first_pages = iter(range(0, total_pages, page_window))
+    pending = deque()
+
+    def submit_next():
+        first_page = next(first_pages, None)
+        if first_page is None:
+            return False
+        pending.append(pool.submit(
+            _parse_and_split_window, file_path, first_page, first_page + page_window, document_metadata,
+            source, splitting_strategy, chunk_size, chunk_overlap, target_length, length_unit, known_pages
+        ))
+        return True
+
+    # Keep every worker busy with one window queued behind it, and hand
+    # results back strictly in page order
+    while len(pending) < 2 * parse_workers and submit_next():
+        pass
+    while pending:
+        result = pending.popleft().result()
+        submit_next()
+        yield result
+
+
+def _record_chunk_ids(chunks, ids_by_page):
+    """Pass chunks through, recording their IDs by page."""
+    for chunk in chunks:
+        ids_by_page.setdefault(chunk.metadata.get("page"), []).append(chunk.id)
+        yield chunk
+
+
+def _index_while_streaming(lexical_index, document_id, chunks, batch_size=256):
+    """Pass chunks through, adding them to the lexical index in batches."""
+    batch = []
+    for chunk in chunks:
+        batch.append(chunk)
+        if len(batch) == batch_size:
+            lexical_index.add_chunks(document_id, batch)
+            batch = []
+        yield chunk
+    if batch:
+        lexical_index.add_chunks(document_id, batch)
+
+
+def ingest_pdf(file_path, vs, manifest, embedding_model, collection_name, source=None,
+               splitting_strategy="hybrid", chunk_size=1000, chunk_overlap=200, target_length=800,
+               progress_callback=None, store_factory=None, page_window=PAGE_WINDOW,
+               parse_workers=PARSE_WORKERS, length_unit="chars", lexical_index=None):
+    """
+    Load, split and embed a PDF unless the manifest says it is already stored.
+
+    Pages are streamed from the PDF into the splitter and the embedder, so
+    peak memory is bounded by a window of pages and the batches in flight.
+
+    Chunks are stored under stable IDs and a source has one version in a
+    collection: ingesting a changed file (or new parameters) under the same
+    source replaces the previous ingestion. With unchanged chunking
+    parameters only pages whose text changed are split and embedded again;
+    chunks of changed and removed pages are deleted from the store and the
+    lexical index.
+
+    Args:
+        file_path (str): Path to the PDF file
+        vs: The vector store to add the chunks to, or None with store_factory
+        manifest (IngestionManifest): Manifest of the vector store
+        embedding_model (str): Name of the embedding model used by the store
+        collection_name (str): Name of the vector store collection
+        source (str, optional): Value for the 'source' metadata of every chunk
+        splitting_strategy (str): Strategy passed to split_documents
+        chunk_size (int): Chunk size passed to split_documents
+        chunk_overlap (int): Chunk overlap passed to split_documents
+        target_length (int): Target length passed to normalize_chunk_lengths
+        progress_callback (callable, optional): Called as progress_callback(stage, info)
+            when ingestion enters the 'loading', 'splitting' and 'embedding'
+            stages and as pages are read and chunks embedded. Once the first
+            window is split, splitting and embedding overlap and are reported
+            as 'embedding'.
+        store_factory (callable, optional): Called with the source name to get
+            the vector store, only when the document has to be embedded
+        page_window (int): Number of pages parsed and split together
+        parse_workers (int): Number of processes parsing and splitting page
+            windows; 0 or 1 parses in-process
+        length_unit (str): Unit of chunk_size, chunk_overlap and target_length:
+            'chars', 'tokens' (embedding model tokenizer) or 'approx_tokens'
+        lexical_index (LexicalIndex, optional): Index the chunks are also added
+            to, under the source name; on a manifest hit the document is
+            indexed if the index does not have it yet
+
+    Returns:
+        dict: The manifest entry, with 'cached' set to True on a hit; after an
+        ingestion it also holds 'embedded_chunks', 'reused_pages' and
+        'deleted_chunks'
+    """
+    def report(stage, info=None):
+        if progress_callback:
+            progress_callback(stage, info or {})
+
+    content_hash = file_content_hash(file_path)
+    key = manifest_key(content_hash, splitting_strategy, chunk_size, chunk_overlap,
+                       target_length, embedding_model, collection_name, length_unit)
+    name = source or file_path
+
+    def chunks(progress_callback=None, known_pages=None, page_hashes=None, chunk_source=source):
+        return iter_pdf_chunks(
+            file_path, source=chunk_source, splitting_strategy=splitting_strategy, chunk_size=chunk_size,
+            chunk_overlap=chunk_overlap, target_length=target_length, page_window=page_window,
+            progress_callback=progress_callback, parse_workers=parse_workers, length_unit=length_unit,
+            known_pages=known_pages, page_hashes=page_hashes
+        )
+
+    entry = manifest.lookup(key)
+    if entry is not None:
+        manifest.add_alias(key, name)
+        if lexical_index is not None and not lexical_index.has_document(entry["source"]):
+            # Vectors ingested before the lexical index existed; splitting
+            # again is cheap and, under the stored source name, gives the same chunks
+            lexical_index.add_chunks(entry["source"], chunks(chunk_source=entry["source"]))
+        entry["cached"] = True
+        return entry
+
+    if store_factory is not None:
+        vs = store_factory(name)
+
+    # Pages of the previous ingestion of this source, if it recorded them
+    previous_key, previous = manifest.latest(name, collection_name)
+    stored_pages = {}
+    if previous is not None:
+        stored_pages = {int(page): record for page, record in previous.get("pages", {}).items()}
+    same_chunking = previous is not None and (
+        previous["splitting_strategy"], previous["chunk_size"], previous["chunk_overlap"],
+        previous["target_length"], previous.get("length_unit", "chars"), previous["embedding_model"]
+    ) == (splitting_strategy, chunk_size, chunk_overlap, target_length, length_unit, embedding_model)
+    # Unchanged pages are only skipped if the lexical index has their chunks too
+    known_pages = {}
+    if same_chunking and (lexical_index is None or lexical_index.has_document(name)):
+        known_pages = {page: record["hash"] for page, record in stored_pages.items()}
+
+    # Entries written before chunks had stable IDs do not record them; their
+    # chunks are found by source and replaced like those of changed pages
+    legacy_ids = []
+    if previous is not None and "pages" not in previous:
+        legacy_ids = vector_store.get_document_ids(vs, source=name)
+
+    # Load, split and normalize the changed pages lazily, feeding the embedder
+    page_hashes = {}
+    new_ids = {}
+    document_chunks = _record_chunk_ids(chunks(report, known_pages, page_hashes), new_ids)
+    if lexical_index is not None:
+        if not known_pages:
+            lexical_index.remove_document(name)
+        document_chunks = _index_while_streaming(lexical_index, name, document_chunks)
+    ids = vector_store.add_documents_to_store(
+        vs, document_chunks,
+        progress_callback=lambda stats: report("embedding", {
+            "embedded": stats["done"], "chunks_per_sec": stats["chunks_per_sec"]
+        })
+    )
+
+    pages = {}
+    reused_pages = 0
+    for page, page_hash in sorted(page_hashes.items()):
+        if known_pages.get(page) == page_hash:
+            pages[str(page)] = stored_pages[page]
+            reused_pages += 1
+        else:
+            pages[str(page)] = {"hash": page_hash, "ids": new_ids.get(page, [])}
+    live_ids = {chunk_id for record in pages.values() for chunk_id in record["ids"]}
+    stale_ids = [
+        chunk_id for record in stored_pages.values() for chunk_id in record["ids"] if chunk_id not in live_ids
+    ] + [chunk_id for chunk_id in legacy_ids if chunk_id not in live_ids]
+    # Deleted after the new chunks are stored, so the document stays searchable
+    if stale_ids:
+        vector_store.delete_documents_from_store(vs, stale_ids)
+        if lexical_index is not None:
+            lexical_index.remove_chunks(stale_ids)
+    if previous_key is not None:
+        manifest.remove(previous_key)
+
+    entry = {
+        "content_hash": content_hash,
+        "source": name,
+        # Names the previous version was also uploaded under still resolve here
+        "aliases": [alias for alias in (previous or {}).get("aliases", []) if alias != name],
+        "splitting_strategy": splitting_strategy,
+        "chunk_size": chunk_size,
+        "chunk_overlap": chunk_overlap,
+        "target_length": target_length,
+        "length_unit": length_unit,
+        "embedding_model": embedding_model,
+        "collection_name": collection_name,
+        "chunk_count": len(live_ids),
+        "pages": pages,
+        "ingested_at": time.time(),
+    }
+    manifest.record(key, entry)
+    entry.update({
+        "cached": False,
+        "embedded_chunks": len(ids),
+        "reused_pages": reused_pages,
+        "deleted_chunks": len(stale_ids),
+    })
+    return entry
@@ -0,0 +1,198 @@
+import json
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+# Job states, in the order a successful job goes through them
+JOB_STATES = ("queued", "loading", "splitting", "embedding", "done", "failed")
+FINISHED_STATES = ("done", "failed")
+
+# Seconds a finished job stays readable before its file is deleted
+JOB_RETENTION = float(os.environ.get("JOB_RETENTION", "86400"))
+
+
+class IngestionJobQueue:
+    """
+    Worker pool running ingestion jobs in the background.
+
+    Every job is persisted as a JSON file, so its state and per-stage timings
+    can be read back after a restart. Jobs that had not finished when the
+    process stopped are queued again by resume(). Finished jobs are
+    forgotten, and their files deleted, once they are older than
+    finished_ttl.
+    """
+
+    def __init__(self, jobs_directory, run_job, max_workers=2, finished_ttl=JOB_RETENTION):
+        """
+        Args:
+            jobs_directory (str): Directory holding one JSON file per job
+            run_job (callable): Called as run_job(params, progress_callback);
+                progress_callback(stage, info) moves the job to a stage and
+                merges info into its progress. The return value is stored as
+                the job result.
+            max_workers (int): Number of jobs running in parallel
+            finished_ttl (float): Seconds a finished job is kept, or None to keep it forever
+        """
+        self.jobs_directory = jobs_directory
+        self.run_job = run_job
+        self.finished_ttl = finished_ttl
+        self._lock = threading.Lock()
+        self._jobs = {}
+        self._resumed = False
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ingest")
+        os.makedirs(jobs_directory, exist_ok=True)
+
+        for filename in sorted(os.listdir(jobs_directory)):
+            if not filename.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(jobs_directory, filename), "r", encoding="utf-8") as f:
+                    job = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"WARNING: Skipping unreadable job file {filename}: {e}")
+                continue
+            self._jobs[job["id"]] = job
+        with self._lock:
+            self._expire()
+
+    def resume(self):
+        """
+        Queue again the jobs that had not finished when the process stopped.
+
+        Only the first call has an effect. It is not done on construction so
+        that only the process that serves requests runs them, and not, for
+        example, the parent process of a development reloader as well.
+
+        Returns:
+            list: IDs of the queued jobs
+        """
+        with self._lock:
+            if self._resumed:
+                return []
+            self._resumed = True
+            job_ids = [job_id for job_id, job in self._jobs.items() if job["state"] not in FINISHED_STATES]
+        for job_id in job_ids:
+            self._requeue(job_id)
+        return job_ids
+
+    def _expire(self):
+        # Caller holds the lock
+        if self.finished_ttl is None:
+            return
+        cutoff = time.time() - self.finished_ttl
+        for job_id, job in list(self._jobs.items()):
+            if job["state"] in FINISHED_STATES and job["updated_at"] < cutoff:
+                del self._jobs[job_id]
+                try:
+                    os.remove(self._path(job_id))
+                except OSError:
+                    pass
+
+    def _path(self, job_id):
+        return os.path.join(self.jobs_directory, f"{job_id}.json")
+
+    def _save(self, job):
+        # Caller holds the lock
+        tmp_path = self._path(job["id"]) + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(job, f, indent=2)
+        os.replace(tmp_path, self._path(job["id"]))
+
+    def _set_stage(self, job, stage):
+        # Caller holds the lock
+        now = time.time()
+        current = job["stages"].get(job["state"])
+        if current and current.get("finished_at") is None:
+            current["finished_at"] = now
+            current["seconds"] = now - current["started_at"]
+        job["state"] = stage
+        if stage not in FINISHED_STATES:
+            job["stages"][stage] = {"started_at": now, "finished_at": None, "seconds": None}
+        job["updated_at"] = now
+
+    def _requeue(self, job_id):
+        with self._lock:
+            job = self._jobs[job_id]
+            job["stages"] = {}
+            job["progress"] = {}
+            job["error"] = None
+            job["state"] = None
+            self._set_stage(job, "queued")
+            self._save(job)
+        self._executor.submit(self._run, job_id)
+
+    def submit(self, params):
+        """
+        Queue a new job.
+
+        Args:
+            params (dict): JSON-serializable arguments passed to run_job
+
+        Returns:
+            str: ID of the new job
+        """
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._lock:
+            self._expire()
+            self._jobs[job_id] = {
+                "id": job_id,
+                "state": "queued",
+                "params": params,
+                "created_at": now,
+                "updated_at": now,
+                "stages": {"queued": {"started_at": now, "finished_at": None, "seconds": None}},
+                "progress": {},
+                "result": None,
+                "error": None,
+            }
+            self._save(self._jobs[job_id])
+        self._executor.submit(self._run, job_id)
+        return job_id
+
+    def get(self, job_id):
+        """
+        Return a snapshot of a job.
+
+        Args:
+            job_id (str): ID returned by submit
+
+        Returns:
+            dict: The job state, or None if the job is unknown
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return json.loads(json.dumps(job)) if job else None
+
+    def _progress(self, job_id, stage, info=None):
+        if stage not in JOB_STATES or stage in FINISHED_STATES:
+            raise ValueError(f"Unknown job stage {stage!r}, expected one of {JOB_STATES[:-2]}")
+        with self._lock:
+            job = self._jobs[job_id]
+            if stage != job["state"]:
+                self._set_stage(job, stage)
+            if info:
+                job["progress"].update(info)
+            job["updated_at"] = time.time()
+            self._save(job)
+
+    def _run(self, job_id):
+        with self._lock:
+            params = self._jobs[job_id]["params"]
+        try:
+            result = self.run_job(params, lambda stage, info=None: self._progress(job_id, stage, info))
+        except Exception as e:
+            print(f"Ingestion job {job_id} failed: {e}")
+            with self._lock:
+                job = self._jobs[job_id]
+                self._set_stage(job, "failed")
+                job["error"] = str(e)
+                self._save(job)
+            return
+        with self._lock:
+            job = self._jobs[job_id]
+            self._set_stage(job, "done")
+            job["result"] = result
+            self._save(job)
@@ -0,0 +1,297 @@
+import json
+import math
+import os
+import re
+import sqlite3
+import threading
+from collections import Counter
+
+from langchain_core.documents import Document
+
+from src.numpy_store import matches_filter
+
+INDEX_FILENAME = "lexical_index.sqlite3"
+
+# Values bound per query, below SQLite's limit on query parameters
+MAX_PARAMETERS = 500
+
+# Words, numbers and labels such as "3", "eq", "2306.13549" (split on the dot)
+_TERM_PATTERN = re.compile(r"\w+")
+
+
+def tokenize(text):
+    """
+    Split a text into lower-cased index terms.
+
+    Args:
+        text (str): Text to tokenize
+
+    Returns:
+        list: The terms, in order
+    """
+    return _TERM_PATTERN.findall(text.lower())
+
+
+def _matches_filters(metadata, page_range=None, section=None, strategy=None, where=None):
+    if where is not None:
+        # A raw filter is used instead of the other arguments, as in vector_store
+        return matches_filter(metadata, where)
+    if page_range is not None:
+        page = metadata.get("page")
+        first_page, last_page = page_range
+        if page is None:
+            return False
+        if first_page is not None and page < first_page:
+            return False
+        if last_page is not None and page > last_page:
+            return False
+    if section is not None and metadata.get("section_title") != section:
+        return False
+    if strategy is not None and metadata.get("splitting_strategy") != strategy:
+        return False
+    return True
+
+
+class LexicalIndex:
+    """
+    BM25 inverted index of the chunks of every ingested document.
+
+    Postings live in a SQLite file next to the vector store. Each document's
+    chunks can be added incrementally while it is ingested and replaced or
+    removed without touching other documents. Collection statistics (chunk
+    count, average length, document frequencies) are computed over the
+    documents being searched.
+    """
+
+    def __init__(self, directory, k1=1.5, b=0.75):
+        """
+        Args:
+            directory (str): Directory holding the index file
+            k1 (float): BM25 term frequency saturation
+            b (float): BM25 length normalization
+        """
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, INDEX_FILENAME)
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.executescript(
+            "CREATE TABLE IF NOT EXISTS chunks ("
+            "id INTEGER PRIMARY KEY, document_id TEXT NOT NULL, length INTEGER NOT NULL, "
+            "content TEXT NOT NULL, metadata TEXT NOT NULL);"
+            "CREATE INDEX IF NOT EXISTS chunks_document ON chunks (document_id);"
+            "CREATE TABLE IF NOT EXISTS postings ("
+            "term TEXT NOT NULL, chunk_id INTEGER NOT NULL, tf INTEGER NOT NULL);"
+            "CREATE INDEX IF NOT EXISTS postings_term ON postings (term);"
+            "CREATE INDEX IF NOT EXISTS postings_chunk ON postings (chunk_id);"
+        )
+        # Vector store ID of each chunk; indexes created before IDs were stable lack the column
+        columns = [row[1] for row in self._db.execute("PRAGMA table_info(chunks)")]
+        if "chunk_key" not in columns:
+            self._db.execute("ALTER TABLE chunks ADD COLUMN chunk_key TEXT")
+        self._db.execute("CREATE INDEX IF NOT EXISTS chunks_key ON chunks (chunk_key)")
+        self._db.commit()
+
+    def add_chunks(self, document_id, chunks):
+        """
+        Index chunks of a document, in addition to the ones already indexed.
+
+        Args:
+            document_id (str): Document the chunks belong to
+            chunks (iterable): Document chunks; their 'id', if set, can be
+                passed to remove_chunks later
+
+        Returns:
+            int: Number of indexed chunks
+        """
+        count = 0
+        with self._lock:
+            for chunk in chunks:
+                terms = tokenize(chunk.page_content)
+                cursor = self._db.execute(
+                    "INSERT INTO chunks (document_id, length, content, metadata, chunk_key) VALUES (?, ?, ?, ?, ?)",
+                    (document_id, len(terms), chunk.page_content, json.dumps(chunk.metadata), chunk.id)
+                )
+                self._db.executemany(
+                    "INSERT INTO postings (term, chunk_id, tf) VALUES (?, ?, ?)",
+                    [(term, cursor.lastrowid, tf) for term, tf in Counter(terms).items()]
+                )
+                count += 1
+            self._db.commit()
+        return count
+
+    def remove_document(self, document_id):
+        """
+        Remove every chunk of a document from the index.
+
+        Args:
+            document_id (str): Document to remove
+
+        Returns:
+            int: Number of removed chunks
+        """
+        with self._lock:
+            self._db.execute(
+                "DELETE FROM postings WHERE chunk_id IN (SELECT id FROM chunks WHERE document_id = ?)",
+                (document_id,)
+            )
+            removed = self._db.execute("DELETE FROM chunks WHERE document_id = ?", (document_id,)).rowcount
+            self._db.commit()
+        return removed
+
+    def remove_chunks(self, ids):
+        """
+        Remove chunks from the index by ID.
+
+        Args:
+            ids (list): IDs of the chunks to remove
+
+        Returns:
+            int: Number of removed chunks
+        """
+        ids = list(ids)
+        removed = 0
+        with self._lock:
+            # Stay below SQLite's limit on query parameters
+            for start in range(0, len(ids), MAX_PARAMETERS):
+                batch = ids[start:start + MAX_PARAMETERS]
+                marks = ",".join("?" * len(batch))
+                self._db.execute(
+                    f"DELETE FROM postings WHERE chunk_id IN (SELECT id FROM chunks WHERE chunk_key IN ({marks}))",
+                    batch
+                )
+                removed += self._db.execute(f"DELETE FROM chunks WHERE chunk_key IN ({marks})", batch).rowcount
+            self._db.commit()
+        return removed
+
+    def has_document(self, document_id):
+        """
+        Check whether a document has indexed chunks.
+
+        Args:
+            document_id (str): Document to look up
+
+        Returns:
+            bool: True if the document is indexed
+        """
+        with self._lock:
+            row = self._db.execute("SELECT 1 FROM chunks WHERE document_id = ? LIMIT 1", (document_id,)).fetchone()
+        return row is not None
+
+    def _score_chunks(self, query, document_ids):
+        # BM25 score and document of every chunk of the documents matching a query term
+        terms = list(set(tokenize(query)))
+        document_ids = list(document_ids)
+        if not terms or not document_ids:
+            return {}
+        # Documents and terms are bound in batches that together stay below MAX_PARAMETERS
+        half = MAX_PARAMETERS // 2
+        document_batches = [document_ids[i:i + half] for i in range(0, len(document_ids), half)]
+        term_batches = [terms[i:i + half] for i in range(0, len(terms), half)]
+
+        chunk_count, total_length = 0, 0
+        rows = []
+        with self._lock:
+            for batch in document_batches:
+                count, length = self._db.execute(
+                    f"SELECT COUNT(*), SUM(length) FROM chunks WHERE document_id IN ({','.join('?' * len(batch))})",
+                    batch
+                ).fetchone()
+                chunk_count += count
+                total_length += length or 0
+            if not chunk_count:
+                return {}
+            for document_batch in document_batches:
+                document_marks = ",".join("?" * len(document_batch))
+                for term_batch in term_batches:
+                    rows.extend(self._db.execute(
+                        "SELECT p.term, p.chunk_id, p.tf, c.length, c.document_id "
+                        "FROM postings p JOIN chunks c ON c.id = p.chunk_id "
+                        f"WHERE p.term IN ({','.join('?' * len(term_batch))}) AND c.document_id IN ({document_marks})",
+                        term_batch + document_batch
+                    ))
+        average_length = total_length / chunk_count
+
+        postings = {}
+        for term, chunk_id, tf, length, document_id in rows:
+            postings.setdefault(term, []).append((chunk_id, tf, length, document_id))
+
+        scores = {}
+        for term, term_postings in postings.items():
+            df = len(term_postings)
+            idf = math.log(1 + (chunk_count - df + 0.5) / (df + 0.5))
+            for chunk_id, tf, length, document_id in term_postings:
+                norm = self.k1 * (1 - self.b + self.b * length / (average_length or 1))
+                score = scores.get(chunk_id, (0.0, document_id))[0]
+                scores[chunk_id] = (score + idf * tf * (self.k1 + 1) / (tf + norm), document_id)
+        return scores
+
+    def rank_documents(self, query, document_ids, limit=None):
+        """
+        Rank documents by their best-matching chunk for a query.
+
+        Cheap compared with a vector search, so it can pick which documents
+        are worth opening when a question is asked across many of them.
+
+        Args:
+            query (str): The query text
+            document_ids (list): Documents to rank
+            limit (int, optional): Maximum number of documents to return
+
+        Returns:
+            list: IDs of the documents with at least one matching chunk, best first
+        """
+        best = {}
+        for score, document_id in self._score_chunks(query, document_ids).values():
+            best[document_id] = max(score, best.get(document_id, 0.0))
+        ranked = sorted(best, key=lambda document_id: best[document_id], reverse=True)
+        return ranked if limit is None else ranked[:limit]
+
+    def search(self, query, document_ids, k=5, page_range=None, section=None, strategy=None, where=None):
+        """
+        Rank the chunks of some documents against a query with BM25.
+
+        Args:
+            query (str): The query text
+            document_ids (list): Documents to search
+            k (int): Number of results to return
+            page_range (tuple, optional): (first_page, last_page), inclusive; either end may be None
+            section (str, optional): Only chunks with this 'section_title'
+            strategy (str, optional): Only chunks with this 'splitting_strategy'
+            where (dict, optional): Raw Chroma-style metadata filter, used
+                instead of the arguments above
+
+        Returns:
+            list: (Document, score) pairs, highest score first
+        """
+        if k <= 0:
+            return []
+        scores = self._score_chunks(query, document_ids)
+
+        filtered = page_range is not None or section is not None or strategy is not None or where is not None
+        ranked = sorted(((chunk_id, score) for chunk_id, (score, _) in scores.items()),
+                        key=lambda item: item[1], reverse=True)
+        # Chunks are loaded a block of the ranking at a time, one query per
+        # block; with filters, further blocks are read until k chunks match
+        block_size = min(max(4 * k, 256) if filtered else k, MAX_PARAMETERS)
+        results = []
+        with self._lock:
+            for start in range(0, len(ranked), block_size):
+                block = ranked[start:start + block_size]
+                marks = ",".join("?" * len(block))
+                stored = {
+                    chunk_id: (content, metadata) for chunk_id, content, metadata in self._db.execute(
+                        f"SELECT id, content, metadata FROM chunks WHERE id IN ({marks})",
+                        [chunk_id for chunk_id, _ in block]
+                    )
+                }
+                for chunk_id, score in block:
+                    content, metadata = stored[chunk_id]
+                    metadata = json.loads(metadata)
+                    if filtered and not _matches_filters(metadata, page_range, section, strategy, where):
+                        continue
+                    results.append((Document(page_content=content, metadata=metadata), score))
+                    if len(results) == k:
+                        return results
+        return results
@@ -1,4 +1,6 @@
-import ollama
+import time
+
+from src import ollama_client
 
 def generate_response(model, prompt):
     """
@@ -11,5 +13,57 @@ def generate_response(model, prompt):
     Returns:
         str: The model's response
     """
-    response = ollama.generate(model=model, prompt=prompt)
-    return response.response 
\ No newline at end of file
+    response = ollama_client.get_client().generate(model=model, prompt=prompt)
+    return response.response 
+
+def generate_response_stream(model, prompt, metrics=None):
+    """
+    Generate a response from an LLM, yielding tokens as they arrive.
+
+    Args:
+        model (str): Name of the model to use
+        prompt (str): The prompt to send to the model
+        metrics (dict, optional): Filled in while streaming with
+            'time_to_first_token', 'tokens', 'total_seconds' and 'tokens_per_sec'
+
+    Yields:
+        str: Pieces of the model's response, in order
+    """
+    if metrics is None:
+        metrics = {}
+    start = time.perf_counter()
+    first_token_at = None
+    tokens = 0
+    eval_count = None
+
+    for chunk in ollama_client.get_client().generate(model=model, prompt=prompt, stream=True):
+        if chunk.response:
+            if first_token_at is None:
+                first_token_at = time.perf_counter()
+                metrics['time_to_first_token'] = first_token_at - start
+            tokens += 1
+            yield chunk.response
+        if chunk.done and chunk.eval_count:
+            # Ollama reports the exact number of generated tokens at the end
+            eval_count = chunk.eval_count
+
+    end = time.perf_counter()
+    metrics['tokens'] = eval_count or tokens
+    metrics['total_seconds'] = end - start
+    generation_seconds = end - first_token_at if first_token_at is not None else 0.0
+    metrics['tokens_per_sec'] = metrics['tokens'] / generation_seconds if generation_seconds > 0 else 0.0
+    metrics.setdefault('time_to_first_token', None)
+
+async def generate_response_async(model, prompt):
+    """
+    Generate a response from an LLM without blocking the event loop.
+
+    Args:
+        model (str): Name of the model to use
+        prompt (str): The prompt to send to the model
+
+    Returns:
+        str: The model's response
+    """
+    response = await ollama_client.get_client().agenerate(model=model, prompt=prompt)
+    return response.response
@@ -1,4 +1,6 @@
+import pypdf
 from langchain_community.document_loaders import PyPDFLoader
+from langchain_core.documents import Document
 
 def load_pdf(file_path):
     """
@@ -11,4 +13,81 @@ def load_pdf(file_path):
         list: List of document objects
     """
     loader = PyPDFLoader(file_path)
-    return loader.load() 
\ No newline at end of file
+    return loader.load() 
+
+def lazy_load_pdf(file_path):
+    """
+    Load a PDF file page by page.
+    
+    Pages are parsed as they are requested, so only the pages the caller
+    still holds on to are kept in memory.
+    
+    Args:
+        file_path (str): Path to the PDF file
+        
+    Yields:
+        Document: One document object per page, in page order
+    """
+    loader = PyPDFLoader(file_path)
+    yield from loader.lazy_load()
+
+def pdf_document_metadata(file_path):
+    """
+    Return the document-level metadata load_pdf attaches to every page.
+    
+    Only the first page is parsed.
+    
+    Args:
+        file_path (str): Path to the PDF file
+        
+    Returns:
+        dict: Metadata without the per-page 'page' and 'page_label' keys
+    """
+    first_page = next(lazy_load_pdf(file_path), None)
+    if first_page is None:
+        return {"source": file_path, "total_pages": 0}
+    metadata = dict(first_page.metadata)
+    metadata.pop("page", None)
+    metadata.pop("page_label", None)
+    return metadata
+
+def load_pdf_pages(file_path, first_page, last_page, document_metadata=None):
+    """
+    Load a range of pages of a PDF file without parsing the other pages.
+    
+    Text and metadata match what load_pdf returns for the same pages, so
+    page ranges can be loaded in separate processes and merged.
+    
+    Args:
+        file_path (str): Path to the PDF file
+        first_page (int): Index of the first page to load
+        last_page (int): Index after the last page to load
+        document_metadata (dict, optional): Result of pdf_document_metadata,
+            computed once by the caller
+        
+    Returns:
+        list: One document object per page, in page order
+    """
+    if document_metadata is None:
+        document_metadata = pdf_document_metadata(file_path)
+    reader = pypdf.PdfReader(file_path)
+    docs = []
+    for page_number in range(first_page, min(last_page, len(reader.pages))):
+        text = reader.pages[page_number].extract_text(extraction_mode="plain").strip()
+        metadata = dict(document_metadata)
+        metadata["page"] = page_number
+        metadata["page_label"] = reader.page_labels[page_number]
+        docs.append(Document(page_content=text, metadata=metadata))
+    return docs
+
+def count_pdf_pages(file_path):
+    """
+    Return the number of pages of a PDF file.
+    
+    Args:
+        file_path (str): Path to the PDF file
+        
+    Returns:
+        int: Number of pages
+    """
+    return len(pypdf.PdfReader(file_path).pages)
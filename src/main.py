@@ -1,6 +1,59 @@
-from src import loaders, text_processing, embeddings, vector_store, prompts, llm, context_builder
+import time
+from concurrent.futures import ThreadPoolExecutor
 
-def analyze_pdf(pdf_path, query, model="gemma3:1b", embedding_model="llama3"):
+from src import embeddings, vector_store, prompts, llm, context_builder, ingestion, retrieval
+from src.lexical_index import LexicalIndex
+
+# Collection the documents analyzed from the command line are stored in
+COLLECTION_NAME = "example_collection"
+PERSIST_DIRECTORY = "./chroma_langchain_db"
+
+class DocumentIndex:
+    """
+    Embeddings, vector store, manifest and lexical index of one collection.
+    
+    Documents ingested into the same index share these handles, so several
+    PDFs can be ingested and searched from one process, and an index
+    persisted by an earlier run is reused.
+    """
+    
+    def __init__(self, embedding_model="llama3", persist_directory=PERSIST_DIRECTORY,
+                 collection_name=COLLECTION_NAME, parse_workers=ingestion.PARSE_WORKERS):
+        """
+        Args:
+            embedding_model (str): Model to use for embeddings
+            persist_directory (str): Directory of the vector store
+            collection_name (str): Name of the vector store collection
+            parse_workers (int): Processes parsing page windows of a PDF
+        """
+        self.embedding_model = embedding_model
+        self.collection_name = collection_name
+        self.parse_workers = parse_workers
+        self.embeddings = embeddings.get_embeddings(model=embedding_model)
+        self.vector_store = vector_store.create_vector_store(self.embeddings, collection_name=collection_name,
+                                                             persist_directory=persist_directory)
+        self.manifest = ingestion.IngestionManifest(persist_directory)
+        self.lexical_index = LexicalIndex(persist_directory)
+    
+    def ingest(self, pdf_path, splitting_strategy="section", progress_callback=None):
+        """
+        Load, split and embed a PDF unless the manifest already has it.
+        
+        Args:
+            pdf_path (str): Path to the PDF file
+            splitting_strategy (str): Strategy passed to split_documents
+            progress_callback (callable, optional): See ingestion.ingest_pdf
+            
+        Returns:
+            dict: The manifest entry, see ingestion.ingest_pdf
+        """
+        return ingestion.ingest_pdf(pdf_path, self.vector_store, self.manifest, embedding_model=self.embedding_model,
+                                    collection_name=vector_store.collection_key(self.collection_name),
+                                    splitting_strategy=splitting_strategy, chunk_size=1000, chunk_overlap=20,
+                                    progress_callback=progress_callback, parse_workers=self.parse_workers,
+                                    lexical_index=self.lexical_index)
+
+def analyze_pdf(pdf_path, query, model="gemma3:1b", embedding_model="llama3", index=None):
     """
     Analyze a PDF document and answer a query about it.
     
@@ -9,39 +62,27 @@ def analyze_pdf(pdf_path, query, model="gemma3:1b", embedding_model="llama3"):
         query (str): Question to ask about the document
         model (str): LLM model to use for generation
         embedding_model (str): Model to use for embeddings
+        index (DocumentIndex, optional): Index to use (default: the default
+            collection with embedding_model)
         
     Returns:
         str: The answer to the query
     """
-    # Load the document
-    docs = loaders.load_pdf(pdf_path)
-    
-    # Split the document with an appropriate strategy
-    splits = text_processing.split_documents(docs, splitting_strategy="section", chunk_size=1000, chunk_overlap=20)
-    
-    # Optionally normalize chunk lengths for better embeddings
-    normalized_splits = text_processing.normalize_chunk_lengths(splits)
-    
-    # Create embeddings
-    embed_model = embeddings.get_embeddings(model=embedding_model)
-    
-    # Create vector store
-    vs = vector_store.create_vector_store(embed_model)
-    
-    # Add documents to the vector store
-    vector_store.add_documents_to_store(vs, normalized_splits)
+    if index is None:
+        index = DocumentIndex(embedding_model)
+    entry = index.ingest(pdf_path)
     
     # Generate query embedding
-    query_embedding = embed_model.embed_query(query)
+    query_embedding = index.embeddings.embed_query(query)
     
-    # Search for relevant documents
-    results = vector_store.similarity_search(vs, query_embedding, k=10)
+    # Search the document's chunks by embedding and by keywords, fusing both rankings
+    results = retrieval.hybrid_search(
+        lambda k, **filters: vector_store.similarity_search(index.vector_store, query_embedding, k=k, **filters),
+        index.lexical_index, query, [entry["source"]], k=10, source=entry["source"]
+    )
     
-    # Build context using the dedicated module
-    context = context_builder.build_context(results)
-
-    print(context)
-    input("Press Enter to continue...")
+    # Build context using the dedicated module, packed to the model's token budget
+    context = context_builder.build_context(results, max_tokens=context_builder.token_budget())
     
     # Generate prompt
     prompt = prompts.generate_advanced_prompt(context, query)
@@ -51,9 +92,75 @@ def analyze_pdf(pdf_path, query, model="gemma3:1b", embedding_model="llama3"):
     
     return response
 
+def analyze_pdf_batch(pdf_path, queries, model="gemma3:1b", embedding_model="llama3", max_concurrency=4,
+                      index=None):
+    """
+    Analyze a PDF document and answer several queries about it.
+    
+    The document is ingested once, all queries are embedded in one request
+    and searched as one batch, and the answers are generated with at most
+    max_concurrency generations in flight.
+    
+    Args:
+        pdf_path (str): Path to the PDF file
+        queries (list): Questions to ask about the document
+        model (str): LLM model to use for generation
+        embedding_model (str): Model to use for embeddings
+        max_concurrency (int): Maximum number of concurrent generations
+        index (DocumentIndex, optional): Index to use (default: the default
+            collection with embedding_model)
+        
+    Returns:
+        list: One dict per query, in order, with 'query', 'answer', 'error',
+        'ingest_seconds', 'ingest_cached', 'retrieval_seconds' (of the whole
+        batch), 'generation_seconds' and 'seconds' from the start of the
+        batch until the answer was ready
+    """
+    start = time.perf_counter()
+    queries = list(queries)
+    if not queries:
+        return []
+    if index is None:
+        index = DocumentIndex(embedding_model)
+    entry = index.ingest(pdf_path)
+    ingest_seconds = time.perf_counter() - start
+    
+    # Embed every query in one request and search them together
+    retrieval_start = time.perf_counter()
+    query_embeddings = index.embeddings.embed_documents(queries)
+    batch_results = retrieval.hybrid_search_batch(
+        lambda k, **filters: vector_store.similarity_search_batch(index.vector_store, query_embeddings, k=k,
+                                                                  **filters),
+        index.lexical_index, queries, [entry["source"]], k=10, source=entry["source"]
+    )
+    max_tokens = context_builder.token_budget()
+    batch_prompts = [
+        prompts.generate_advanced_prompt(context_builder.build_context(results, max_tokens=max_tokens), query)
+        for query, results in zip(queries, batch_results)
+    ]
+    retrieval_seconds = time.perf_counter() - retrieval_start
+    
+    def answer(query, prompt):
+        generation_start = time.perf_counter()
+        try:
+            response, error = llm.generate_response(model, prompt), None
+        except Exception as e:
+            response, error = None, str(e)
+        finished = time.perf_counter()
+        return {
+            "query": query,
+            "answer": response,
+            "error": error,
+            "ingest_seconds": ingest_seconds,
+            "ingest_cached": entry["cached"],
+            "retrieval_seconds": retrieval_seconds,
+            "generation_seconds": finished - generation_start,
+            "seconds": finished - start,
+        }
+    
+    with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+        return list(executor.map(answer, queries, batch_prompts))
+
 if __name__ == "__main__":
-    # Example usage
-    file_path = "pdf_files/paper.pdf"
-    query = "who are the authors of the paper?"
-    response = analyze_pdf(file_path, query)
-    print(response) 
\ No newline at end of file
+    from src import cli
+    cli.main() 
\ No newline at end of file
@@ -0,0 +1,486 @@
+import json
+import os
+import shutil
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:
+    # No cross-process write lock on this platform; one writer per collection
+    fcntl = None
+
+import numpy as np
+from langchain_core.documents import Document
+
+CATALOG_FILENAME = "catalog.sqlite3"
+LOCK_FILENAME = "write.lock"
+# JSON sidecar of earlier versions, imported into the catalog on first open
+METADATA_FILENAME = "metadata.json"
+STORAGE_DTYPES = ("float16", "int8")
+
+# Rows scored per matrix product; a per-document collection fits in one block
+SEARCH_BLOCK = 8192
+
+
+def _compare(value, operator, operand):
+    if operator == "$eq":
+        return value == operand
+    if operator == "$ne":
+        return value != operand
+    if operator == "$in":
+        return value in operand
+    if operator == "$nin":
+        return value not in operand
+    if value is None:
+        return False
+    if operator == "$gt":
+        return value > operand
+    if operator == "$gte":
+        return value >= operand
+    if operator == "$lt":
+        return value < operand
+    if operator == "$lte":
+        return value <= operand
+    raise ValueError(f"Unsupported filter operator: {operator}")
+
+
+def matches_filter(metadata, where):
+    """
+    Evaluate a Chroma 'where' filter against chunk metadata.
+
+    Supports the filters built by vector_store.build_metadata_filter:
+    equality, $eq, $ne, $in, $nin, $gt, $gte, $lt, $lte, $and and $or.
+
+    Args:
+        metadata (dict): Metadata of a chunk
+        where (dict): The filter, or None
+
+    Returns:
+        bool: True if the chunk matches
+    """
+    if not where:
+        return True
+    for field, condition in where.items():
+        if field == "$and":
+            if not all(matches_filter(metadata, part) for part in condition):
+                return False
+        elif field == "$or":
+            if not any(matches_filter(metadata, part) for part in condition):
+                return False
+        elif isinstance(condition, dict):
+            value = metadata.get(field)
+            if not all(_compare(value, operator, operand) for operator, operand in condition.items()):
+                return False
+        elif metadata.get(field) != condition:
+            return False
+    return True
+
+
+class NumpyVectorStore:
+    """
+    In-process vector store over memory-mapped, quantized embeddings.
+
+    Embeddings are L2-normalized and kept twice in .npy files: a float16 or
+    int8 matrix that every query scans with one matrix product, and a
+    float32 matrix from which only the rows of the shortlist are read to
+    re-score them exactly. Texts, metadata and IDs live in a SQLite catalog
+    next to them. Files grow by doubling and the catalog is updated row by
+    row, so adding a batch only writes its own rows.
+
+    Several handles, in one process or several, can share a collection:
+    writes hold an exclusive file lock and bump a generation number in the
+    catalog, and every operation first reloads the state if another handle
+    has changed it.
+
+    Implements the parts of the Chroma interface used by vector_store, so
+    it works with add_documents_to_store, similarity_search and
+    similarity_search_with_scores. Distances are cosine distances.
+    """
+
+    def __init__(self, embedding_function, collection_name, persist_directory, dtype="int8", rescore_factor=4):
+        """
+        Args:
+            embedding_function: Embeddings used for added documents
+            collection_name (str): Name of the collection (its subdirectory)
+            persist_directory (str): Directory holding the collections
+            dtype (str): Storage type of the scanned matrix, 'int8' or 'float16'
+            rescore_factor (int): Shortlist size as a multiple of k
+        """
+        if dtype not in STORAGE_DTYPES:
+            raise ValueError(f"Unknown storage dtype {dtype!r}, expected one of {STORAGE_DTYPES}")
+        self.embedding_function = embedding_function
+        self.collection_name = collection_name
+        self.directory = os.path.join(persist_directory, collection_name)
+        self.dtype = dtype
+        self.rescore_factor = rescore_factor
+        self._lock = threading.Lock()
+        self._db = None
+        self._generation = None
+        self._ids = []
+        self._texts = []
+        self._metadatas = []
+        self._rows = {}
+        self._dimension = None
+        self._vectors = None
+        self._exact = None
+        self._scales = None
+        with self._lock:
+            self._refresh()
+
+    def _path(self, name):
+        return os.path.join(self.directory, f"{name}.npy")
+
+    def _connection(self, create=False):
+        # Caller holds the lock; None while the collection does not exist
+        if self._db is None:
+            path = os.path.join(self.directory, CATALOG_FILENAME)
+            if not create and not os.path.exists(path):
+                return None
+            os.makedirs(self.directory, exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False, timeout=30)
+            self._db.execute("CREATE TABLE IF NOT EXISTS settings (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS documents ("
+                "row INTEGER PRIMARY KEY, id TEXT NOT NULL UNIQUE, text TEXT NOT NULL, metadata TEXT NOT NULL)"
+            )
+            self._db.commit()
+        return self._db
+
+    def _setting(self, db, key):
+        row = db.execute("SELECT value FROM settings WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _refresh(self):
+        # Caller holds the lock; reloads the state if another handle wrote since
+        if self._db is not None and not os.path.exists(os.path.join(self.directory, CATALOG_FILENAME)):
+            # Another handle deleted the collection
+            self._db.close()
+            self._db = None
+        db = self._connection(create=os.path.exists(os.path.join(self.directory, METADATA_FILENAME)))
+        if db is None:
+            if self._generation is not None:
+                self._clear()
+            return
+        if self._setting(db, "generation") is None:
+            self._import_sidecar(db)
+        generation = int(self._setting(db, "generation") or 0)
+        if generation == self._generation:
+            return
+        stored_dtype = self._setting(db, "dtype")
+        if stored_dtype is not None and stored_dtype != self.dtype:
+            raise ValueError(f"Collection {self.collection_name} is stored as {stored_dtype}, not {self.dtype}")
+        rows = db.execute("SELECT id, text, metadata FROM documents ORDER BY row").fetchall()
+        self._ids = [doc_id for doc_id, _, _ in rows]
+        self._texts = [text for _, text, _ in rows]
+        self._metadatas = [json.loads(metadata) for _, _, metadata in rows]
+        self._rows = {doc_id: row for row, doc_id in enumerate(self._ids)}
+        dimension = self._setting(db, "dimension")
+        self._dimension = int(dimension) if dimension is not None else None
+        self._vectors = self._exact = self._scales = None
+        if self._dimension is not None:
+            # Reopened every time: another handle may have replaced the files while growing them
+            self._vectors = np.load(self._path("vectors"), mmap_mode="r+")
+            self._exact = np.load(self._path("exact"), mmap_mode="r+")
+            if self.dtype == "int8":
+                self._scales = np.load(self._path("scales"), mmap_mode="r+")
+        self._generation = generation
+
+    def _import_sidecar(self, db):
+        # Caller holds the lock; moves a JSON sidecar written by earlier versions into the catalog
+        path = os.path.join(self.directory, METADATA_FILENAME)
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                sidecar = json.load(f)
+            db.executemany(
+                "INSERT OR REPLACE INTO documents (row, id, text, metadata) VALUES (?, ?, ?, ?)",
+                [(row, doc_id, text, json.dumps(metadata)) for row, (doc_id, text, metadata)
+                 in enumerate(zip(sidecar["ids"], sidecar["texts"], sidecar["metadatas"]))]
+            )
+            db.execute("INSERT OR REPLACE INTO settings VALUES ('dtype', ?)", (sidecar["dtype"],))
+            if sidecar["dimension"] is not None:
+                db.execute("INSERT OR REPLACE INTO settings VALUES ('dimension', ?)", (str(sidecar["dimension"]),))
+        else:
+            db.execute("INSERT OR REPLACE INTO settings VALUES ('dtype', ?)", (self.dtype,))
+        db.execute("INSERT OR REPLACE INTO settings VALUES ('generation', '1')")
+        db.commit()
+        if os.path.exists(path):
+            os.remove(path)
+
+    def _clear(self):
+        # Caller holds the lock
+        self._vectors = self._exact = self._scales = None
+        self._ids, self._texts, self._metadatas, self._rows = [], [], [], {}
+        self._dimension = None
+        self._generation = None
+
+    @contextmanager
+    def _writing(self):
+        # Caller holds the lock; serializes writers across handles and processes
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, LOCK_FILENAME), "a+") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                db = self._connection(create=True)
+                self._refresh()
+                try:
+                    yield db
+                    for matrix in (self._vectors, self._exact, self._scales):
+                        if matrix is not None:
+                            matrix.flush()
+                    if self._dimension is not None:
+                        db.execute("INSERT OR REPLACE INTO settings VALUES ('dimension', ?)", (str(self._dimension),))
+                    db.execute("UPDATE settings SET value = CAST(value AS INTEGER) + 1 WHERE key = 'generation'")
+                    db.commit()
+                    self._generation = int(self._setting(db, "generation"))
+                except BaseException:
+                    # The in-memory state may be half-updated; reload it on next use
+                    db.rollback()
+                    self._generation = None
+                    raise
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _open_matrix(self, name, dtype, shape, old=None):
+        # Caller holds the lock; copies the stored rows from the old matrix
+        path = self._path(name)
+        tmp_path = path + ".tmp"
+        matrix = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=dtype, shape=shape)
+        if old is not None:
+            matrix[:len(self._ids)] = old[:len(self._ids)]
+        matrix.flush()
+        del matrix
+        os.replace(tmp_path, path)
+        return np.load(path, mmap_mode="r+")
+
+    def _reserve(self, rows):
+        # Caller holds the lock; makes room for rows in total
+        capacity = 0 if self._vectors is None else self._vectors.shape[0]
+        if rows <= capacity:
+            return
+        capacity = max(rows, 2 * capacity, 64)
+        os.makedirs(self.directory, exist_ok=True)
+        storage = np.float16 if self.dtype == "float16" else np.int8
+        self._vectors = self._open_matrix("vectors", storage, (capacity, self._dimension), self._vectors)
+        self._exact = self._open_matrix("exact", np.float32, (capacity, self._dimension), self._exact)
+        if self.dtype == "int8":
+            self._scales = self._open_matrix("scales", np.float32, (capacity,), self._scales)
+
+    def _write_rows(self, rows, vectors):
+        # Caller holds the lock
+        self._exact[rows] = vectors
+        if self.dtype == "int8":
+            # Symmetric per-row quantization: the largest component maps to 127
+            scales = np.abs(vectors).max(axis=1) / 127.0
+            scales[scales == 0] = 1.0
+            self._vectors[rows] = np.round(vectors / scales[:, None]).astype(np.int8)
+            self._scales[rows] = scales
+        else:
+            self._vectors[rows] = vectors.astype(np.float16)
+
+    @staticmethod
+    def _normalize(vectors):
+        vectors = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+    def add_documents(self, documents, ids):
+        """
+        Embed and store documents, replacing those already stored under the same IDs.
+
+        Args:
+            documents (list): Documents to add
+            ids (list): One ID per document
+
+        Returns:
+            list: The IDs
+        """
+        documents = list(documents)
+        if not documents:
+            return []
+        # Embed outside the lock so concurrent batches overlap on the server
+        vectors = self._normalize(self.embedding_function.embed_documents([doc.page_content for doc in documents]))
+        with self._lock, self._writing() as db:
+            if self._dimension is None:
+                self._dimension = vectors.shape[1]
+            elif vectors.shape[1] != self._dimension:
+                raise ValueError(f"Embedding dimension {vectors.shape[1]} does not match the "
+                                 f"collection's {self._dimension}")
+            # Grow the files first, so a failure leaves the collection unchanged
+            new_ids = {doc_id for doc_id in ids if doc_id not in self._rows}
+            self._reserve(len(self._ids) + len(new_ids))
+            rows = []
+            for doc_id, doc in zip(ids, documents):
+                row = self._rows.get(doc_id)
+                metadata = dict(doc.metadata)
+                if row is None:
+                    row = self._rows[doc_id] = len(self._ids)
+                    self._ids.append(doc_id)
+                    self._texts.append(doc.page_content)
+                    self._metadatas.append(metadata)
+                else:
+                    self._texts[row] = doc.page_content
+                    self._metadatas[row] = metadata
+                rows.append(row)
+            db.executemany(
+                "INSERT OR REPLACE INTO documents (row, id, text, metadata) VALUES (?, ?, ?, ?)",
+                [(row, self._ids[row], self._texts[row], json.dumps(self._metadatas[row])) for row in rows]
+            )
+            self._write_rows(np.array(rows), vectors)
+        return list(ids)
+
+    def delete(self, ids=None):
+        """
+        Delete documents by ID; unknown IDs are ignored.
+
+        Args:
+            ids (list): IDs of the documents to delete
+        """
+        with self._lock, self._writing() as db:
+            removed = {self._rows[doc_id] for doc_id in ids or [] if doc_id in self._rows}
+            if not removed:
+                return
+            keep = np.array([row for row in range(len(self._ids)) if row not in removed], dtype=np.int64)
+            # Compact the rows in use; later rows only move towards the start
+            for matrix in (self._vectors, self._exact, self._scales):
+                if matrix is not None:
+                    matrix[:len(keep)] = matrix[keep]
+            db.executemany("DELETE FROM documents WHERE row = ?", [(row,) for row in sorted(removed)])
+            # In ascending order every target row is already free
+            db.executemany("UPDATE documents SET row = ? WHERE row = ?",
+                           [(new_row, int(row)) for new_row, row in enumerate(keep) if new_row != row])
+            self._ids = [self._ids[row] for row in keep]
+            self._texts = [self._texts[row] for row in keep]
+            self._metadatas = [self._metadatas[row] for row in keep]
+            self._rows = {doc_id: row for row, doc_id in enumerate(self._ids)}
+
+    def delete_collection(self):
+        """Delete every document and the collection's files."""
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+            self._clear()
+            shutil.rmtree(self.directory, ignore_errors=True)
+
+    def get(self, ids=None, where=None, include=None):
+        """
+        Look up stored documents by ID and metadata filter, like Chroma's get.
+
+        Args:
+            ids (list, optional): IDs to look up (default: every document)
+            where (dict, optional): Chroma 'where' filter on the metadata
+            include (list, optional): Unused; IDs, texts and metadata are always returned
+
+        Returns:
+            dict: Matching 'ids', 'documents' and 'metadatas', in storage order
+        """
+        with self._lock:
+            self._refresh()
+            rows = range(len(self._ids)) if ids is None else sorted(
+                self._rows[doc_id] for doc_id in set(ids) if doc_id in self._rows
+            )
+            rows = [row for row in rows if matches_filter(self._metadatas[row], where)]
+            return {
+                "ids": [self._ids[row] for row in rows],
+                "documents": [self._texts[row] for row in rows],
+                "metadatas": [dict(self._metadatas[row]) for row in rows],
+            }
+
+    def count(self):
+        """Return the number of stored documents."""
+        with self._lock:
+            self._refresh()
+            return len(self._ids)
+
+    def similarity_search_by_vectors_with_relevance_scores(self, embeddings, k=4, filter=None):
+        """
+        Return the k documents closest to each of several embeddings, with their distances.
+
+        All rows are scored against the quantized matrix in one matrix
+        product for all queries, the best k * rescore_factor per query are
+        re-scored with their float32 vectors and the k best of those are
+        returned.
+
+        Args:
+            embeddings (list): The query embeddings
+            k (int): Number of results per query
+            filter (dict, optional): Chroma 'where' filter on the metadata
+
+        Returns:
+            list: One list of (document, cosine distance) pairs per query, closest first
+        """
+        queries = self._normalize(np.atleast_2d(np.asarray(embeddings, dtype=np.float32)))
+        with self._lock:
+            self._refresh()
+            count = len(self._ids)
+            if count == 0 or k <= 0:
+                return [[] for _ in queries]
+            if queries.shape[1] != self._dimension:
+                raise ValueError(f"Query dimension {queries.shape[1]} does not match the "
+                                 f"collection's {self._dimension}")
+            scores = np.empty((count, len(queries)), dtype=np.float32)
+            for start in range(0, count, SEARCH_BLOCK):
+                end = min(start + SEARCH_BLOCK, count)
+                scores[start:end] = self._vectors[start:end].astype(np.float32) @ queries.T
+            if self._scales is not None:
+                scores *= self._scales[:count, None]
+            if filter:
+                mask = np.fromiter((matches_filter(metadata, filter) for metadata in self._metadatas),
+                                   dtype=bool, count=count)
+                scores[~mask] = -np.inf
+                candidates = int(mask.sum())
+            else:
+                candidates = count
+            if candidates == 0:
+                return [[] for _ in queries]
+
+            # Filtered-out rows score -inf, so they never enter the shortlist
+            shortlist_size = min(k * self.rescore_factor, candidates)
+            results = []
+            for column, query in enumerate(queries):
+                if shortlist_size < count:
+                    shortlist = np.sort(np.argpartition(-scores[:, column], shortlist_size - 1)[:shortlist_size])
+                else:
+                    shortlist = np.arange(count)
+                exact = self._exact[shortlist] @ query
+                query_results = []
+                for i in np.argsort(-exact, kind="stable")[:k]:
+                    row = int(shortlist[i])
+                    doc = Document(page_content=self._texts[row], metadata=dict(self._metadatas[row]),
+                                   id=self._ids[row])
+                    query_results.append((doc, float(1.0 - exact[i])))
+                results.append(query_results)
+            return results
+
+    def similarity_search_by_vector_with_relevance_scores(self, embedding, k=4, filter=None):
+        """
+        Return the k documents closest to an embedding, with their distances.
+
+        Args:
+            embedding (list): The query embedding
+            k (int): Number of results to return
+            filter (dict, optional): Chroma 'where' filter on the metadata
+
+        Returns:
+            list: (document, cosine distance) pairs, closest first
+        """
+        return self.similarity_search_by_vectors_with_relevance_scores([embedding], k, filter)[0]
+
+    def similarity_search_by_vector(self, embedding, k=4, filter=None):
+        """
+        Return the k documents closest to an embedding.
+
+        Args:
+            embedding (list): The query embedding
+            k (int): Number of results to return
+            filter (dict, optional): Chroma 'where' filter on the metadata
+
+        Returns:
+            list: Documents, closest first
+        """
+        return [doc for doc, _ in self.similarity_search_by_vector_with_relevance_scores(embedding, k, filter)]
@@ -0,0 +1,289 @@
+import asyncio
+import os
+import random
+import threading
+import time
+import weakref
+
+import httpx
+import ollama
+
+# Settings of the shared client, from the environment
+OLLAMA_HOST = os.environ.get("OLLAMA_HOST")
+OLLAMA_TIMEOUT = float(os.environ.get("OLLAMA_TIMEOUT", "120"))
+OLLAMA_CONNECT_TIMEOUT = float(os.environ.get("OLLAMA_CONNECT_TIMEOUT", "5"))
+OLLAMA_MAX_CONNECTIONS = int(os.environ.get("OLLAMA_MAX_CONNECTIONS", "16"))
+OLLAMA_MODEL_CONCURRENCY = int(os.environ.get("OLLAMA_MODEL_CONCURRENCY", "4"))
+OLLAMA_MAX_RETRIES = int(os.environ.get("OLLAMA_MAX_RETRIES", "2"))
+OLLAMA_KEEP_ALIVE = os.environ.get("OLLAMA_KEEP_ALIVE", "5m")
+
+# HTTP statuses worth retrying: overloaded or restarting server
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+def is_retryable(error):
+    """
+    Tell whether a failed Ollama call may succeed when retried.
+
+    Args:
+        error (Exception): The raised error
+
+    Returns:
+        bool: True for connection failures, timeouts and overloaded-server responses
+    """
+    if isinstance(error, ollama.ResponseError):
+        return error.status_code in RETRY_STATUSES
+    return isinstance(error, (ConnectionError, httpx.TransportError))
+
+
+class OllamaPool:
+    """
+    Shared Ollama client with connection pooling, per-model concurrency
+    limits, timeouts and retries.
+
+    One pooled HTTP client (and one asyncio client per event loop) keeps
+    connections to the server alive between requests. Each model admits at
+    most max_concurrency requests at a time, so generation and ingestion
+    queue here instead of overloading the server. Failed requests that may
+    succeed later are retried with exponential backoff and jitter; streamed
+    generations are only retried until their first chunk arrives.
+    """
+
+    def __init__(self, host=OLLAMA_HOST, timeout=OLLAMA_TIMEOUT, connect_timeout=OLLAMA_CONNECT_TIMEOUT,
+                 max_connections=OLLAMA_MAX_CONNECTIONS, max_concurrency=OLLAMA_MODEL_CONCURRENCY,
+                 max_retries=OLLAMA_MAX_RETRIES, retry_delay=0.5, keep_alive=OLLAMA_KEEP_ALIVE):
+        """
+        Args:
+            host (str, optional): Ollama server URL (default: OLLAMA_HOST or localhost)
+            timeout (float): Seconds to wait for a response, and for a model slot
+            connect_timeout (float): Seconds to wait for a connection
+            max_connections (int): Size of the HTTP connection pool
+            max_concurrency (int): Requests in flight per model
+            max_retries (int): Retries after the first attempt
+            retry_delay (float): Base delay before the first retry, in seconds
+            keep_alive (str): How long the server keeps a model loaded after a request
+        """
+        self.host = host
+        self.timeout = timeout
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.keep_alive = keep_alive
+        self._client_kwargs = {
+            "timeout": httpx.Timeout(timeout, connect=connect_timeout),
+            "limits": httpx.Limits(max_connections=max_connections,
+                                   max_keepalive_connections=max_connections),
+        }
+        self._client = ollama.Client(host=host, **self._client_kwargs)
+        self._semaphores = {}
+        # Event loop -> (async client, {model: asyncio semaphore})
+        self._loops = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+        self._stats = {"requests": 0, "retries": 0, "failures": 0, "in_flight": {}}
+
+    def _semaphore(self, model):
+        with self._lock:
+            semaphore = self._semaphores.get(model)
+            if semaphore is None:
+                semaphore = threading.BoundedSemaphore(self.max_concurrency)
+                self._semaphores[model] = semaphore
+            return semaphore
+
+    def _async_state(self, model):
+        # asyncio clients and semaphores belong to the loop they are used in
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            state = self._loops.get(loop)
+            if state is None:
+                state = (ollama.AsyncClient(host=self.host, **self._client_kwargs), {})
+                self._loops[loop] = state
+            client, semaphores = state
+            semaphore = semaphores.get(model)
+            if semaphore is None:
+                semaphore = semaphores[model] = asyncio.Semaphore(self.max_concurrency)
+            return client, semaphore
+
+    def _track(self, model, delta):
+        with self._lock:
+            in_flight = self._stats["in_flight"]
+            in_flight[model] = in_flight.get(model, 0) + delta
+            if delta > 0:
+                self._stats["requests"] += 1
+
+    def _backoff(self, attempt, error):
+        # Caller decides whether to retry; returns the delay before the next attempt
+        with self._lock:
+            self._stats["retries"] += 1
+        delay = self.retry_delay * (2 ** attempt) * random.uniform(0.5, 1.5)
+        print(f"Ollama request failed ({error}), retrying in {delay:.2f}s")
+        return delay
+
+    def _failed(self):
+        with self._lock:
+            self._stats["failures"] += 1
+
+    def _acquire(self, model):
+        if not self._semaphore(model).acquire(timeout=self.timeout):
+            raise TimeoutError(f"No free slot for model {model} after {self.timeout}s")
+        self._track(model, 1)
+
+    def _release(self, model):
+        self._track(model, -1)
+        self._semaphore(model).release()
+
+    def _call(self, request):
+        attempt = 0
+        while True:
+            try:
+                return request()
+            except Exception as e:
+                if attempt >= self.max_retries or not is_retryable(e):
+                    self._failed()
+                    raise
+                time.sleep(self._backoff(attempt, e))
+                attempt += 1
+
+    def generate(self, model, prompt, stream=False, **kwargs):
+        """
+        Generate a response, like ollama.generate.
+
+        Args:
+            model (str): Name of the model
+            prompt (str): The prompt
+            stream (bool): Return an iterator of response chunks instead
+            **kwargs: Passed to ollama.Client.generate (options, system, ...)
+
+        Returns:
+            The GenerateResponse, or an iterator of them when streaming
+        """
+        kwargs.setdefault("keep_alive", self.keep_alive)
+        if stream:
+            return self._generate_stream(model, prompt, kwargs)
+        self._acquire(model)
+        try:
+            return self._call(lambda: self._client.generate(model=model, prompt=prompt, **kwargs))
+        finally:
+            self._release(model)
+
+    def _generate_stream(self, model, prompt, kwargs):
+        self._acquire(model)
+        try:
+            def first_chunk():
+                stream = self._client.generate(model=model, prompt=prompt, stream=True, **kwargs)
+                return stream, next(stream, None)
+
+            # The request is only sent when the stream is read; retry until it starts
+            stream, chunk = self._call(first_chunk)
+            while chunk is not None:
+                yield chunk
+                chunk = next(stream, None)
+        finally:
+            self._release(model)
+
+    def embed(self, model, texts):
+        """
+        Embed texts in one request.
+
+        Args:
+            model (str): Name of the embedding model
+            texts (list): Texts to embed
+
+        Returns:
+            list: One vector per text
+        """
+        self._acquire(model)
+        try:
+            response = self._call(lambda: self._client.embed(
+                model=model, input=list(texts), keep_alive=self.keep_alive
+            ))
+        finally:
+            self._release(model)
+        return [list(vector) for vector in response.embeddings]
+
+    async def _acall(self, request):
+        attempt = 0
+        while True:
+            try:
+                return await request()
+            except Exception as e:
+                if attempt >= self.max_retries or not is_retryable(e):
+                    self._failed()
+                    raise
+                await asyncio.sleep(self._backoff(attempt, e))
+                attempt += 1
+
+    async def agenerate(self, model, prompt, **kwargs):
+        """
+        Generate a response without blocking the event loop.
+
+        Args:
+            model (str): Name of the model
+            prompt (str): The prompt
+            **kwargs: Passed to ollama.AsyncClient.generate
+
+        Returns:
+            The GenerateResponse
+        """
+        client, semaphore = self._async_state(model)
+        kwargs.setdefault("keep_alive", self.keep_alive)
+        await asyncio.wait_for(semaphore.acquire(), self.timeout)
+        self._track(model, 1)
+        try:
+            return await self._acall(lambda: client.generate(model=model, prompt=prompt, **kwargs))
+        finally:
+            self._track(model, -1)
+            semaphore.release()
+
+    async def aembed(self, model, texts):
+        """
+        Embed texts without blocking the event loop.
+
+        Args:
+            model (str): Name of the embedding model
+            texts (list): Texts to embed
+
+        Returns:
+            list: One vector per text
+        """
+        client, semaphore = self._async_state(model)
+        await asyncio.wait_for(semaphore.acquire(), self.timeout)
+        self._track(model, 1)
+        try:
+            response = await self._acall(lambda: client.embed(
+                model=model, input=list(texts), keep_alive=self.keep_alive
+            ))
+        finally:
+            self._track(model, -1)
+            semaphore.release()
+        return [list(vector) for vector in response.embeddings]
+
+    def stats(self):
+        """
+        Return request counters.
+
+        Returns:
+            dict: Requests, retries, failures and requests in flight per model
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["in_flight"] = dict(self._stats["in_flight"])
+        stats["max_concurrency"] = self.max_concurrency
+        return stats
+
+
+_shared_pool = None
+_shared_pool_lock = threading.Lock()
+
+
+def get_client():
+    """
+    Return the process-wide Ollama pool, configured from the environment.
+
+    Returns:
+        OllamaPool: The shared pool
+    """
+    global _shared_pool
+    with _shared_pool_lock:
+        if _shared_pool is None:
+            _shared_pool = OllamaPool()
+        return _shared_pool
@@ -1,3 +1,7 @@
+# Bump when the prompt templates change, so cached answers built from the
+# old templates are no longer served
+PROMPT_TEMPLATE_VERSION = 2
+
 def generate_prompt(context, query):
     """
     Generate a prompt for a local LLM using provided context and query.
@@ -0,0 +1,284 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from src.answer_cache import normalize_query
+from src.embeddings import text_hash
+from src.lexical_index import tokenize
+
+# Re-ranker used by get_reranker: 'cross-encoder', 'lexical' or 'none'
+RERANKER = os.environ.get("RERANKER", "cross-encoder")
+RERANKER_MODEL = os.environ.get("RERANKER_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2")
+RERANK_BUDGET = float(os.environ.get("RERANK_BUDGET", "0.5"))
+
+
+class LexicalOverlapScorer:
+    """
+    Scores a chunk by the share of query terms it contains.
+
+    Needs no model; used when the cross-encoder is not available.
+    """
+
+    name = "lexical"
+
+    def score(self, query, texts):
+        """
+        Score texts against a query.
+
+        Args:
+            query (str): The query text
+            texts (list): Texts to score
+
+        Returns:
+            list: One score per text, higher is more relevant
+        """
+        query_terms = set(tokenize(query))
+        if not query_terms:
+            return [0.0] * len(texts)
+        scores = []
+        for text in texts:
+            terms = tokenize(text)
+            matched = query_terms.intersection(terms)
+            # Coverage of the query first, density of matches to break ties
+            density = sum(1 for term in terms if term in query_terms) / (len(terms) or 1)
+            scores.append(len(matched) / len(query_terms) + 0.1 * density)
+        return scores
+
+
+class CrossEncoderScorer:
+    """
+    Scores (query, chunk) pairs with a small cross-encoder on the CPU.
+
+    The model is loaded from transformers on first use.
+    """
+
+    def __init__(self, model_name=RERANKER_MODEL, max_length=512):
+        """
+        Args:
+            model_name (str): Name or path of a sequence classification model
+            max_length (int): Maximum tokens of a (query, chunk) pair
+        """
+        self.name = model_name
+        self.max_length = max_length
+        self._model = None
+        self._tokenizer = None
+        self._lock = threading.Lock()
+
+    def load(self):
+        """Load the tokenizer and model, raising if transformers or torch are missing."""
+        with self._lock:
+            if self._model is None:
+                from transformers import AutoModelForSequenceClassification, AutoTokenizer
+                self._tokenizer = AutoTokenizer.from_pretrained(self.name)
+                model = AutoModelForSequenceClassification.from_pretrained(self.name)
+                model.eval()
+                self._model = model
+        return self._model
+
+    def score(self, query, texts):
+        """
+        Score texts against a query in one forward pass.
+
+        Args:
+            query (str): The query text
+            texts (list): Texts to score
+
+        Returns:
+            list: One score per text, higher is more relevant
+        """
+        import torch
+
+        model = self.load()
+        inputs = self._tokenizer(
+            [query] * len(texts), list(texts), padding=True, truncation=True,
+            max_length=self.max_length, return_tensors="pt"
+        )
+        with torch.no_grad():
+            logits = model(**inputs).logits
+        # Single-logit models output relevance directly; otherwise use the last class
+        return logits[:, -1].tolist()
+
+
+class Reranker:
+    """
+    Re-orders a wide set of retrieved chunks and keeps the best few.
+
+    Pairs are scored in batches and scores are cached per (query, chunk).
+    When scoring every chunk would not finish within the latency budget,
+    only the best-retrieved chunks that fit in it are re-ordered and the
+    rest keep the retrieval order. The time per scored pair is tracked to
+    decide this up front, and scoring also stops once the budget runs out.
+    """
+
+    def __init__(self, scorer, batch_size=16, latency_budget=RERANK_BUDGET, cache_size=4096, clock=time.perf_counter):
+        """
+        Args:
+            scorer: Object with a score(query, texts) method, or None to disable re-ranking
+            batch_size (int): Pairs scored per call to the scorer
+            latency_budget (float): Seconds re-ranking may take, or None for no limit
+            cache_size (int): Number of cached scores
+            clock (callable): Returns the current time in seconds; scoring
+                is measured with it against the latency budget
+        """
+        self.scorer = scorer
+        self.batch_size = batch_size
+        self.latency_budget = latency_budget
+        self.cache_size = cache_size
+        self.clock = clock
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self._seconds_per_pair = None
+        self._stats = {"reranked": 0, "skipped": 0, "scored_pairs": 0, "cache_hits": 0}
+
+    def _cached(self, key):
+        with self._lock:
+            score = self._cache.get(key)
+            if score is not None:
+                self._cache.move_to_end(key)
+            return score
+
+    def _remember(self, key, score):
+        # Caller holds the lock
+        self._cache[key] = score
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def rerank(self, query, docs, top_n=4, report=None):
+        """
+        Return the top_n most relevant documents.
+
+        Args:
+            query (str): The query text
+            docs (list): Retrieved documents, most relevant first
+            top_n (int): Number of documents to keep
+            report (dict, optional): Filled in with 'reranked', 'seconds',
+                'scored', 'cache_hits' and 'candidates', the number of
+                leading documents that were re-ordered
+
+        Returns:
+            list: The kept documents, most relevant first
+        """
+        if report is None:
+            report = {}
+        start = self.clock()
+        report.update({"reranked": False, "scored": 0, "cache_hits": 0})
+
+        def finish(result, reranked):
+            report["reranked"] = reranked
+            report["seconds"] = self.clock() - start
+            with self._lock:
+                self._stats["reranked" if reranked else "skipped"] += 1
+            return result
+
+        if self.scorer is None or len(docs) <= 1:
+            return finish(docs[:top_n], False)
+
+        normalized = normalize_query(query)
+        keys = [(self.scorer.name, normalized, text_hash(doc.page_content)) for doc in docs]
+        scores = [self._cached(key) for key in keys]
+        missing = [i for i, score in enumerate(scores) if score is None]
+        report["cache_hits"] = len(docs) - len(missing)
+
+        # Only the first `limit` documents are re-ordered; the rest keep their place
+        budget = self.latency_budget
+        limit = len(docs)
+        if budget is not None and self._seconds_per_pair is not None and len(missing) * self._seconds_per_pair > budget:
+            # Score as many of the best-retrieved candidates as the budget allows,
+            # at least one batch, so the cost estimate keeps following the scorer
+            affordable = max(int(budget / self._seconds_per_pair), self.batch_size)
+            if affordable < len(missing):
+                limit = missing[affordable]
+                missing = missing[:affordable]
+
+        for batch_start in range(0, len(missing), self.batch_size):
+            batch = missing[batch_start:batch_start + self.batch_size]
+            if budget is not None and self.clock() - start > budget:
+                limit = min(limit, batch[0])
+                break
+            batch_started = self.clock()
+            batch_scores = self.scorer.score(query, [docs[i].page_content for i in batch])
+            per_pair = (self.clock() - batch_started) / len(batch)
+            with self._lock:
+                # Moving average, so the estimate follows load changes
+                self._seconds_per_pair = per_pair if self._seconds_per_pair is None else (
+                    0.8 * self._seconds_per_pair + 0.2 * per_pair
+                )
+                for i, score in zip(batch, batch_scores):
+                    scores[i] = score
+                    self._remember(keys[i], score)
+                self._stats["scored_pairs"] += len(batch)
+            report["scored"] += len(batch)
+
+        with self._lock:
+            self._stats["cache_hits"] += report["cache_hits"]
+        report["candidates"] = limit
+        if limit <= 1:
+            return finish(docs[:top_n], False)
+        # Stable sort keeps the retrieval order between equal scores
+        order = sorted(range(limit), key=lambda i: -scores[i]) + list(range(limit, len(docs)))
+        return finish([docs[i] for i in order[:top_n]], True)
+
+    def stats(self):
+        """
+        Return the re-ranking counters.
+
+        Returns:
+            dict: Re-ranked and skipped queries, scored pairs, cache hits,
+            cached scores and the estimated seconds per scored pair
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["cache_entries"] = len(self._cache)
+            stats["seconds_per_pair"] = self._seconds_per_pair
+        stats["scorer"] = self.scorer.name if self.scorer is not None else None
+        return stats
+
+
+def get_reranker(kind=RERANKER, model_name=RERANKER_MODEL, latency_budget=RERANK_BUDGET):
+    """
+    Create the configured re-ranker.
+
+    The cross-encoder falls back to lexical overlap when transformers, torch
+    or the model cannot be loaded.
+
+    Args:
+        kind (str): 'cross-encoder', 'lexical' or 'none'
+        model_name (str): Cross-encoder model
+        latency_budget (float): Seconds re-ranking may take per query
+
+    Returns:
+        Reranker: The re-ranker
+    """
+    if kind == "none":
+        return Reranker(None, latency_budget=latency_budget)
+    if kind == "cross-encoder":
+        scorer = CrossEncoderScorer(model_name)
+        try:
+            scorer.load()
+            return Reranker(scorer, latency_budget=latency_budget)
+        except Exception as e:
+            print(f"WARNING: Cross-encoder {model_name} unavailable, re-ranking by lexical overlap: {e}")
+    return Reranker(LexicalOverlapScorer(), latency_budget=latency_budget)
+
+
+_shared_reranker = None
+_shared_reranker_lock = threading.Lock()
+
+
+def get_shared_reranker():
+    """
+    Return the process-wide re-ranker, created on first use.
+
+    Creating it may load torch and download the cross-encoder, so this is
+    deferred until the first question instead of happening at import.
+
+    Returns:
+        Reranker: The shared re-ranker
+    """
+    global _shared_reranker
+    with _shared_reranker_lock:
+        if _shared_reranker is None:
+            _shared_reranker = get_reranker()
+        return _shared_reranker
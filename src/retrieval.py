@@ -0,0 +1,105 @@
+import os
+
+# Rank constant of reciprocal-rank fusion; 60 is the value from the original paper
+RRF_K = 60
+
+# Results fetched from each retriever before fusion
+FUSION_CANDIDATES = int(os.environ.get("FUSION_CANDIDATES", "20"))
+
+
+def _chunk_key(doc):
+    # The same chunk returned by different retrievers has the same source and text
+    return (doc.metadata.get("source"), doc.page_content)
+
+
+def reciprocal_rank_fusion(result_lists, k=5, rrf_k=RRF_K):
+    """
+    Merge ranked result lists with reciprocal-rank fusion.
+
+    Each chunk scores the sum of 1 / (rrf_k + rank) over the lists it appears
+    in, so chunks ranked well by several retrievers come first without having
+    to compare their raw scores. Ties keep the order of the first list.
+
+    Args:
+        result_lists (list): Lists of documents, each most relevant first
+        k (int): Number of results to return
+        rrf_k (int): Rank constant damping the weight of the top ranks
+
+    Returns:
+        list: The k best documents
+    """
+    scores = {}
+    docs = {}
+    for results in result_lists:
+        for rank, doc in enumerate(results, start=1):
+            key = _chunk_key(doc)
+            scores[key] = scores.get(key, 0.0) + 1.0 / (rrf_k + rank)
+            docs.setdefault(key, doc)
+    ranked = sorted(scores, key=lambda key: scores[key], reverse=True)
+    return [docs[key] for key in ranked[:k]]
+
+
+def hybrid_search(vector_search, lexical_index, query, document_ids, k=5, candidates=FUSION_CANDIDATES,
+                  **filters):
+    """
+    Search documents by embedding similarity and BM25, and fuse the rankings.
+
+    Args:
+        vector_search (callable): Called as vector_search(k, **filters); returns
+            documents, most similar first
+        lexical_index (LexicalIndex): Index of the searched documents, or None
+            for vector search only
+        query (str): The query text
+        document_ids (list): Documents to search in the lexical index
+        k (int): Number of results to return
+        candidates (int): Results fetched from each retriever before fusion
+        **filters: Metadata filters (source, page_range, section, strategy)
+
+    Returns:
+        list: The k best documents
+    """
+    candidates = max(candidates, k)
+    vector_results = vector_search(candidates, **filters)
+    return _fuse(vector_results, lexical_index, query, document_ids, k, candidates, filters)
+
+
+def hybrid_search_batch(vector_search, lexical_index, queries, document_ids, k=5, candidates=FUSION_CANDIDATES,
+                        **filters):
+    """
+    Run hybrid_search for several queries, with one batched vector search.
+
+    Args:
+        vector_search (callable): Called as vector_search(k, **filters); returns
+            one list of documents per query, most similar first
+        lexical_index (LexicalIndex): Index of the searched documents, or None
+            for vector search only
+        queries (list): The query texts
+        document_ids (list): Documents to search in the lexical index
+        k (int): Number of results per query
+        candidates (int): Results fetched from each retriever before fusion
+        **filters: Metadata filters (source, page_range, section, strategy)
+
+    Returns:
+        list: The k best documents of each query
+    """
+    candidates = max(candidates, k)
+    vector_results = vector_search(candidates, **filters)
+    return [
+        _fuse(query_results, lexical_index, query, document_ids, k, candidates, filters)
+        for query, query_results in zip(queries, vector_results)
+    ]
+
+
+def _fuse(vector_results, lexical_index, query, document_ids, k, candidates, filters):
+    if lexical_index is None or not query:
+        return vector_results[:k]
+
+    # The lexical index searches documents by ID; a raw 'where' filter is
+    # applied to chunk metadata and, as in vector_store, replaces the others
+    lexical_filters = dict(filters)
+    source = lexical_filters.pop("source", None)
+    if source is not None and lexical_filters.get("where") is None:
+        sources = {source} if isinstance(source, str) else set(source)
+        document_ids = [document_id for document_id in document_ids if document_id in sources]
+    lexical_results = [doc for doc, _ in lexical_index.search(query, document_ids, k=candidates, **lexical_filters)]
+    return reciprocal_rank_fusion([vector_results, lexical_results], k=k)
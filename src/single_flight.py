@@ -0,0 +1,157 @@
+import threading
+
+
+class _Call:
+    """One in-flight call: its result, or the error it raised."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class _Broadcast:
+    """Items of one in-flight stream, replayed to every subscriber."""
+
+    def __init__(self):
+        self.items = []
+        self.finished = False
+        self.error = None
+        self.condition = threading.Condition()
+
+    def publish(self, item):
+        with self.condition:
+            self.items.append(item)
+            self.condition.notify_all()
+
+    def finish(self, error=None):
+        with self.condition:
+            self.finished = True
+            self.error = error
+            self.condition.notify_all()
+
+    def subscribe(self):
+        position = 0
+        while True:
+            with self.condition:
+                while position >= len(self.items) and not self.finished:
+                    self.condition.wait()
+                if position < len(self.items):
+                    item = self.items[position]
+                    position += 1
+                elif self.error is not None:
+                    raise self.error
+                else:
+                    return
+            yield item
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent identical calls into one.
+
+    The first caller of a key runs the work; callers arriving with the same
+    key while it is in flight wait for it and receive the same result (or
+    error) instead of starting their own. Once the call finishes the key is
+    free again, so later callers run the work anew (or hit a cache it filled).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._streams = {}
+        self._stats = {"calls": 0, "coalesced": 0, "streams": 0, "stream_subscribers": 0}
+
+    def run(self, key, function):
+        """
+        Run function once for all concurrent callers of a key.
+
+        Args:
+            key: Hashable identity of the work
+            function (callable): Called without arguments by the first caller
+
+        Returns:
+            tuple: (result, shared), shared being True when the result came
+            from another caller's call
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self._stats["calls"] += 1
+            else:
+                self._stats["coalesced"] += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = function()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, False
+
+    def stream(self, key, producer):
+        """
+        Subscribe to the stream of a key, starting it if none is in flight.
+
+        The stream is read to the end by a background thread, so it completes
+        (and can fill caches) even when subscribers disconnect. Every
+        subscriber receives all items from the first one, whenever it joined.
+
+        Args:
+            key: Hashable identity of the stream
+            producer (callable): Called without arguments by the first
+                subscriber; returns an iterator of items
+
+        Returns:
+            tuple: (iterator over the items, shared), shared being True when
+            the stream was started by another subscriber
+        """
+        with self._lock:
+            broadcast = self._streams.get(key)
+            shared = broadcast is not None
+            if shared:
+                self._stats["stream_subscribers"] += 1
+            else:
+                broadcast = self._streams[key] = _Broadcast()
+                self._stats["streams"] += 1
+
+        if not shared:
+            def pump():
+                error = None
+                try:
+                    for item in producer():
+                        broadcast.publish(item)
+                except BaseException as e:
+                    error = e
+                finally:
+                    with self._lock:
+                        del self._streams[key]
+                    broadcast.finish(error)
+
+            threading.Thread(target=pump, name="single-flight-stream", daemon=True).start()
+
+        return broadcast.subscribe(), shared
+
+    def stats(self):
+        """
+        Return coalescing counters.
+
+        Returns:
+            dict: Calls run, callers coalesced into them, streams started,
+            extra stream subscribers and keys currently in flight
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["in_flight"] = len(self._calls) + len(self._streams)
+        return stats
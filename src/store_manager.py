@@ -0,0 +1,179 @@
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+
+from src import vector_store
+
+
+class VectorStoreManager:
+    """
+    Opens one vector store collection per document (and optional tenant).
+
+    Collections are created lazily on first use and kept in an LRU of open
+    handles, so queries against one document only touch that document's
+    index and the number of open collections stays bounded.
+    """
+
+    def __init__(self, embedding_function, persist_directory, prefix="doc", max_open=16,
+                 backend=vector_store.VECTOR_BACKEND, dtype=vector_store.VECTOR_DTYPE):
+        """
+        Args:
+            embedding_function: Embeddings used by every collection
+            persist_directory (str): Directory shared by all collections
+            prefix (str): Prefix of the collection names
+            max_open (int): Maximum number of collection handles kept open
+            backend (str): Vector store backend, 'chroma' or 'numpy'
+            dtype (str): Storage type of the numpy backend
+        """
+        self.embedding_function = embedding_function
+        self.persist_directory = persist_directory
+        self.prefix = prefix
+        self.max_open = max_open
+        self.backend = backend
+        self.dtype = dtype
+        self._handles = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def namespace(self):
+        """Identifier of this set of collections, used in ingestion manifest keys."""
+        return vector_store.collection_key(f"{self.prefix}:*", self.backend, self.dtype)
+
+    def collection_name(self, document_id, tenant=None):
+        """
+        Return the collection name of a document.
+
+        Args:
+            document_id (str): Stable identifier of the document (its source name)
+            tenant (str, optional): Tenant the document belongs to
+
+        Returns:
+            str: A valid collection name, readable and unique per document
+        """
+        key = f"{tenant or ''}/{document_id}"
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()[:12]
+        slug = re.sub(r"[^a-zA-Z0-9]+", "-", document_id).strip("-")[:40]
+        return f"{self.prefix}_{slug}_{digest}" if slug else f"{self.prefix}_{digest}"
+
+    def get(self, document_id, tenant=None):
+        """
+        Return the vector store of a document, opening it if needed.
+
+        Args:
+            document_id (str): Stable identifier of the document
+            tenant (str, optional): Tenant the document belongs to
+
+        Returns:
+            The vector store object of the document
+        """
+        name = self.collection_name(document_id, tenant)
+        with self._lock:
+            handle = self._handles.get(name)
+            if handle is not None:
+                self._handles.move_to_end(name)
+                return handle
+            handle = vector_store.create_vector_store(
+                self.embedding_function,
+                collection_name=name,
+                persist_directory=self.persist_directory,
+                backend=self.backend,
+                dtype=self.dtype
+            )
+            self._handles[name] = handle
+            while len(self._handles) > self.max_open:
+                self._handles.popitem(last=False)
+            return handle
+
+    def search(self, embedding, document_ids, k=5, tenant=None, **filters):
+        """
+        Search several documents and merge their results by distance.
+
+        Every listed collection is opened and searched in turn, so the cost
+        grows with the number of documents; with more documents than
+        max_open, each call also evicts and reopens handles. Callers should
+        narrow document_ids first, for example with
+        LexicalIndex.rank_documents.
+
+        Args:
+            embedding: The query embedding
+            document_ids (list): Documents to search
+            k (int): Number of results to return
+            tenant (str, optional): Tenant the documents belong to
+            **filters: Metadata filters passed to similarity_search_with_scores
+
+        Returns:
+            list: The k closest documents over all searched collections
+        """
+        scored = []
+        for document_id in document_ids:
+            store = self.get(document_id, tenant)
+            scored.extend(vector_store.similarity_search_with_scores(store, embedding, k=k, **filters))
+        scored.sort(key=lambda pair: pair[1])
+        return [doc for doc, _ in scored[:k]]
+
+    def search_batch(self, embeddings, document_ids, k=5, tenant=None, **filters):
+        """
+        Search several documents for several queries, one request per document.
+
+        Has the same per-document cost as search.
+
+        Args:
+            embeddings (list): The query embeddings
+            document_ids (list): Documents to search
+            k (int): Number of results per query
+            tenant (str, optional): Tenant the documents belong to
+            **filters: Metadata filters passed to similarity_search_batch_with_scores
+
+        Returns:
+            list: One list of the k closest documents per query
+        """
+        embeddings = list(embeddings)
+        scored = [[] for _ in embeddings]
+        for document_id in document_ids:
+            store = self.get(document_id, tenant)
+            batch = vector_store.similarity_search_batch_with_scores(store, embeddings, k=k, **filters)
+            for query_scored, results in zip(scored, batch):
+                query_scored.extend(results)
+        for query_scored in scored:
+            query_scored.sort(key=lambda pair: pair[1])
+        return [[doc for doc, _ in query_scored[:k]] for query_scored in scored]
+
+    def delete(self, document_id, tenant=None):
+        """
+        Delete a document's collection without touching other documents.
+
+        Args:
+            document_id (str): Stable identifier of the document
+            tenant (str, optional): Tenant the document belongs to
+        """
+        store = self.get(document_id, tenant)
+        store.delete_collection()
+        with self._lock:
+            self._handles.pop(self.collection_name(document_id, tenant), None)
+
+    def rebuild(self, document_id, documents, tenant=None, **kwargs):
+        """
+        Replace all vectors of a document.
+
+        Args:
+            document_id (str): Stable identifier of the document
+            documents (iterable): The document's new chunks
+            tenant (str, optional): Tenant the document belongs to
+            **kwargs: Passed to add_documents_to_store
+
+        Returns:
+            list: IDs of the added chunks
+        """
+        self.delete(document_id, tenant)
+        return vector_store.add_documents_to_store(self.get(document_id, tenant), documents, **kwargs)
+
+    def open_collections(self):
+        """
+        Return the names of the currently open collections, least recently used first.
+
+        Returns:
+            list: Collection names
+        """
+        with self._lock:
+            return list(self._handles)
@@ -1,7 +1,155 @@
+from langchain_core.documents import Document
 from langchain_text_splitters import RecursiveCharacterTextSplitter, MarkdownHeaderTextSplitter
 import re
 
-def split_documents(docs, chunk_size=1000, chunk_overlap=200, splitting_strategy="recursive"):
+# Section headers for the "section" strategy, matched against one line at a time:
+# - numbered headers (e.g., "1. Introduction", "1.2 Background")
+# - Roman numeral headers (e.g., "I. Introduction", "IV.2 Methods")
+# - alphabetic headers (e.g., "A. Methods", "B.2 Results")
+# - Markdown-style headers (e.g., "## Results")
+# Alternatives are tried in this order, as the former per-pattern loop did.
+SECTION_HEADER_PATTERN = re.compile(
+    r'^(?:(?P<numbered>\d+\.(?:\d+\.?)*|[IVXivx]+\.(?:\d+\.?)*|[A-Za-z]\.(?:\d+\.?)*)\s+[^\n]+'
+    r'|(?P<markdown>#{1,6})\s+[^\n]+)$'
+)
+
+def _section_documents(title, content_lines, level, metadata, text_splitter, chunk_size, length_function=len):
+    """Turn one detected section into chunks, keeping its title at the start of each chunk."""
+    section_metadata = metadata.copy()
+    section_metadata["section_title"] = title.strip()
+    section_metadata["section_level"] = level
+    
+    content = "\n".join(content_lines)
+    section_text = title + "\n" + content
+    
+    # If section fits within chunk_size, keep it as is
+    if length_function(section_text) <= chunk_size:
+        return [Document(page_content=section_text, metadata=section_metadata)]
+    
+    # Split content into chunks with overlap; the title is added to the first
+    # chunk and repeated with a "continued" marker on the following ones
+    chunks = []
+    for i, chunk_content in enumerate(text_splitter.split_text(content)):
+        prefix = title + "\n\n" if i == 0 else title + " (continued)\n\n"
+        chunks.append(Document(page_content=prefix + chunk_content, metadata=section_metadata.copy()))
+    return chunks
+
+def _iter_section_chunks(doc, text_splitter, chunk_size, length_function=len):
+    """
+    Detect the sections of a document in a single pass over its lines and chunk them.
+    
+    Args:
+        doc: Document to split
+        text_splitter: Splitter used for sections longer than chunk_size
+        chunk_size (int): Maximum size of a section kept as one chunk
+        length_function (callable): Measures the size of a section
+        
+    Yields:
+        Document: Section chunks, in document order
+    """
+    title = ""
+    level = 0
+    content_lines = []
+    match_header = SECTION_HEADER_PATTERN.match
+    
+    for line in doc.page_content.split('\n'):
+        match = match_header(line)
+        if match is None:
+            content_lines.append(line)
+            continue
+        
+        # Save previous section if it has content
+        if content_lines:
+            yield from _section_documents(title, content_lines, level, doc.metadata, text_splitter, chunk_size,
+                                          length_function)
+        
+        # Start new section; numbered headers get one level per dot
+        markdown = match.group("markdown")
+        level = len(markdown) if markdown else match.group("numbered").count('.') + 1
+        title = line
+        content_lines = []
+    
+    # Add the last section
+    if content_lines:
+        yield from _section_documents(title, content_lines, level, doc.metadata, text_splitter, chunk_size,
+                                          length_function)
+
+# Headers the "semantic" and "hybrid" strategies split on
+SEMANTIC_HEADERS = [
+    ("#", "Header 1"),
+    ("##", "Header 2"),
+    ("###", "Header 3"),
+    ("####", "Header 4"),
+    ("Abstract", "Abstract"),
+    ("Introduction", "Introduction"),
+    ("Conclusion", "Conclusion"),
+    ("References", "References")
+]
+
+# Section titles on their own line, converted to markdown headers before splitting
+SEMANTIC_TITLE_PATTERN = re.compile(
+    r'^(Abstract|Introduction|Methodology|Results|Discussion|Conclusion|References)(\s*\n)',
+    flags=re.MULTILINE
+)
+
+def _iter_semantic_chunks(docs, chunk_size, chunk_overlap, length_function=len):
+    """
+    Split documents on headers and pack each section into size-bounded chunks.
+    
+    Each document goes through header detection and size splitting before the
+    next one is read, so chunks can be consumed as they are produced.
+    
+    Args:
+        docs (iterable): Documents to split
+        chunk_size (int): Chunks are bounded to half this size
+        chunk_overlap (int): Overlap between consecutive chunks of a section
+        length_function (callable): Measures chunk sizes
+        
+    Yields:
+        Document: Chunks with 'section_<header>' and 'start_index' metadata
+    """
+    markdown_splitter = MarkdownHeaderTextSplitter(headers_to_split_on=SEMANTIC_HEADERS)
+    text_splitter = RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size // 2,  # Smaller chunks since we've already split semantically
+        chunk_overlap=chunk_overlap,
+        length_function=length_function,
+        add_start_index=True
+    )
+    
+    for doc in docs:
+        # Convert section titles to markdown headers for splitting
+        text = SEMANTIC_TITLE_PATTERN.sub(r'# \1\2', doc.page_content)
+        
+        for split in markdown_splitter.split_text(text):
+            split_metadata = doc.metadata.copy()
+            # Add section info to metadata
+            for header_key in split.metadata:
+                split_metadata[f"section_{header_key}"] = split.metadata[header_key]
+            yield from text_splitter.create_documents([split.page_content], [split_metadata])
+
+def _overlap_tail(text, chunk_overlap, length_function=len):
+    """
+    Return the end of a chunk that fits in chunk_overlap, measured with length_function.
+    
+    Character lengths cut the text exactly, as before; other units drop
+    whole words from the front until the rest fits.
+    """
+    if length_function(text) <= chunk_overlap:
+        return text
+    if length_function is len:
+        return text[-chunk_overlap:]
+    starts = [match.start() for match in re.finditer(r"\S+", text)]
+    # Binary search for the longest word-aligned tail that fits
+    low, high = 0, len(starts)
+    while low < high:
+        middle = (low + high) // 2
+        if length_function(text[starts[middle]:]) <= chunk_overlap:
+            high = middle
+        else:
+            low = middle + 1
+    return text[starts[low]:] if low < len(starts) else ""
+
+def split_documents(docs, chunk_size=1000, chunk_overlap=200, splitting_strategy="recursive", length_function=len):
     """
     Split documents into chunks for processing with enhanced options.
     
@@ -10,6 +158,8 @@ def split_documents(docs, chunk_size=1000, chunk_overlap=200, splitting_strategy
         chunk_size (int): Size of each chunk
         chunk_overlap (int): Overlap between chunks
         splitting_strategy (str): Strategy to use for splitting ('recursive', 'semantic', 'hybrid', 'paragraph', 'section')
+        length_function (callable): Measures chunk_size and chunk_overlap, e.g. a
+            token counter from tokenization.get_length_function (default: characters)
         
     Returns:
         list: List of split document chunks
@@ -24,141 +174,26 @@ def split_documents(docs, chunk_size=1000, chunk_overlap=200, splitting_strategy
             
     if splitting_strategy == "section":
         # Section-based splitting that preserves document structure with sections and subsections
-        from langchain_core.documents import Document
-        
-        # Define section patterns
-        section_patterns = [
-            # Headers with numbers (e.g., "1. Introduction", "1.2 Background")
-            r'^(\d+\.(?:\d+\.?)*)\s+([^\n]+)$',
-            # Headers with Roman numerals (e.g., "I. Introduction", "IV.2 Methods")
-            r'^([IVXivx]+\.(?:\d+\.?)*)\s+([^\n]+)$',
-            # Headers with alphabetic identifiers (e.g., "A. Methods", "B.2 Results")
-            r'^([A-Za-z]\.(?:\d+\.?)*)\s+([^\n]+)$',
-            # Headers without numbers (e.g., "Introduction", "Materials and Methods")
-            r'^(Abstract|Introduction|Methods|Materials and Methods|Results|Discussion|Conclusion|References|Acknowledgments|Appendix)(\s*\n)',
-            # Markdown-style headers
-            r'^(#{1,6})\s+([^\n]+)$'
-        ]
+        text_splitter = RecursiveCharacterTextSplitter(
+            chunk_size=chunk_size,
+            chunk_overlap=chunk_overlap,
+            length_function=length_function,
+            add_start_index=True,
+            separators=["\n\n", "\n", ". ", " ", ""]
+        )
         
         split_docs = []
-        
         for doc in docs:
-            text = doc.page_content
-            lines = text.split('\n')
-            sections = []
-            current_section = {"title": "", "content": [], "level": 0}
-            
-            # Process line by line to identify sections and their content
-            for line in lines:
-                is_section_header = False
-                section_level = 0
-                
-                # Check if line matches any section pattern
-                for pattern in section_patterns:
-                    match = re.match(pattern, line, re.MULTILINE)
-                    if match:
-                        is_section_header = True
-                        # Determine section level based on pattern
-                        if '#' in pattern:
-                            # Markdown headers
-                            section_level = len(match.group(1))
-                        elif r'\d+\.' in pattern:
-                            # Numbered headers - count dots to determine level
-                            section_level = match.group(1).count('.') + 1
-                        else:
-                            # Main section headers
-                            section_level = 1
-                        break
-                
-                if is_section_header:
-                    # Save previous section if it has content
-                    if current_section["content"]:
-                        sections.append(current_section)
-                    
-                    # Start new section
-                    current_section = {
-                        "title": line,
-                        "content": [],
-                        "level": section_level
-                    }
-                else:
-                    # Add line to current section
-                    current_section["content"].append(line)
-            
-            # Add the last section
-            if current_section["content"]:
-                sections.append(current_section)
-            
-            # First pass: Organize sections into their hierarchical structure
-            # This is critical for maintaining document context
-            organized_sections = []
-            for section in sections:
-                section_text = section["title"] + "\n" + "\n".join(section["content"])
-                section_metadata = doc.metadata.copy()
-                section_metadata["section_title"] = section["title"].strip()
-                section_metadata["section_level"] = section["level"]
-                
-                organized_sections.append({
-                    "text": section_text,
-                    "metadata": section_metadata,
-                    "level": section["level"]
-                })
-            
-            # Second pass: Apply chunking with proper overlap
-            text_splitter = RecursiveCharacterTextSplitter(
-                chunk_size=chunk_size,
-                chunk_overlap=chunk_overlap,
-                length_function=len,
-                add_start_index=True,
-                separators=["\n\n", "\n", ". ", " ", ""]
-            )
-            
-            # Process each section
-            for section in organized_sections:
-                # Always ensure the title is preserved at the start of chunks
-                title = section["text"].split("\n")[0]
-                content = "\n".join(section["text"].split("\n")[1:])
-                
-                # If section fits within chunk_size, keep it as is
-                if len(section["text"]) <= chunk_size:
-                    split_docs.append(Document(
-                        page_content=section["text"],
-                        metadata=section["metadata"]
-                    ))
-                else:
-                    # Split content into chunks with overlap
-                    content_chunks = []
-                    
-                    # First create dummy document with content for splitting
-                    dummy_doc = Document(page_content=content, metadata={})
-                    content_splits = text_splitter.split_documents([dummy_doc])
-                    
-                    # Now add the title to the first chunk and process all chunks
-                    for i, chunk in enumerate(content_splits):
-                        chunk_content = chunk.page_content
-                        
-                        # Add title to the first chunk
-                        if i == 0:
-                            chunk_content = title + "\n\n" + chunk_content
-                        # For subsequent chunks, add title with "continued" marker
-                        else:
-                            # Include overlap from previous chunk
-                            chunk_content = title + " (continued)\n\n" + chunk_content
-                        
-                        # Add to final documents
-                        split_docs.append(Document(
-                            page_content=chunk_content,
-                            metadata=section["metadata"]
-                        ))
-            
-            return split_docs
+            split_docs.extend(_iter_section_chunks(doc, text_splitter, chunk_size, length_function))
+        
+        return split_docs
     
     elif splitting_strategy == "recursive":
         # Standard recursive splitting - good for most documents
         text_splitter = RecursiveCharacterTextSplitter(
             chunk_size=chunk_size, 
             chunk_overlap=chunk_overlap,
-            length_function=len,
+            length_function=length_function,
             add_start_index=True,
             separators=["\n\n", "\n", ". ", " ", ""]
         )
@@ -184,7 +219,7 @@ def split_documents(docs, chunk_size=1000, chunk_overlap=200, splitting_strategy
             text_splitter = RecursiveCharacterTextSplitter(
                 chunk_size=chunk_size,
                 chunk_overlap=chunk_overlap,
-                length_function=len,
+                length_function=length_function,
                 add_start_index=True,
                 separators=["\n", ". ", " ", ""]
             )
@@ -195,7 +230,7 @@ def split_documents(docs, chunk_size=1000, chunk_overlap=200, splitting_strategy
             
             for para in processed_paragraphs:
                 # If adding this paragraph would exceed chunk_size, finalize current chunk
-                if current_chunk and len(current_chunk) + len(para) + 2 > chunk_size:
+                if current_chunk and length_function(current_chunk) + length_function(para) + 2 > chunk_size:
                     split_docs.append(Document(
                         page_content=current_chunk,
                         metadata=current_metadata
@@ -204,8 +239,8 @@ def split_documents(docs, chunk_size=1000, chunk_overlap=200, splitting_strategy
                     # Start new chunk with overlap from previous content
                     if chunk_overlap > 0:
                         # Get the last portion of the previous chunk for overlap
-                        overlap_text = current_chunk[-chunk_overlap:] if len(current_chunk) > chunk_overlap else current_chunk
-                        current_chunk = overlap_text + "\n\n" + para
+                        overlap_text = _overlap_tail(current_chunk, chunk_overlap, length_function)
+                        current_chunk = overlap_text + "\n\n" + para if overlap_text else para
                     else:
                         current_chunk = para
                 else:
@@ -225,7 +260,7 @@ def split_documents(docs, chunk_size=1000, chunk_overlap=200, splitting_strategy
             # Second pass: split any chunks that are still too large
             final_chunks = []
             for doc in split_docs:
-                if len(doc.page_content) <= chunk_size:
+                if length_function(doc.page_content) <= chunk_size:
                     final_chunks.append(doc)
                 else:
                     # Force split chunks that are too large
@@ -236,111 +271,114 @@ def split_documents(docs, chunk_size=1000, chunk_overlap=200, splitting_strategy
     elif splitting_strategy == "semantic":
         # Try to split on semantic boundaries like headers
         # This is better for structured documents like academic papers
-        headers_to_split_on = [
-            ("#", "Header 1"),
-            ("##", "Header 2"),
-            ("###", "Header 3"),
-            ("####", "Header 4"),
-            ("Abstract", "Abstract"),
-            ("Introduction", "Introduction"),
-            ("Conclusion", "Conclusion"),
-            ("References", "References")
-        ]
-        
-        markdown_splitter = MarkdownHeaderTextSplitter(headers_to_split_on=headers_to_split_on)
-        split_docs = []
-        
-        for doc in docs:
-            # Convert section titles to markdown headers for splitting
-            text = doc.page_content
-            text = re.sub(r'^(Abstract|Introduction|Methodology|Results|Discussion|Conclusion|References)(\s*\n)', r'# \1\2', text, flags=re.MULTILINE)
-            
-            # Get markdown splits
-            md_splits = markdown_splitter.split_text(text)
-            
-            # Create documents from splits with metadata
-            for split in md_splits:
-                split_metadata = doc.metadata.copy()
-                # Add section info to metadata
-                for header_key in split.metadata:
-                    split_metadata[f"section_{header_key}"] = split.metadata[header_key]
-                
-                # Create new document
-                from langchain_core.documents import Document
-                new_doc = Document(page_content=split.page_content, metadata=split_metadata)
-                split_docs.append(new_doc)
-        
-        # Apply regular splitting as well but with smaller chunks since we already did semantic splitting
-        text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=chunk_size // 2,  # Smaller chunks since we've already split semantically
-            chunk_overlap=chunk_overlap,
-            add_start_index=True
-        )
-        return text_splitter.split_documents(split_docs)
+        return list(_iter_semantic_chunks(docs, chunk_size, chunk_overlap, length_function))
         
     elif splitting_strategy == "hybrid":
-        # First split by semantic boundaries, then by size
-        # Start with semantic splitting
-        semantic_docs = split_documents(docs, chunk_size, chunk_overlap, "semantic")
-        
-        # Then apply size-based splitting
-        text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=chunk_size,
-            chunk_overlap=chunk_overlap,
-            add_start_index=True
-        )
-        return text_splitter.split_documents(semantic_docs)
+        # First split by semantic boundaries, then by size. The semantic pass
+        # already bounds chunks to chunk_size // 2, so a further size-based pass
+        # at chunk_size would return every chunk unchanged and is not run
+        return list(_iter_semantic_chunks(docs, chunk_size, chunk_overlap, length_function))
         
     else:
         # Default to recursive splitting if an unknown strategy is specified
         text_splitter = RecursiveCharacterTextSplitter(
             chunk_size=chunk_size, 
             chunk_overlap=chunk_overlap,
+            length_function=length_function,
             add_start_index=True
         )
         return text_splitter.split_documents(docs)
 
-def normalize_chunk_lengths(chunks, target_length=800):
+def _merge_chunk_metadata(metadatas, parts):
     """
-    Normalize chunk lengths to improve embedding quality.
-    Very short or very long chunks can lead to poor embeddings.
+    Fold the metadata of merged chunks, keeping the earliest page number.
+    
+    start_index counts from the start of a page or, for the semantic
+    strategies, of a section. When every part has a start_index in the same
+    page and section, the merged text keeps the first start_index and
+    'end_index' records where the last part ends; otherwise the offsets
+    cannot describe the merged text and start_index is dropped.
+    """
+    merged = metadatas[0]
+    for metadata in metadatas[1:]:
+        if 'page' in metadata and 'page' in merged:
+            merged = {**metadata, 'page': merged['page']}
+        else:
+            merged = {**merged, **metadata}
+    if len(metadatas) > 1 and 'start_index' in merged:
+        starts = [metadata.get('start_index') for metadata in metadatas]
+        sections = {
+            tuple(sorted((k, str(v)) for k, v in metadata.items() if k.startswith('section')))
+            for metadata in metadatas
+        }
+        if (all(isinstance(start, int) for start in starts) and len({m.get('page') for m in metadatas}) == 1
+                and len(sections) == 1):
+            merged = {**merged, 'start_index': starts[0]}
+            merged['end_index'] = max(start + len(part) for start, part in zip(starts, parts))
+        else:
+            merged = {k: v for k, v in merged.items() if k not in ('start_index', 'end_index')}
+    return merged
+
+def iter_normalized_chunks(chunks, target_length=800, length_function=len):
+    """
+    Merge short consecutive chunks towards a target length, as a stream.
+    
+    Same output as normalize_chunk_lengths, but chunks are consumed and
+    produced one at a time. The text of each output chunk is joined once and
+    its metadata merged once, when it is emitted.
     
     Args:
-        chunks (list): List of document chunks
-        target_length (int): Target character count for chunks
+        chunks (iterable): Document chunks, in order
+        target_length (int): Target length for chunks
+        length_function (callable): Measures chunk lengths (default: characters)
         
-    Returns:
-        list: List of normalized document chunks
+    Yields:
+        Document: Normalized document chunks
     """
-    normalized_chunks = []
-    buffer = ""
-    buffer_metadata = None
+    max_length = target_length * 1.5
+    separator_length = length_function("\n\n")
+    parts = []
+    metadatas = []
+    length = 0
     
     for chunk in chunks:
+        content = chunk.page_content
+        content_length = length_function(content)
+        
         # If we have no buffer, start with this chunk
-        if not buffer:
-            buffer = chunk.page_content
-            buffer_metadata = chunk.metadata
+        if not parts or parts == [""]:
+            parts = [content]
+            metadatas = [chunk.metadata]
+            length = content_length
             continue
-            
+        
         # If adding this chunk would get us closer to target length, add it
-        if len(buffer) < target_length and len(buffer) + len(chunk.page_content) <= target_length * 1.5:
-            buffer += "\n\n" + chunk.page_content
-            # Merge metadata, keeping the earlier page number
-            if 'page' in chunk.metadata and 'page' in buffer_metadata:
-                buffer_metadata = {**chunk.metadata, 'page': buffer_metadata['page']}
-            else:
-                buffer_metadata = {**buffer_metadata, **chunk.metadata}
+        if length < target_length and length + content_length <= max_length:
+            parts.append(content)
+            metadatas.append(chunk.metadata)
+            length += separator_length + content_length
         else:
             # Buffer is full or adding would make it too long
-            from langchain_core.documents import Document
-            normalized_chunks.append(Document(page_content=buffer, metadata=buffer_metadata))
-            buffer = chunk.page_content
-            buffer_metadata = chunk.metadata
+            yield Document(page_content="\n\n".join(parts), metadata=_merge_chunk_metadata(metadatas, parts))
+            parts = [content]
+            metadatas = [chunk.metadata]
+            length = content_length
     
     # Don't forget the last buffer
-    if buffer:
-        from langchain_core.documents import Document
-        normalized_chunks.append(Document(page_content=buffer, metadata=buffer_metadata))
+    if parts and parts != [""]:
+        yield Document(page_content="\n\n".join(parts), metadata=_merge_chunk_metadata(metadatas, parts))
+
+def normalize_chunk_lengths(chunks, target_length=800, length_function=len):
+    """
+    Normalize chunk lengths to improve embedding quality.
+    Very short or very long chunks can lead to poor embeddings.
     
-    return normalized_chunks 
\ No newline at end of file
+    Args:
+        chunks (list): List of document chunks
+        target_length (int): Target length for chunks
+        length_function (callable): Measures chunk lengths (default: characters)
+        
+    Returns:
+        list: List of normalized document chunks
+    """
+    return list(iter_normalized_chunks(chunks, target_length, length_function))
\ No newline at end of file
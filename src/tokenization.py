@@ -0,0 +1,91 @@
+import os
+import re
+from functools import lru_cache
+
+# Tokenizer of the embedding model; nomic-embed-text uses a BERT WordPiece vocabulary
+TOKENIZER_NAME = os.environ.get("TOKENIZER_NAME", "nomic-ai/nomic-embed-text-v1.5")
+
+# Units chunk sizes can be measured in
+LENGTH_UNITS = ("chars", "tokens", "approx_tokens")
+
+# WordPiece splits punctuation off and breaks long words into sub-words;
+# words are counted in pieces of up to six characters to approximate that
+_APPROXIMATE_TOKEN_PATTERN = re.compile(r"\w{1,6}|[^\w\s]")
+
+
+def approximate_token_count(text):
+    """
+    Estimate the number of tokens of a text without loading a tokenizer.
+
+    Args:
+        text (str): The text to measure
+
+    Returns:
+        int: Approximate token count
+    """
+    return len(_APPROXIMATE_TOKEN_PATTERN.findall(text))
+
+
+@lru_cache(maxsize=None)
+def get_tokenizer(name=TOKENIZER_NAME):
+    """
+    Load a tokenizer once per process.
+
+    Args:
+        name (str): Name or path of a Hugging Face tokenizer
+
+    Returns:
+        The transformers tokenizer
+    """
+    try:
+        from transformers import AutoTokenizer
+    except ImportError as e:
+        raise RuntimeError(
+            "Token lengths need the transformers package; install it or use the 'approx_tokens' unit"
+        ) from e
+    return AutoTokenizer.from_pretrained(name)
+
+
+@lru_cache(maxsize=None)
+def token_counter(name=TOKENIZER_NAME, cache_size=65536):
+    """
+    Return a function counting the tokens of a text with a tokenizer.
+
+    Splitters measure the same pieces of text many times, so counts are
+    cached, and one counter is shared per tokenizer.
+
+    Args:
+        name (str): Name or path of a Hugging Face tokenizer
+        cache_size (int): Number of texts whose counts are kept
+
+    Returns:
+        callable: Function mapping a text to its token count
+    """
+    tokenizer = get_tokenizer(name)
+
+    @lru_cache(maxsize=cache_size)
+    def count_tokens(text):
+        return len(tokenizer.encode(text, add_special_tokens=False))
+
+    return count_tokens
+
+
+def get_length_function(length_unit="chars", tokenizer_name=TOKENIZER_NAME):
+    """
+    Return the length function of a length unit.
+
+    Args:
+        length_unit (str): 'chars', 'tokens' (the embedding model's tokenizer)
+            or 'approx_tokens' (fast estimate, no tokenizer needed)
+        tokenizer_name (str): Tokenizer used for 'tokens'
+
+    Returns:
+        callable: Function mapping a text to its length
+    """
+    if length_unit == "chars":
+        return len
+    if length_unit == "approx_tokens":
+        return approximate_token_count
+    if length_unit == "tokens":
+        return token_counter(tokenizer_name)
+    raise ValueError(f"Unknown length unit {length_unit!r}; expected one of {', '.join(LENGTH_UNITS)}")
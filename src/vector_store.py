@@ -1,6 +1,25 @@
+import os
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
 from langchain_chroma import Chroma
+from langchain_core.documents import Document
+
+from src.numpy_store import NumpyVectorStore
+
+# Ingestion tuning, overridable from the environment
+EMBED_BATCH_SIZE = int(os.environ.get("EMBED_BATCH_SIZE", "32"))
+EMBED_MAX_WORKERS = int(os.environ.get("EMBED_MAX_WORKERS", "4"))
+EMBED_MAX_RETRIES = int(os.environ.get("EMBED_MAX_RETRIES", "3"))
 
-def create_vector_store(embedding_function, collection_name="example_collection", persist_directory="./chroma_langchain_db"):
+# Storage backend: 'chroma', or 'numpy' for the in-process memory-mapped index
+VECTOR_BACKEND = os.environ.get("VECTOR_BACKEND", "chroma")
+# Storage type of the numpy backend's scanned matrix: 'int8' or 'float16'
+VECTOR_DTYPE = os.environ.get("VECTOR_DTYPE", "int8")
+
+def create_vector_store(embedding_function, collection_name="example_collection", persist_directory="./chroma_langchain_db",
+                        backend=VECTOR_BACKEND, dtype=VECTOR_DTYPE):
     """
     Create and return a vector store.
     
@@ -8,39 +27,302 @@ def create_vector_store(embedding_function, collection_name="example_collection"
         embedding_function: Function to generate embeddings
         collection_name (str): Name of the collection
         persist_directory (str): Directory to save the database
+        backend (str): 'chroma' or 'numpy'
+        dtype (str): Storage type of the numpy backend, 'float16' or 'int8'
         
     Returns:
-        Chroma: A vector store object
+        A vector store object: Chroma, or NumpyVectorStore
     """
+    if backend == "numpy":
+        return NumpyVectorStore(embedding_function, collection_name, persist_directory, dtype=dtype)
+    if backend != "chroma":
+        raise ValueError(f"Unknown vector store backend: {backend}")
     return Chroma(
         collection_name=collection_name,
         embedding_function=embedding_function,
         persist_directory=persist_directory
     )
 
-def add_documents_to_store(vector_store, documents):
+def collection_key(collection_name, backend=VECTOR_BACKEND, dtype=VECTOR_DTYPE):
+    """
+    Name a collection in ingestion manifest keys, distinct per storage backend.
+
+    Args:
+        collection_name (str): Name of the collection
+        backend (str): 'chroma' or 'numpy'
+        dtype (str): Storage type of the numpy backend
+
+    Returns:
+        str: The collection name, qualified with the backend unless it is Chroma
+    """
+    # Chroma keys predate backends and stay unchanged
+    if backend == "chroma":
+        return collection_name
+    return f"{collection_name}@{backend}-{dtype}"
+
+def _add_batch(vector_store, batch, ids, max_retries, retry_delay):
+    """Add one batch, retrying with exponential backoff. Re-adding is safe because the IDs are fixed."""
+    for attempt in range(max_retries + 1):
+        try:
+            return vector_store.add_documents(documents=batch, ids=ids)
+        except Exception as e:
+            if attempt == max_retries:
+                raise
+            delay = retry_delay * (2 ** attempt)
+            print(f"Embedding batch of {len(batch)} failed ({e}), retrying in {delay:.1f}s")
+            time.sleep(delay)
+
+def _iter_batches(documents, batch_size):
+    batch = []
+    for doc in documents:
+        batch.append(doc)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def add_documents_to_store(vector_store, documents, batch_size=EMBED_BATCH_SIZE, max_workers=EMBED_MAX_WORKERS,
+                           max_retries=EMBED_MAX_RETRIES, retry_delay=1.0, progress_callback=None):
     """
     Add documents to the vector store.
+
+    Documents are embedded and written in batches by a bounded pool of
+    workers. At most max_workers batches are in flight at once; further
+    documents are not pulled from the input until a slot frees up, so an
+    iterator input is consumed at the pace of the embedding server.
+
+    Documents whose 'id' is set are stored under that ID, replacing any
+    document already stored under it, so re-adding them does not create
+    duplicates.
+
+    Args:
+        vector_store: The vector store object
+        documents (iterable): Documents to add
+        batch_size (int): Number of documents embedded per request
+        max_workers (int): Maximum number of concurrent embedding requests
+        max_retries (int): Number of retries for a failed batch
+        retry_delay (float): Initial delay in seconds between retries
+        progress_callback (callable, optional): Called after each batch with a
+            dict holding 'done', 'seconds' and 'chunks_per_sec'
+
+    Returns:
+        list: IDs of the added documents
+    """
+    start = time.perf_counter()
+    batch_ids = []
+    done = 0
+    in_flight = {}
+
+    def report(future):
+        nonlocal done
+        batch = in_flight.pop(future)
+        # Raises for a batch that failed after its retries, before it is counted
+        future.result()
+        done += len(batch)
+        if progress_callback:
+            elapsed = time.perf_counter() - start
+            progress_callback({
+                "done": done,
+                "seconds": elapsed,
+                "chunks_per_sec": done / elapsed if elapsed > 0 else 0.0
+            })
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for batch in _iter_batches(documents, batch_size):
+            # Backpressure: wait for a free slot before submitting more work
+            while len(in_flight) >= max_workers:
+                finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    report(future)
+            # Documents with an ID are upserted under it; the others get a random one
+            ids = [doc.id or str(uuid.uuid4()) for doc in batch]
+            batch_ids.append(ids)
+            future = executor.submit(_add_batch, vector_store, batch, ids, max_retries, retry_delay)
+            in_flight[future] = batch
+        while in_flight:
+            finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in finished:
+                report(future)
+
+    elapsed = time.perf_counter() - start
+    rate = done / elapsed if elapsed > 0 else 0.0
+    print(f"Embedded {done} chunks in {elapsed:.2f}s ({rate:.1f} chunks/sec, "
+          f"batch_size={batch_size}, max_workers={max_workers})")
+    return [doc_id for ids in batch_ids for doc_id in ids]
+
+def delete_documents_from_store(vector_store, ids, batch_size=1000):
+    """
+    Delete documents from the vector store by ID.
+
+    Args:
+        vector_store: The vector store object
+        ids (list): IDs of the documents to delete
+        batch_size (int): Number of IDs deleted per request
+
+    Returns:
+        int: Number of IDs deleted
+    """
+    ids = list(ids)
+    for start in range(0, len(ids), batch_size):
+        vector_store.delete(ids=ids[start:start + batch_size])
+    return len(ids)
+
+def get_document_ids(vector_store, source=None, page_range=None, section=None, strategy=None, where=None):
+    """
+    Return the IDs of the stored documents matching a metadata filter.
     
     Args:
         vector_store: The vector store object
-        documents (list): List of documents to add
+        source (str or list, optional): Source file name(s)
+        page_range (tuple, optional): Inclusive (first_page, last_page)
+        section (str, optional): Section title assigned by the splitter
+        strategy (str, optional): Splitting strategy the chunks were built with
+        where (dict, optional): Raw metadata filter, used instead of the arguments above
         
     Returns:
-        list: IDs of the added documents
+        list: IDs of the matching documents
     """
-    return vector_store.add_documents(documents=documents)
+    if where is None:
+        where = build_metadata_filter(source, page_range, section, strategy)
+    return list(vector_store.get(where=where, include=[])["ids"])
 
-def similarity_search(vector_store, embedding, k=5):
+def build_metadata_filter(source=None, page_range=None, section=None, strategy=None):
+    """
+    Build a vector store metadata filter from common document attributes.
+
+    Args:
+        source (str or list, optional): Source file name(s) to search in
+        page_range (tuple, optional): Inclusive (first_page, last_page); either
+            bound may be None
+        section (str, optional): Section title assigned by the splitter
+        strategy (str, optional): Splitting strategy the chunks were built with
+
+    Returns:
+        dict: A Chroma 'where' filter, or None if no attribute was given
+    """
+    conditions = []
+    if source is not None:
+        if isinstance(source, (list, tuple, set)):
+            conditions.append({"source": {"$in": list(source)}})
+        else:
+            conditions.append({"source": source})
+    if page_range is not None:
+        first_page, last_page = page_range
+        if first_page is not None:
+            conditions.append({"page": {"$gte": first_page}})
+        if last_page is not None:
+            conditions.append({"page": {"$lte": last_page}})
+    if section is not None:
+        conditions.append({"section_title": section})
+    if strategy is not None:
+        conditions.append({"splitting_strategy": strategy})
+
+    if not conditions:
+        return None
+    if len(conditions) == 1:
+        return conditions[0]
+    return {"$and": conditions}
+
+def similarity_search(vector_store, embedding, k=5, source=None, page_range=None, section=None,
+                      strategy=None, where=None):
     """
     Search for similar documents in the vector store.
     
+    Metadata filters are applied inside the store query, so a filtered
+    search still returns up to k results from the matching chunks.
+    
     Args:
         vector_store: The vector store object
         embedding: The query embedding
         k (int): Number of results to return
+        source (str or list, optional): Only search chunks from these sources
+        page_range (tuple, optional): Only search pages in this inclusive range
+        section (str, optional): Only search chunks of this section
+        strategy (str, optional): Only search chunks built with this splitting strategy
+        where (dict, optional): Raw metadata filter, used instead of the arguments above
         
     Returns:
         list: List of similar documents
     """
-    return vector_store.similarity_search_by_vector(embedding, k=k) 
\ No newline at end of file
+    if where is None:
+        where = build_metadata_filter(source, page_range, section, strategy)
+    if where is None:
+        return vector_store.similarity_search_by_vector(embedding, k=k)
+    return vector_store.similarity_search_by_vector(embedding, k=k, filter=where)
+
+def similarity_search_with_scores(vector_store, embedding, k=5, source=None, page_range=None, section=None,
+                                  strategy=None, where=None):
+    """
+    Search for similar documents and return them with their distances.
+    
+    Takes the same filters as similarity_search. Lower distances are closer,
+    so results from different collections can be merged by sorting.
+    
+    Args:
+        vector_store: The vector store object
+        embedding: The query embedding
+        k (int): Number of results to return
+        
+    Returns:
+        list: List of (document, distance) pairs, closest first
+    """
+    if where is None:
+        where = build_metadata_filter(source, page_range, section, strategy)
+    return vector_store.similarity_search_by_vector_with_relevance_scores(embedding, k=k, filter=where)
+
+def similarity_search_batch_with_scores(vector_store, embeddings, k=5, source=None, page_range=None, section=None,
+                                        strategy=None, where=None):
+    """
+    Search for the documents similar to each of several query embeddings.
+    
+    All queries are answered by one store request: one query call for
+    Chroma, one matrix product for the numpy backend. Takes the same
+    filters as similarity_search.
+    
+    Args:
+        vector_store: The vector store object
+        embeddings (list): The query embeddings
+        k (int): Number of results per query
+        
+    Returns:
+        list: One list of (document, distance) pairs per query, closest first
+    """
+    embeddings = list(embeddings)
+    if not embeddings:
+        return []
+    if where is None:
+        where = build_metadata_filter(source, page_range, section, strategy)
+    if isinstance(vector_store, NumpyVectorStore):
+        return vector_store.similarity_search_by_vectors_with_relevance_scores(embeddings, k=k, filter=where)
+    results = vector_store._collection.query(
+        query_embeddings=embeddings, n_results=k, where=where,
+        include=["documents", "metadatas", "distances"]
+    )
+    return [
+        [
+            (Document(page_content=text, metadata=metadata or {}, id=doc_id), distance)
+            for doc_id, text, metadata, distance in zip(ids, texts, metadatas, distances)
+        ]
+        for ids, texts, metadatas, distances in zip(
+            results["ids"], results["documents"], results["metadatas"], results["distances"]
+        )
+    ]
+
+def similarity_search_batch(vector_store, embeddings, k=5, **filters):
+    """
+    Search for the documents similar to each of several query embeddings.
+    
+    Args:
+        vector_store: The vector store object
+        embeddings (list): The query embeddings
+        k (int): Number of results per query
+        **filters: Filters of similarity_search
+        
+    Returns:
+        list: One list of documents per query, closest first
+    """
+    return [
+        [doc for doc, _ in results]
+        for results in similarity_search_batch_with_scores(vector_store, embeddings, k=k, **filters)
+    ]
\ No newline at end of file
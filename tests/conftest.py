@@ -0,0 +1,80 @@
+import os
+
+import pytest
+
+from src.numpy_store import matches_filter
+
+PDF_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "pdf_files", "2306.13549v4.pdf"))
+
+
+class RecordingStore:
+    """Stand-in vector store that records what would have been embedded."""
+
+    def __init__(self):
+        self.added = []
+        self.stored = {}
+
+    def add_documents(self, documents, **kwargs):
+        self.added.extend(documents)
+        ids = kwargs.get("ids") or [str(i) for i in range(len(documents))]
+        self.stored.update(zip(ids, documents))
+        return ids
+
+    def delete(self, ids):
+        for doc_id in ids:
+            self.stored.pop(doc_id, None)
+
+    def get(self, where=None, include=None):
+        return {"ids": [doc_id for doc_id, doc in self.stored.items() if matches_filter(doc.metadata, where)]}
+
+
+class KeywordEmbeddings:
+    """Deterministic embeddings: one dimension per keyword."""
+
+    keywords = ["authors", "results", "method"]
+
+    def embed_documents(self, texts):
+        return [self.embed_query(text) for text in texts]
+
+    def embed_query(self, text):
+        return [float(text.count(word)) + 0.01 for word in self.keywords]
+
+
+class CountingEmbeddings:
+    """Deterministic embeddings that record every embedding request."""
+
+    def __init__(self):
+        self.requests = []
+        self.texts = 0
+
+    def embed_documents(self, texts):
+        self.requests.append(list(texts))
+        self.texts += len(texts)
+        return [[float(text.lower().count(word)) + 0.01 for word in ("model", "data", "author")] for text in texts]
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+
+@pytest.fixture
+def pdf_path():
+    """Path of the sample paper in pdf_files/."""
+    return PDF_PATH
+
+
+@pytest.fixture
+def store():
+    """An empty RecordingStore."""
+    return RecordingStore()
+
+
+@pytest.fixture
+def keyword_embeddings():
+    """KeywordEmbeddings over 'authors', 'results' and 'method'."""
+    return KeywordEmbeddings()
+
+
+@pytest.fixture
+def counting_embeddings():
+    """A fresh CountingEmbeddings."""
+    return CountingEmbeddings()
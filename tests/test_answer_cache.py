@@ -0,0 +1,62 @@
+import time
+
+from src.answer_cache import AnswerCache, SemanticAnswerCache, normalize_query
+
+
+def test_normalized_queries_share_an_entry():
+    cache = AnswerCache()
+    cache.put(cache.make_key("Who are the authors?", "hash-1", "gemma3:1b", 1), "Alice and Bob")
+
+    assert normalize_query("  who ARE the   authors ") == "who are the authors"
+    assert cache.get(cache.make_key("who are the authors", "hash-1", "gemma3:1b", 1)) == "Alice and Bob"
+    assert cache.get(cache.make_key("who are the authors", "hash-2", "gemma3:1b", 1)) is None
+    assert cache.get(cache.make_key("who are the authors", "hash-1", "gemma3:1b", 2)) is None
+
+
+def test_entries_expire_and_are_evicted():
+    cache = AnswerCache(max_entries=2, ttl=0.01)
+    for query in ["a", "b", "c"]:
+        cache.put(cache.make_key(query, "hash", "model", 1), query.upper())
+
+    assert cache.stats()["evictions"] == 1
+    time.sleep(0.02)
+    assert cache.get(cache.make_key("c", "hash", "model", 1)) is None
+    assert cache.stats()["expired"] == 1
+
+
+def test_invalidate_document_only_drops_its_answers():
+    cache = AnswerCache()
+    cache.put(cache.make_key("q", "hash-a", "model", 1), "from a", document_id="a.pdf")
+    cache.put(cache.make_key("q", "hash-b", "model", 1), "from b", document_id="b.pdf")
+
+    assert cache.invalidate_document("a.pdf") == 1
+    assert cache.get(cache.make_key("q", "hash-a", "model", 1)) is None
+    assert cache.get(cache.make_key("q", "hash-b", "model", 1)) == "from b"
+
+
+def test_semantic_cache_hits_close_questions_of_the_same_document():
+    cache = SemanticAnswerCache(threshold=0.9)
+    partition = ("hash-a", "model", 1)
+    cache.put([1.0, 0.0, 0.1], partition, "who wrote this paper", "Alice")
+
+    answer, similarity = cache.get([0.9, 0.05, 0.1], partition, "who are the authors?")
+    missed, _ = cache.get([0.0, 1.0, 0.0], partition, "what is the method?")
+    other_document, _ = cache.get([1.0, 0.0, 0.1], ("hash-b", "model", 1))
+
+    assert answer == "Alice" and similarity > 0.9
+    assert missed is None
+    assert other_document is None
+    stats = cache.stats()
+    assert stats["hits"] == 1 and stats["lookups"] == 3
+    assert sum(stats["similarity_histogram"].values()) == 2
+
+
+def test_semantic_cache_is_size_capped():
+    cache = SemanticAnswerCache(max_entries=2)
+    partition = ("hash-a", "model", 1)
+    for i, vector in enumerate([[1.0, 0.0], [0.0, 1.0], [1.0, 1.0]]):
+        cache.put(vector, partition, f"question {i}", f"answer {i}")
+
+    assert cache.stats()["entries"] == 2
+    assert cache.stats()["evictions"] == 1
+    assert cache.get([1.0, 0.0], partition)[0] is None
@@ -0,0 +1,47 @@
+import json
+import shutil
+
+from src import cli, embeddings, llm
+
+
+def test_find_pdfs_and_load_queries(tmp_path):
+    (tmp_path / "docs" / "nested").mkdir(parents=True)
+    for name in ("docs/a.pdf", "docs/nested/b.pdf", "docs/notes.txt", "c.pdf"):
+        (tmp_path / name).write_bytes(b"")
+    (tmp_path / "queries.txt").write_text("# comment\nfirst question?\n\nsecond question?\n")
+    (tmp_path / "queries.jsonl").write_text('{"query": "first?"}\n{"question": "second?"}\n')
+
+    found = cli.find_pdfs([str(tmp_path / "docs"), str(tmp_path / "*.pdf"), str(tmp_path / "docs" / "a.pdf")])
+
+    assert found == [str(tmp_path / "docs" / "a.pdf"), str(tmp_path / "docs" / "nested" / "b.pdf"),
+                     str(tmp_path / "c.pdf")]
+    assert cli.load_queries(str(tmp_path / "queries.txt")) == ["first question?", "second question?"]
+    assert cli.load_queries(str(tmp_path / "queries.jsonl")) == ["first?", "second?"]
+
+
+def test_run_writes_jsonl_and_reuses_the_index(tmp_path, monkeypatch, pdf_path, counting_embeddings):
+    fake = counting_embeddings
+    monkeypatch.setattr(embeddings, "get_embeddings", lambda model: fake)
+    monkeypatch.setattr(llm, "generate_response", lambda model, prompt: "an answer")
+    shutil.copy(pdf_path, tmp_path / "paper.pdf")
+    (tmp_path / "broken.pdf").write_bytes(b"not a pdf")
+    pdf_paths = [str(tmp_path / "paper.pdf"), str(tmp_path / "broken.pdf")]
+    queries = ["who are the authors?", "what data is used?"]
+    options = {"workers": 2, "persist_directory": str(tmp_path / "index"), "parse_workers": 0}
+
+    summary = cli.run(pdf_paths, queries, str(tmp_path / "out" / "results.jsonl"), **options)
+    first_run_texts = fake.texts
+    cli.run(pdf_paths[:1], queries, str(tmp_path / "again.jsonl"), **options)
+
+    with open(tmp_path / "out" / "results.jsonl", encoding="utf-8") as f:
+        records = [json.loads(line) for line in f]
+    with open(tmp_path / "again.jsonl", encoding="utf-8") as f:
+        again = [json.loads(line) for line in f]
+    answered = [record for record in records if record["file"] == pdf_paths[0]]
+    failed = [record for record in records if record["file"] == pdf_paths[1]]
+    assert summary["files"] == 2 and summary["questions"] == 4 and summary["errors"] == 2
+    assert [record["query"] for record in answered] == queries
+    assert all(record["answer"] == "an answer" and record["ingest_cached"] is False for record in answered)
+    assert all(record["answer"] is None and record["error"] for record in failed)
+    assert all(record["ingest_cached"] for record in again)
+    assert fake.texts == first_run_texts + len(queries)
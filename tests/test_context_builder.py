@@ -0,0 +1,87 @@
+from langchain_core.documents import Document
+
+from src import context_builder, text_processing
+
+
+def chunk(text, page=0, start_index=0, source="paper.pdf"):
+    return Document(page_content=text, metadata={"source": source, "page": page, "start_index": start_index})
+
+
+def test_overlapping_chunks_are_dropped():
+    first = chunk("a" * 400, start_index=0)
+    same_range = chunk("b" * 400, start_index=100)
+    next_chunk = chunk("c" * 400, start_index=350)
+    other_page = chunk("d" * 400, page=1, start_index=100)
+    repeated_text = chunk("a" * 400, source="other.pdf")
+    report = {}
+
+    context = context_builder.build_context([first, same_range, next_chunk, other_page, repeated_text],
+                                            report=report)
+
+    assert report["chunks_used"] == 3
+    assert report["duplicates_dropped"] == 2
+    assert "b" * 400 not in context
+    assert "[CHUNK 3 | Source: paper.pdf | Page: 1]" in context
+
+
+def test_disjoint_merged_chunks_are_not_duplicates():
+    # Split pieces of one page, merged two by two into disjoint chunks
+    pieces = [chunk("a" * 209, start_index=0), chunk("b" * 179, start_index=212),
+              chunk("c" * 200, start_index=394), chunk("d" * 250, start_index=597)]
+    merged = text_processing.normalize_chunk_lengths(pieces, target_length=300)
+    report = {}
+
+    context_builder.build_context(merged, report=report)
+
+    assert [(doc.metadata["start_index"], doc.metadata["end_index"]) for doc in merged] == [(0, 391), (394, 847)]
+    assert report["chunks_used"] == 2
+    assert report["duplicates_dropped"] == 0
+
+
+def test_chunks_merged_across_sections_lose_their_offsets():
+    # Semantic start_index values count from the start of each section
+    def section_chunk(text, section, start_index):
+        return Document(page_content=text, metadata={"source": "paper.pdf", "page": 0, "start_index": start_index,
+                                                     "section_Header 1": section})
+
+    pieces = [section_chunk("a" * 100, "Abstract", 0), section_chunk("b" * 100, "Methods", 0),
+              section_chunk("c" * 100, "Results", 0), section_chunk("d" * 700, "Results", 110)]
+    merged = text_processing.normalize_chunk_lengths(pieces, target_length=300)
+    report = {}
+
+    context_builder.build_context(merged, report=report)
+
+    assert len(merged) == 2
+    assert "start_index" not in merged[0].metadata and "end_index" not in merged[0].metadata
+    assert report["chunks_used"] == 2
+    assert report["duplicates_dropped"] == 0
+
+
+def test_chunks_are_packed_to_the_token_budget_by_relevance():
+    results = [chunk(f"word{i} " * 50, page=i) for i in range(10)]
+    scores = [float(10 - i) for i in range(10)]
+    report = {}
+
+    context = context_builder.build_context(results, max_tokens=250, scores=scores, report=report)
+
+    count = context_builder.tokenization.approximate_token_count
+    assert report["tokens_used"] <= 250
+    assert count(context.strip()) <= 250
+    assert report["chunks_used"] == 3
+    assert report["over_budget_dropped"] == 7
+    # The lowest distance is the most relevant and comes first
+    assert context.index("word9") < context.index("word8")
+
+
+def test_oversized_top_chunk_is_truncated_to_the_budget():
+    report = {}
+
+    context = context_builder.build_context([chunk("word " * 1000)], max_tokens=100, report=report)
+
+    assert 0 < report["tokens_used"] <= 100
+    assert context.startswith("\n\n[CHUNK 1 | Source: paper.pdf | Page: 0]")
+
+
+def test_token_budget_reserves_room_for_the_prompt():
+    assert context_builder.token_budget(num_ctx=2048, reserved=768) == 1280
+    assert context_builder.token_budget(num_ctx=512, reserved=768) == 0
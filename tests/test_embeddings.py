@@ -0,0 +1,38 @@
+from src.embeddings import CachedEmbeddings
+
+
+def test_repeated_texts_are_served_from_memory(tmp_path, counting_embeddings):
+    cache = CachedEmbeddings(counting_embeddings, "test-embed", cache_dir=str(tmp_path))
+
+    first = cache.embed_documents(["model", "data", "model"])
+    second = cache.embed_query("data")
+
+    assert counting_embeddings.requests == [["model", "data"]]
+    assert first == [[1.01, 0.01, 0.01], [0.01, 1.01, 0.01], [1.01, 0.01, 0.01]]
+    assert second == [0.01, 1.01, 0.01]
+    # The repeat within the batch is embedded once, so it counts as a hit
+    assert cache.stats()["hits"] == 2
+    assert cache.stats()["misses"] == 2
+    assert cache.stats()["hit_rate"] == 0.5
+
+
+def test_vectors_persist_on_disk_per_model(tmp_path, counting_embeddings):
+    CachedEmbeddings(counting_embeddings, "test-embed", cache_dir=str(tmp_path)).embed_documents(["model"])
+
+    reopened = CachedEmbeddings(counting_embeddings, "test-embed", cache_dir=str(tmp_path))
+    other_model = CachedEmbeddings(counting_embeddings, "other-embed", cache_dir=str(tmp_path))
+
+    assert reopened.embed_query("model") == [1.01, 0.01, 0.01]
+    assert counting_embeddings.requests == [["model"]]
+    assert reopened.stats()["disk_hits"] == 1
+    other_model.embed_query("model")
+    assert counting_embeddings.requests == [["model"], ["model"]]
+
+
+def test_memory_layer_evicts_least_recently_used(tmp_path, counting_embeddings):
+    cache = CachedEmbeddings(counting_embeddings, "test-embed", cache_dir=str(tmp_path), memory_size=2)
+
+    cache.embed_documents(["a", "b", "c"])
+
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["memory_entries"] == 2
@@ -0,0 +1,44 @@
+import pytest
+
+from benchmarks.fake_ollama import FakeOllamaServer
+from src import llm, ollama_client
+from src.embeddings import OllamaEmbeddings
+
+
+@pytest.fixture
+def server():
+    server = FakeOllamaServer(dimension=16, latency=0.0, token_rate=1000.0, answer_tokens=8,
+                              embed_latency=0.0, embed_text_latency=0.0).start()
+    yield server
+    server.stop()
+
+
+def test_generation_is_deterministic_and_streamed(server, monkeypatch):
+    monkeypatch.setattr(ollama_client, "_shared_pool", ollama_client.OllamaPool(host=server.url))
+    metrics = {}
+
+    answer = llm.generate_response("model", "a prompt")
+    streamed = "".join(llm.generate_response_stream("model", "a prompt", metrics))
+
+    assert answer == streamed == llm.generate_response("model", "a prompt")
+    assert len(answer.split()) == 8
+    assert llm.generate_response("model", "another prompt") != answer
+    assert metrics["tokens"] == 8
+    assert server.stats["generate"] == 4 and server.stats["generated_tokens"] == 32
+
+
+def test_embeddings_rank_texts_sharing_words_closer(server):
+    embeddings = OllamaEmbeddings("embedder", client=ollama_client.OllamaPool(host=server.url))
+
+    query, related, unrelated = embeddings.embed_documents(
+        ["retrieval of chunks", "chunks found by retrieval", "zebra giraffe"]
+    )
+
+    def dot(a, b):
+        return sum(x * y for x, y in zip(a, b))
+
+    assert len(query) == 16
+    assert dot(query, query) == pytest.approx(1.0)
+    assert dot(query, related) > dot(query, unrelated)
+    assert embeddings.embed_query("retrieval of chunks") == query
+    assert server.stats["embed"] == 2 and server.stats["embedded_texts"] == 4
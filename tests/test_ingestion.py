@@ -0,0 +1,141 @@
+import shutil
+
+from langchain_core.documents import Document
+
+from src import ingestion
+
+
+def test_second_ingestion_is_a_manifest_hit(tmp_path, pdf_path, store):
+    manifest = ingestion.IngestionManifest(str(tmp_path))
+
+    first = ingestion.ingest_pdf(pdf_path, store, manifest, "test-embed", "docs", source="paper.pdf")
+    second = ingestion.ingest_pdf(pdf_path, store, manifest, "test-embed", "docs", source="paper.pdf")
+
+    assert first["cached"] is False
+    assert second["cached"] is True
+    assert first["chunk_count"] == len(store.added)
+
+
+def test_manifest_survives_restart_and_resolves_aliases(tmp_path, pdf_path, store):
+    first = ingestion.ingest_pdf(pdf_path, store, ingestion.IngestionManifest(str(tmp_path)),
+                                 "test-embed", "docs", source="paper.pdf")
+
+    renamed = str(tmp_path / "renamed.pdf")
+    shutil.copy(pdf_path, renamed)
+    manifest = ingestion.IngestionManifest(str(tmp_path))
+    entry = ingestion.ingest_pdf(renamed, store, manifest, "test-embed", "docs", source="renamed.pdf")
+
+    assert entry["cached"] is True
+    assert len(store.added) == first["chunk_count"]
+    assert manifest.resolve_source("renamed.pdf") == "paper.pdf"
+    assert {"paper.pdf", "renamed.pdf"} <= manifest.sources()
+
+
+def test_aliases_survive_reingestion_of_a_changed_original(tmp_path, pdf_path, store):
+    manifest = ingestion.IngestionManifest(str(tmp_path))
+    ingestion.ingest_pdf(pdf_path, store, manifest, "test-embed", "docs", source="paper.pdf")
+    ingestion.ingest_pdf(pdf_path, store, manifest, "test-embed", "docs", source="copy.pdf")
+
+    changed = ingestion.ingest_pdf(pdf_path, store, manifest, "test-embed", "docs", source="paper.pdf",
+                                   chunk_size=500)
+
+    assert changed["aliases"] == ["copy.pdf"]
+    assert manifest.resolve_source("copy.pdf") == "paper.pdf"
+
+
+def test_parameter_change_replaces_the_previous_ingestion(tmp_path, pdf_path, store):
+    manifest = ingestion.IngestionManifest(str(tmp_path))
+
+    first = ingestion.ingest_pdf(pdf_path, store, manifest, "test-embed", "docs", source="paper.pdf")
+    changed = ingestion.ingest_pdf(pdf_path, store, manifest, "test-embed", "docs", source="paper.pdf",
+                                   chunk_size=500)
+    original = ingestion.ingest_pdf(pdf_path, store, manifest, "test-embed", "docs", source="paper.pdf")
+
+    assert changed["cached"] is False
+    assert original["cached"] is False
+    assert set(store.stored) == {chunk_id for record in original["pages"].values() for chunk_id in record["ids"]}
+    assert len(store.stored) == first["chunk_count"]
+
+
+def test_reingestion_replaces_chunks_of_entries_without_page_records(tmp_path, pdf_path, store):
+    manifest = ingestion.IngestionManifest(str(tmp_path))
+    ingestion.ingest_pdf(pdf_path, store, manifest, "test-embed", "docs", source="paper.pdf")
+
+    # As written before chunk IDs were recorded: random IDs, no 'pages'
+    key, entry = manifest.latest("paper.pdf", "docs")
+    del entry["pages"]
+    manifest.record(key, entry)
+    store.stored = {f"legacy-{i}": doc for i, doc in enumerate(store.stored.values())}
+    store.stored.update({f"other-{i}": Document(page_content="other", metadata={"source": "other.pdf"})
+                         for i in range(3)})
+
+    changed = ingestion.ingest_pdf(pdf_path, store, manifest, "test-embed", "docs", source="paper.pdf",
+                                   chunk_size=500)
+
+    live = {chunk_id for record in changed["pages"].values() for chunk_id in record["ids"]}
+    assert changed["deleted_chunks"] == entry["chunk_count"]
+    assert set(store.stored) == live | {"other-0", "other-1", "other-2"}
+
+
+def test_chunk_ids_are_stable_and_unique(pdf_path):
+    first = list(ingestion.iter_pdf_chunks(pdf_path, source="paper.pdf", splitting_strategy="hybrid"))
+    second = list(ingestion.iter_pdf_chunks(pdf_path, source="paper.pdf", splitting_strategy="hybrid"))
+
+    assert [doc.id for doc in first] == [doc.id for doc in second]
+    assert len({doc.id for doc in first}) == len(first)
+
+
+def test_only_changed_pages_are_embedded_again(tmp_path, pdf_path, store):
+    from pypdf import PdfReader, PdfWriter
+
+    from src.lexical_index import LexicalIndex
+
+    manifest = ingestion.IngestionManifest(str(tmp_path))
+    lexical_index = LexicalIndex(str(tmp_path))
+    first = ingestion.ingest_pdf(pdf_path, store, manifest, "test-embed", "docs", source="paper.pdf",
+                                 lexical_index=lexical_index)
+
+    # Page 5 replaced by a copy of page 6, last page dropped
+    reader = PdfReader(pdf_path)
+    writer = PdfWriter()
+    for number in [0, 1, 2, 3, 4, 6] + list(range(6, 17)):
+        writer.add_page(reader.pages[number])
+    edited = str(tmp_path / "paper.pdf")
+    with open(edited, "wb") as f:
+        writer.write(f)
+    second = ingestion.ingest_pdf(edited, store, manifest, "test-embed", "docs", source="paper.pdf",
+                                  lexical_index=lexical_index)
+
+    assert second["cached"] is False
+    assert second["reused_pages"] == 16
+    assert {doc.metadata["page"] for doc in store.added[first["chunk_count"]:]} == {5}
+    assert second["deleted_chunks"] == len(first["pages"]["5"]["ids"]) + len(first["pages"]["17"]["ids"])
+    assert set(store.stored) == {chunk_id for record in second["pages"].values() for chunk_id in record["ids"]}
+    assert lexical_index._db.execute("SELECT COUNT(*) FROM chunks").fetchone()[0] == second["chunk_count"]
+    assert manifest.documents() == {"paper.pdf"}
+    assert manifest.content_hash("paper.pdf") == ingestion.file_content_hash(edited)
+
+
+def test_pdf_chunks_are_streamed_page_window_by_page_window(pdf_path):
+    progress = []
+    chunks = ingestion.iter_pdf_chunks(pdf_path, source="paper.pdf", splitting_strategy="section",
+                                       page_window=4, progress_callback=lambda stage, info: progress.append(info))
+
+    first = next(chunks)
+    pages_read_before_first_chunk = max(info.get("pages", 0) for info in progress)
+    rest = list(chunks)
+
+    assert pages_read_before_first_chunk == 4
+    assert first.metadata["source"] == "paper.pdf"
+    assert first.metadata["splitting_strategy"] == "section"
+    assert {doc.metadata["page"] for doc in [first] + rest} == set(range(18))
+
+
+def test_process_pool_parsing_matches_in_process_parsing(pdf_path):
+    serial = list(ingestion.iter_pdf_chunks(pdf_path, splitting_strategy="section", page_window=5))
+    parallel = list(ingestion.iter_pdf_chunks(pdf_path, splitting_strategy="section", page_window=5,
+                                              parse_workers=2))
+
+    assert [doc.page_content for doc in parallel] == [doc.page_content for doc in serial]
+    assert [doc.metadata for doc in parallel] == [doc.metadata for doc in serial]
+    assert [doc.id for doc in parallel] == [doc.id for doc in serial]
@@ -0,0 +1,92 @@
+import json
+import threading
+import time
+
+from src import jobs
+
+
+def wait_until_finished(queue, job_id, timeout=5):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = queue.get(job_id)
+        if job["state"] in jobs.FINISHED_STATES:
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"job {job_id} did not finish")
+
+
+def fake_ingestion(params, progress_callback):
+    progress_callback("loading")
+    progress_callback("splitting", {"pages": 3})
+    progress_callback("embedding", {"chunks": 2, "embedded": 0})
+    if params.get("fail"):
+        raise ValueError("broken PDF")
+    progress_callback("embedding", {"embedded": 2})
+    return {"chunk_count": 2}
+
+
+def test_job_reports_stages_and_is_persisted(tmp_path):
+    queue = jobs.IngestionJobQueue(str(tmp_path), fake_ingestion)
+
+    job_id = queue.submit({"file_path": "paper.pdf"})
+    job = wait_until_finished(queue, job_id)
+
+    assert job["state"] == "done"
+    assert job["result"] == {"chunk_count": 2}
+    assert job["progress"] == {"pages": 3, "chunks": 2, "embedded": 2}
+    assert list(job["stages"]) == ["queued", "loading", "splitting", "embedding"]
+    assert all(stage["seconds"] is not None for stage in job["stages"].values())
+    with open(tmp_path / f"{job_id}.json") as f:
+        assert json.load(f)["state"] == "done"
+
+
+def test_failed_job_records_error(tmp_path):
+    queue = jobs.IngestionJobQueue(str(tmp_path), fake_ingestion)
+
+    job = wait_until_finished(queue, queue.submit({"fail": True}))
+
+    assert job["state"] == "failed"
+    assert job["error"] == "broken PDF"
+
+
+def test_unfinished_jobs_are_requeued_on_restart(tmp_path):
+    release = threading.Event()
+
+    def blocked_ingestion(params, progress_callback):
+        progress_callback("loading")
+        release.wait(5)
+        raise RuntimeError("process stopped")
+
+    job_id = jobs.IngestionJobQueue(str(tmp_path), blocked_ingestion).submit({"file_path": "paper.pdf"})
+    time.sleep(0.05)
+
+    restarted = jobs.IngestionJobQueue(str(tmp_path), fake_ingestion)
+    release.set()
+
+    # Nothing runs until the serving process resumes the queue
+    assert restarted.get(job_id)["state"] == "loading"
+    assert restarted.resume() == [job_id]
+    assert restarted.resume() == []
+    assert wait_until_finished(restarted, job_id)["state"] == "done"
+
+
+def test_finished_jobs_expire(tmp_path):
+    queue = jobs.IngestionJobQueue(str(tmp_path), fake_ingestion, finished_ttl=0.05)
+    old_job = queue.submit({"file_path": "old.pdf"})
+    wait_until_finished(queue, old_job)
+    time.sleep(0.1)
+
+    new_job = queue.submit({"file_path": "new.pdf"})
+
+    assert queue.get(old_job) is None
+    assert not (tmp_path / f"{old_job}.json").exists()
+    assert queue.get(new_job) is not None
+
+
+def test_unknown_stage_fails_the_job(tmp_path):
+    queue = jobs.IngestionJobQueue(str(tmp_path), lambda params, progress_callback: progress_callback("parsing"))
+
+    job = wait_until_finished(queue, queue.submit({}))
+
+    assert job["state"] == "failed"
+    assert "parsing" in job["error"]
@@ -0,0 +1,98 @@
+import json
+
+from langchain_core.documents import Document
+
+from src import ingestion
+from src.lexical_index import LexicalIndex, tokenize
+
+
+def chunk(text, page=0, source="a.pdf"):
+    return Document(page_content=text, metadata={"source": source, "page": page})
+
+
+def test_tokenize_lowercases_words_and_numbers():
+    assert tokenize("See Table 3, Eq. (12)") == ["see", "table", "3", "eq", "12"]
+
+
+def test_bm25_ranks_exact_terms_first(tmp_path):
+    index = LexicalIndex(str(tmp_path))
+    index.add_chunks("a.pdf", [
+        chunk("The model is trained on a large corpus.", page=0),
+        chunk("Table 3 lists the results of every ablation.", page=1),
+        chunk("Results are discussed in the next section. Results vary.", page=2),
+    ])
+
+    results = index.search("Table 3", ["a.pdf"], k=2)
+    ranked = index.search("results", ["a.pdf"], k=3)
+
+    assert [doc.metadata["page"] for doc, _ in results] == [1]
+    # Two occurrences in a chunk outrank one
+    assert [doc.metadata["page"] for doc, _ in ranked] == [2, 1]
+    assert index.search("table", ["a.pdf"], page_range=(2, None)) == []
+
+
+def test_documents_are_indexed_and_removed_independently(tmp_path):
+    index = LexicalIndex(str(tmp_path))
+    index.add_chunks("a.pdf", [chunk("Vaswani attention paper", source="a.pdf")])
+    index.add_chunks("b.pdf", [chunk("Vaswani transformer follow-up", source="b.pdf")])
+
+    assert len(index.search("vaswani", ["a.pdf", "b.pdf"])) == 2
+    assert index.remove_document("a.pdf") == 1
+
+    reopened = LexicalIndex(str(tmp_path))
+    assert not reopened.has_document("a.pdf")
+    assert [doc.metadata["source"] for doc, _ in reopened.search("vaswani", ["a.pdf", "b.pdf"])] == ["b.pdf"]
+
+
+def test_rank_documents_orders_matching_documents_by_best_chunk(tmp_path):
+    index = LexicalIndex(str(tmp_path))
+    index.add_chunks("a.pdf", [chunk("Attention is all you need", source="a.pdf")])
+    index.add_chunks("b.pdf", [chunk("Attention attention and transformers", source="b.pdf")])
+    index.add_chunks("c.pdf", [chunk("Convolutional networks", source="c.pdf")])
+
+    ranked = index.rank_documents("attention transformers", ["a.pdf", "b.pdf", "c.pdf"])
+
+    assert ranked == ["b.pdf", "a.pdf"]
+    assert index.rank_documents("attention", ["a.pdf", "b.pdf", "c.pdf"], limit=1) == ["b.pdf"]
+
+
+def test_search_binds_many_documents_and_terms_in_batches(tmp_path):
+    index = LexicalIndex(str(tmp_path))
+    document_ids = [f"doc{i}.pdf" for i in range(1200)]
+    for document_id in document_ids[::100]:
+        index.add_chunks(document_id, [chunk(f"shared words of {document_id}", source=document_id)])
+    query = " ".join(f"term{i}" for i in range(1200)) + " shared"
+
+    results = index.search(query, document_ids, k=20)
+
+    assert len(results) == 12
+    assert index.rank_documents(query, document_ids) != []
+
+
+def test_ingestion_fills_the_index_and_backfills_on_a_manifest_hit(tmp_path, pdf_path, store):
+    manifest = ingestion.IngestionManifest(str(tmp_path))
+    ingestion.ingest_pdf(pdf_path, store, manifest, "test-embed", "docs", source="paper.pdf")
+
+    index = LexicalIndex(str(tmp_path / "index"))
+    entry = ingestion.ingest_pdf(pdf_path, store, manifest, "test-embed", "docs", source="paper.pdf",
+                                 lexical_index=index)
+
+    assert entry["cached"] is True
+    assert index.has_document("paper.pdf")
+    first_word = store.added[0].page_content.split()[0]
+    assert index.search(first_word, ["paper.pdf"], k=1)
+
+
+def test_backfill_on_an_alias_upload_uses_the_stored_source(tmp_path, pdf_path, store):
+    manifest = ingestion.IngestionManifest(str(tmp_path))
+    ingestion.ingest_pdf(pdf_path, store, manifest, "test-embed", "docs", source="paper.pdf")
+
+    index = LexicalIndex(str(tmp_path / "index"))
+    entry = ingestion.ingest_pdf(pdf_path, store, manifest, "test-embed", "docs", source="copy.pdf",
+                                 lexical_index=index)
+
+    assert entry["cached"] is True
+    rows = index._db.execute("SELECT metadata, chunk_key FROM chunks").fetchall()
+    assert {json.loads(metadata)["source"] for metadata, _ in rows} == {"paper.pdf"}
+    assert {chunk_key for _, chunk_key in rows} == set(store.stored)
+    assert index.remove_chunks(list(store.stored)) == len(rows)
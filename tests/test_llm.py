@@ -0,0 +1,22 @@
+from types import SimpleNamespace
+
+from src import llm
+
+
+def fake_stream(model, prompt, stream=False, **kwargs):
+    assert stream is True
+    for token in ["The", " authors", " are"]:
+        yield SimpleNamespace(response=token, done=False, eval_count=None)
+    yield SimpleNamespace(response="", done=True, eval_count=3)
+
+
+def test_stream_yields_tokens_and_records_metrics(monkeypatch):
+    monkeypatch.setattr(llm.ollama_client.get_client()._client, "generate", fake_stream)
+    metrics = {}
+
+    tokens = list(llm.generate_response_stream("test-model", "prompt", metrics))
+
+    assert tokens == ["The", " authors", " are"]
+    assert metrics["tokens"] == 3
+    assert metrics["time_to_first_token"] >= 0
+    assert metrics["total_seconds"] >= metrics["time_to_first_token"]
@@ -0,0 +1,19 @@
+from src import embeddings, llm, main
+
+
+def test_batch_ingests_once_and_embeds_all_queries_in_one_request(tmp_path, monkeypatch, pdf_path, counting_embeddings):
+    fake = counting_embeddings
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(embeddings, "get_embeddings", lambda model: fake)
+    monkeypatch.setattr(llm, "generate_response", lambda model, prompt: f"answer to {prompt.splitlines()[-1]}")
+    queries = ["who are the authors?", "what data is used?", "which model is proposed?"]
+
+    results = main.analyze_pdf_batch(pdf_path, queries, max_concurrency=2)
+    ingestion_requests = len(fake.requests) - 1
+    main.analyze_pdf_batch(pdf_path, queries)
+
+    assert [result["query"] for result in results] == queries
+    assert all(result["error"] is None and result["answer"] for result in results)
+    assert all(result["seconds"] >= result["generation_seconds"] for result in results)
+    assert fake.requests[ingestion_requests] == queries
+    assert len(fake.requests) == ingestion_requests + 2
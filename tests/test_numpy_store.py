@@ -0,0 +1,115 @@
+import numpy as np
+import pytest
+from langchain_core.documents import Document
+
+from src import vector_store
+from src.numpy_store import NumpyVectorStore, matches_filter
+
+
+class TableEmbeddings:
+    """Deterministic embeddings looked up from a table of random vectors."""
+
+    def __init__(self, dimension=32, seed=0):
+        self.dimension = dimension
+        self.rng = np.random.default_rng(seed)
+        self.vectors = {}
+
+    def embed_documents(self, texts):
+        return [self.embed_query(text) for text in texts]
+
+    def embed_query(self, text):
+        if text not in self.vectors:
+            self.vectors[text] = self.rng.normal(size=self.dimension).tolist()
+        return self.vectors[text]
+
+
+def make_documents(count):
+    return [
+        Document(page_content=f"chunk {i}", metadata={"source": "a.pdf" if i % 2 else "b.pdf", "page": i})
+        for i in range(count)
+    ]
+
+
+def exact_ranking(embeddings, query, texts):
+    matrix = np.array([embeddings.embed_query(text) for text in texts])
+    matrix /= np.linalg.norm(matrix, axis=1, keepdims=True)
+    query = np.array(query) / np.linalg.norm(query)
+    return [texts[i] for i in np.argsort(-(matrix @ query))]
+
+
+@pytest.mark.parametrize("dtype", ["float16", "int8"])
+def test_search_matches_exact_cosine_ranking(tmp_path, dtype):
+    embeddings = TableEmbeddings()
+    documents = make_documents(300)
+    store = NumpyVectorStore(embeddings, "docs", str(tmp_path), dtype=dtype)
+    vector_store.add_documents_to_store(store, documents, batch_size=32)
+    query = embeddings.embed_query("question")
+
+    results = vector_store.similarity_search_with_scores(store, query, k=10)
+
+    expected = exact_ranking(embeddings, query, [doc.page_content for doc in documents])[:10]
+    assert [doc.page_content for doc, _ in results] == expected
+    assert [distance for _, distance in results] == sorted(distance for _, distance in results)
+
+
+def test_filters_upserts_deletes_and_reopening(tmp_path):
+    embeddings = TableEmbeddings()
+    store = vector_store.create_vector_store(embeddings, "docs", str(tmp_path), backend="numpy")
+    documents = make_documents(100)
+    for doc in documents:
+        doc.id = f"id-{doc.metadata['page']}"
+    vector_store.add_documents_to_store(store, documents)
+    vector_store.add_documents_to_store(store, documents[:10])
+    vector_store.delete_documents_from_store(store, [f"id-{i}" for i in range(0, 100, 3)])
+    query = embeddings.embed_query("question")
+
+    reopened = vector_store.create_vector_store(embeddings, "docs", str(tmp_path), backend="numpy")
+    filtered = vector_store.similarity_search(reopened, query, k=5, source="a.pdf", page_range=(10, 40))
+    everything = vector_store.similarity_search(reopened, query, k=1000)
+
+    assert store.count() == reopened.count() == 100 - 34
+    assert len(filtered) == 5
+    assert all(doc.metadata["source"] == "a.pdf" and 10 <= doc.metadata["page"] <= 40 for doc in filtered)
+    assert all(doc.metadata["page"] % 3 for doc in everything)
+    assert sorted(doc.id for doc in everything) == sorted(f"id-{i}" for i in range(100) if i % 3)
+
+
+def test_filter_operators():
+    metadata = {"source": "a.pdf", "page": 4, "section_title": "Results"}
+
+    assert matches_filter(metadata, None)
+    assert matches_filter(metadata, {"$and": [{"source": {"$in": ["a.pdf"]}}, {"page": {"$gte": 4}}]})
+    assert matches_filter(metadata, {"$or": [{"page": {"$lt": 2}}, {"section_title": "Results"}]})
+    assert not matches_filter(metadata, {"page": {"$gt": 4}})
+    assert not matches_filter(metadata, {"splitting_strategy": {"$gte": "a"}})
+
+
+def test_batch_search_matches_one_search_per_query(tmp_path):
+    embeddings = TableEmbeddings()
+    store = NumpyVectorStore(embeddings, "docs", str(tmp_path))
+    vector_store.add_documents_to_store(store, make_documents(200))
+    queries = [embeddings.embed_query(f"question {i}") for i in range(5)]
+
+    batch = vector_store.similarity_search_batch_with_scores(store, queries, k=5, source="a.pdf")
+    single = [vector_store.similarity_search_with_scores(store, query, k=5, source="a.pdf") for query in queries]
+
+    assert [[(doc.id, distance) for doc, distance in results] for results in batch] == \
+        [[(doc.id, distance) for doc, distance in results] for results in single]
+
+
+def test_handles_on_one_collection_see_each_others_writes(tmp_path):
+    embeddings = TableEmbeddings()
+    first = NumpyVectorStore(embeddings, "docs", str(tmp_path))
+    second = NumpyVectorStore(embeddings, "docs", str(tmp_path))
+    documents = make_documents(200)
+
+    first.add_documents(documents[:100], ids=[f"id-{i}" for i in range(100)])
+    second.add_documents(documents[100:], ids=[f"id-{i}" for i in range(100, 200)])
+    first.delete([f"id-{i}" for i in range(0, 200, 2)])
+    query = embeddings.embed_query("chunk 101")
+
+    reopened = NumpyVectorStore(embeddings, "docs", str(tmp_path))
+    assert first.count() == second.count() == reopened.count() == 100
+    assert sorted(second.get()["ids"]) == sorted(f"id-{i}" for i in range(1, 200, 2))
+    assert vector_store.similarity_search(second, query, k=1)[0].id == "id-101"
+    assert vector_store.similarity_search(reopened, query, k=1)[0].page_content == "chunk 101"
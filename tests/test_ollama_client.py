@@ -0,0 +1,121 @@
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+
+import ollama
+import pytest
+
+from src.ollama_client import OllamaPool
+
+
+class FakeClient:
+    """Stand-in for ollama.Client failing a set number of times first."""
+
+    def __init__(self, failures=0, error=None, delay=0.0):
+        self.failures = failures
+        self.error = error or ConnectionError("refused")
+        self.delay = delay
+        self.calls = 0
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+
+    def _attempt(self):
+        self.calls += 1
+        if self.failures:
+            self.failures -= 1
+            raise self.error
+
+    def generate(self, model, prompt, stream=False, **kwargs):
+        with self._lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        try:
+            time.sleep(self.delay)
+            if stream:
+                return self._stream()
+            self._attempt()
+            return SimpleNamespace(response=f"echo {prompt}")
+        finally:
+            with self._lock:
+                self.active -= 1
+
+    def _stream(self):
+        self._attempt()
+        yield SimpleNamespace(response="a", done=False, eval_count=None)
+        yield SimpleNamespace(response="", done=True, eval_count=1)
+
+    def embed(self, model, input, **kwargs):
+        self._attempt()
+        return SimpleNamespace(embeddings=[[float(len(text))] for text in input])
+
+
+class FakeAsyncClient(FakeClient):
+    async def generate(self, model, prompt, **kwargs):
+        self._attempt()
+        return SimpleNamespace(response=f"async {prompt}")
+
+
+def pool_with(client, **kwargs):
+    pool = OllamaPool(retry_delay=0.0, **kwargs)
+    pool._client = client
+    return pool
+
+
+def test_transient_failures_are_retried():
+    client = FakeClient(failures=2)
+    pool = pool_with(client, max_retries=2)
+
+    assert pool.generate("m", "hi").response == "echo hi"
+    assert pool.embed("e", ["ab", "c"]) == [[2.0], [1.0]]
+    assert client.calls == 4
+    assert pool.stats()["retries"] == 2
+
+
+def test_permanent_errors_are_not_retried():
+    client = FakeClient(failures=5, error=ollama.ResponseError("model not found", 404))
+    pool = pool_with(client, max_retries=3)
+
+    with pytest.raises(ollama.ResponseError):
+        pool.generate("m", "hi")
+    assert client.calls == 1
+    assert pool.stats()["failures"] == 1
+
+
+def test_stream_is_retried_until_it_starts():
+    client = FakeClient(failures=1)
+    pool = pool_with(client, max_retries=1)
+
+    chunks = list(pool.generate("m", "hi", stream=True))
+
+    assert [chunk.response for chunk in chunks] == ["a", ""]
+    assert pool.stats()["in_flight"] == {"m": 0}
+
+
+def test_concurrency_is_limited_per_model():
+    client = FakeClient(delay=0.05)
+    pool = pool_with(client, max_concurrency=2)
+
+    threads = [threading.Thread(target=pool.generate, args=("m", str(i))) for i in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert client.max_active == 2
+    assert pool.stats()["requests"] == 6
+
+
+def test_async_generate_retries_on_its_own_loop(monkeypatch):
+    client = FakeAsyncClient(failures=1)
+    pool = pool_with(FakeClient(), max_retries=1)
+    monkeypatch.setattr(ollama, "AsyncClient", lambda **kwargs: client)
+
+    async def ask():
+        return await asyncio.gather(pool.agenerate("m", "x"), pool.agenerate("m", "y"))
+
+    responses = asyncio.run(ask())
+
+    assert [response.response for response in responses] == ["async x", "async y"]
+    assert pool.stats()["retries"] == 1
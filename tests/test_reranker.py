@@ -0,0 +1,113 @@
+from langchain_core.documents import Document
+
+from src import reranker
+
+
+class FakeClock:
+    """Clock that only moves when advanced."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class CountingScorer:
+    """
+    Scores by text length and records the batches it was called with.
+
+    Each batch advances the clock, if given, by `cost` seconds.
+    """
+
+    name = "counting"
+
+    def __init__(self, clock=None, cost=0.0):
+        self.clock = clock
+        self.cost = cost
+        self.batches = []
+
+    def score(self, query, texts):
+        self.batches.append(len(texts))
+        if self.clock is not None:
+            self.clock.now += self.cost
+        return [float(len(text)) for text in texts]
+
+
+def docs(count):
+    return [Document(page_content="x" * (i + 1), metadata={"i": i}) for i in range(count)]
+
+
+def test_rerank_scores_in_batches_and_caches_scores():
+    scorer = CountingScorer()
+    ranker = reranker.Reranker(scorer, batch_size=4, latency_budget=None)
+    report = {}
+
+    top = ranker.rerank("query", docs(10), top_n=3, report=report)
+
+    assert [doc.metadata["i"] for doc in top] == [9, 8, 7]
+    assert scorer.batches == [4, 4, 2]
+    assert report["reranked"] is True
+
+    ranker.rerank("Query?", docs(10), top_n=3, report=report)
+    assert scorer.batches == [4, 4, 2]
+    assert report["cache_hits"] == 10
+
+
+def test_rerank_stays_within_the_latency_budget_and_recovers():
+    clock = FakeClock()
+    scorer = CountingScorer(clock, cost=0.05)
+    ranker = reranker.Reranker(scorer, batch_size=2, latency_budget=0.06, clock=clock)
+    report = {}
+
+    # Scoring stops once the budget is spent; only the scored prefix is re-ordered
+    top = ranker.rerank("query", docs(8), top_n=3, report=report)
+    assert [doc.metadata["i"] for doc in top] == [3, 2, 1]
+    assert scorer.batches == [2, 2]
+    assert report["candidates"] == 4
+    assert report["seconds"] == 0.1
+
+    # The measured cost per pair predicts an overrun, so one batch is scored
+    calls = len(scorer.batches)
+    top = ranker.rerank("other query", docs(8), top_n=3, report=report)
+    assert scorer.batches[calls:] == [2]
+    assert [doc.metadata["i"] for doc in top] == [1, 0, 2]
+
+    # A faster scorer brings the estimate down and full re-ranking back
+    scorer.cost = 0.0
+    for i in range(20):
+        top = ranker.rerank(f"query {i}", docs(8), top_n=3, report=report)
+        if report["candidates"] == 8:
+            break
+    assert report["reranked"] is True and report["scored"] == 8
+    assert [doc.metadata["i"] for doc in top] == [7, 6, 5]
+
+
+def test_lexical_overlap_scorer_prefers_covering_chunks():
+    scorer = reranker.LexicalOverlapScorer()
+
+    scores = scorer.score("authors of the paper", ["The authors of this paper are", "A paper", "Nothing"])
+
+    assert scores[0] > scores[1] > scores[2]
+
+
+def test_missing_cross_encoder_falls_back_to_lexical(monkeypatch):
+    def fail():
+        raise ImportError("no transformers")
+
+    monkeypatch.setattr(reranker.CrossEncoderScorer, "load", lambda self: fail())
+
+    ranker = reranker.get_reranker("cross-encoder")
+
+    assert isinstance(ranker.scorer, reranker.LexicalOverlapScorer)
+
+
+def test_shared_reranker_is_created_once_on_first_use(monkeypatch):
+    created = []
+    monkeypatch.setattr(reranker, "_shared_reranker", None)
+    monkeypatch.setattr(reranker, "get_reranker", lambda: created.append(1) or reranker.Reranker(None))
+
+    first = reranker.get_shared_reranker()
+
+    assert reranker.get_shared_reranker() is first
+    assert created == [1]
@@ -0,0 +1,54 @@
+from langchain_core.documents import Document
+
+from src import retrieval
+from src.lexical_index import LexicalIndex
+
+
+def doc(text, source="a.pdf"):
+    return Document(page_content=text, metadata={"source": source})
+
+
+def test_reciprocal_rank_fusion_prefers_chunks_found_by_both_lists():
+    vector = [doc("one"), doc("two"), doc("three")]
+    lexical = [doc("three"), doc("four")]
+
+    fused = retrieval.reciprocal_rank_fusion([vector, lexical], k=3)
+
+    assert [d.page_content for d in fused] == ["three", "one", "two"]
+
+
+def test_hybrid_search_without_lexical_index_is_vector_search():
+    calls = []
+
+    def vector_search(k, **filters):
+        calls.append((k, filters))
+        return [doc(str(i)) for i in range(k)]
+
+    results = retrieval.hybrid_search(vector_search, None, "query", ["a.pdf"], k=3, candidates=10, section="Intro")
+
+    assert [d.page_content for d in results] == ["0", "1", "2"]
+    assert calls == [(10, {"section": "Intro"})]
+
+
+def test_hybrid_search_batch_fuses_each_query_with_its_vector_results():
+    class Lexical:
+        def search(self, query, document_ids, k=5, **filters):
+            return [(doc(query), 1.0)]
+
+    vector_results = [[doc("one"), doc("two")], [doc("three"), doc("two")]]
+
+    batch = retrieval.hybrid_search_batch(lambda k, **filters: vector_results, Lexical(), ["two", "three"],
+                                          ["a.pdf"], k=2)
+
+    assert [[d.page_content for d in results] for results in batch] == [["two", "one"], ["three", "two"]]
+
+
+def test_hybrid_search_applies_a_raw_where_filter_to_lexical_results(tmp_path):
+    index = LexicalIndex(str(tmp_path))
+    index.add_chunks("a.pdf", [Document(page_content=f"attention heads {p}", metadata={"source": "a.pdf", "page": p})
+                               for p in range(3)])
+
+    results = retrieval.hybrid_search(lambda k, **filters: [], index, "attention", ["a.pdf"], k=5,
+                                      where={"page": {"$gte": 1}})
+
+    assert sorted(d.metadata["page"] for d in results) == [1, 2]
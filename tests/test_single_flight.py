@@ -0,0 +1,95 @@
+import threading
+import time
+
+import pytest
+
+from src.single_flight import SingleFlight
+
+
+def run_concurrently(count, target):
+    results = [None] * count
+    barrier = threading.Barrier(count)
+
+    def worker(i):
+        barrier.wait()
+        results[i] = target()
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_concurrent_identical_calls_share_one_run():
+    flight = SingleFlight()
+    calls = []
+
+    def generate():
+        calls.append(1)
+        time.sleep(0.1)
+        return "answer"
+
+    results = run_concurrently(5, lambda: flight.run(("doc", "question", "model"), generate))
+
+    assert len(calls) == 1
+    assert [answer for answer, _ in results] == ["answer"] * 5
+    assert sorted(shared for _, shared in results) == [False, True, True, True, True]
+    # The key is free again once the call finished
+    assert flight.run(("doc", "question", "model"), generate) == ("answer", False)
+    assert len(calls) == 2
+
+
+def test_errors_reach_every_waiting_caller():
+    flight = SingleFlight()
+
+    def fail():
+        time.sleep(0.05)
+        raise RuntimeError("ollama is down")
+
+    def call():
+        try:
+            flight.run("key", fail)
+        except RuntimeError as e:
+            return str(e)
+
+    assert run_concurrently(3, call) == ["ollama is down"] * 3
+
+
+def test_stream_subscribers_share_one_token_stream():
+    flight = SingleFlight()
+    started = []
+    release = threading.Event()
+
+    def produce():
+        started.append(1)
+        yield "The"
+        release.wait()
+        yield " answer"
+
+    first, first_shared = flight.stream("key", produce)
+    assert next(first) == "The"
+    # A subscriber joining mid-stream still gets every token
+    second, second_shared = flight.stream("key", produce)
+    release.set()
+
+    assert "".join(second) == "The answer"
+    assert list(first) == [" answer"]
+    assert (first_shared, second_shared) == (False, True)
+    assert len(started) == 1
+    assert flight.stats()["in_flight"] == 0
+
+
+def test_stream_errors_are_raised_to_subscribers():
+    flight = SingleFlight()
+
+    def produce():
+        yield "partial"
+        raise RuntimeError("stream broke")
+
+    tokens, _ = flight.stream("key", produce)
+
+    assert next(tokens) == "partial"
+    with pytest.raises(RuntimeError):
+        next(tokens)
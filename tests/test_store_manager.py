@@ -0,0 +1,46 @@
+from langchain_core.documents import Document
+
+from src import vector_store
+from src.store_manager import VectorStoreManager
+
+
+def add(manager, document_id, texts):
+    documents = [Document(page_content=text, metadata={"source": document_id, "page": 0}) for text in texts]
+    vector_store.add_documents_to_store(manager.get(document_id), documents)
+
+
+def test_documents_are_isolated_and_handles_bounded(tmp_path, keyword_embeddings):
+    manager = VectorStoreManager(keyword_embeddings, str(tmp_path), max_open=2)
+    add(manager, "a.pdf", ["authors of a", "method of a"])
+    add(manager, "b.pdf", ["authors of b"])
+    add(manager, "c.pdf", ["results of c"])
+
+    query = keyword_embeddings.embed_query("authors")
+    only_a = vector_store.similarity_search(manager.get("a.pdf"), query, k=5)
+    merged = manager.search(query, ["a.pdf", "b.pdf", "c.pdf"], k=2)
+
+    assert {doc.metadata["source"] for doc in only_a} == {"a.pdf"}
+    assert {doc.page_content for doc in merged} == {"authors of a", "authors of b"}
+    assert len(manager.open_collections()) == 2
+
+
+def test_delete_and_rebuild_touch_one_document(tmp_path, keyword_embeddings):
+    manager = VectorStoreManager(keyword_embeddings, str(tmp_path))
+    add(manager, "a.pdf", ["authors of a"])
+    add(manager, "b.pdf", ["authors of b"])
+    query = keyword_embeddings.embed_query("authors")
+
+    manager.delete("a.pdf")
+    manager.rebuild("b.pdf", [Document(page_content="method of b", metadata={"source": "b.pdf"})])
+
+    assert vector_store.similarity_search(manager.get("a.pdf"), query) == []
+    assert [doc.page_content for doc in vector_store.similarity_search(manager.get("b.pdf"), query)] == ["method of b"]
+
+
+def test_collection_names_are_valid_and_distinct_per_tenant(tmp_path, keyword_embeddings):
+    manager = VectorStoreManager(keyword_embeddings, str(tmp_path))
+
+    name = manager.collection_name("My Paper (v2).pdf")
+
+    assert name.startswith("doc_My-Paper-v2-pdf_")
+    assert name != manager.collection_name("My Paper (v2).pdf", tenant="lab")
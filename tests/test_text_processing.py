@@ -0,0 +1,112 @@
+import random
+
+from langchain_core.documents import Document
+
+from benchmarks.bench_normalize_chunks import legacy_normalize_chunk_lengths
+from src import text_processing
+
+
+def test_section_strategy_splits_every_document():
+    docs = [
+        Document(page_content="1. Introduction\nFirst page text.", metadata={"page": 0}),
+        Document(page_content="2. Methods\nSecond page text.", metadata={"page": 1}),
+    ]
+
+    chunks = text_processing.split_documents(docs, splitting_strategy="section")
+
+    assert [chunk.metadata["page"] for chunk in chunks] == [0, 1]
+    assert [chunk.metadata["section_title"] for chunk in chunks] == ["1. Introduction", "2. Methods"]
+
+
+def test_section_levels_and_continued_titles():
+    text = "Preamble line\n## Results\n" + "\n".join(["word " * 30] * 10) + "\n1.2.3 Details\nShort."
+    doc = Document(page_content=text, metadata={"source": "a.pdf"})
+
+    chunks = text_processing.split_documents([doc], chunk_size=200, chunk_overlap=20, splitting_strategy="section")
+
+    assert chunks[0].page_content == "\nPreamble line"
+    assert chunks[0].metadata["section_level"] == 0
+    results = [chunk for chunk in chunks if chunk.metadata["section_title"] == "## Results"]
+    assert len(results) > 1
+    assert results[0].page_content.startswith("## Results\n\n")
+    assert all(chunk.page_content.startswith("## Results (continued)\n\n") for chunk in results[1:])
+    assert all(chunk.metadata["section_level"] == 2 for chunk in results)
+    assert chunks[-1].page_content == "1.2.3 Details\nShort."
+    assert chunks[-1].metadata["section_level"] == 3
+
+
+def test_hybrid_matches_semantic_then_size_split():
+    # The hybrid strategy used to run a size-based split over the semantic
+    # chunks; it must produce the same boundaries and section metadata
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+    from src import loaders
+
+    docs = loaders.load_pdf("pdf_files/2306.13549v4.pdf")
+    docs.append(Document(
+        page_content="Abstract\n" + "Long abstract sentence. " * 60 + "\n# Methods\nShort methods.",
+        metadata={"page": 99}
+    ))
+    two_pass = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200, add_start_index=True).split_documents(
+        text_processing.split_documents(docs, 1000, 200, "semantic")
+    )
+
+    chunks = text_processing.split_documents(docs, 1000, 200, "hybrid")
+
+    def without_start_index(chunk):
+        return {key: value for key, value in chunk.metadata.items() if key != "start_index"}
+
+    assert [c.page_content for c in chunks] == [c.page_content for c in two_pass]
+    assert [without_start_index(c) for c in chunks] == [without_start_index(c) for c in two_pass]
+    abstract = [c for c in chunks if c.metadata.get("section_Header 1") == "Abstract"]
+    assert len(abstract) > 1
+    assert abstract[0].metadata["start_index"] == 0
+    assert abstract[1].metadata["start_index"] > 0
+
+
+def test_normalize_chunk_lengths_matches_previous_output():
+    rng = random.Random(0)
+    for _ in range(200):
+        chunks = []
+        for i in range(rng.randint(0, 30)):
+            metadata = {"source": "a.pdf", "n": i}
+            if rng.random() < 0.7:
+                metadata["page"] = i // 3
+            if rng.random() < 0.3:
+                metadata["extra_%d" % i] = True
+            chunks.append(Document(page_content="x" * rng.choice([0, 5, 50, 300, 700, 1300]), metadata=metadata))
+
+        expected = legacy_normalize_chunk_lengths(chunks, target_length=800)
+        actual = text_processing.normalize_chunk_lengths(chunks, target_length=800)
+
+        assert [(d.page_content, d.metadata) for d in actual] == [(d.page_content, d.metadata) for d in expected]
+
+
+def test_iter_normalized_chunks_is_lazy():
+    def chunks():
+        yield Document(page_content="a" * 900, metadata={"page": 0})
+        yield Document(page_content="b" * 100, metadata={"page": 1})
+        raise AssertionError("read past the chunk needed to emit the first output")
+
+    stream = text_processing.iter_normalized_chunks(chunks(), target_length=800)
+
+    first = next(stream)
+    assert first.page_content == "a" * 900
+    assert first.metadata == {"page": 0}
+
+
+def test_paragraph_overlap_is_measured_in_tokens():
+    from src.tokenization import approximate_token_count
+
+    paragraphs = [" ".join(f"p{i}w{j}" for j in range(60)) for i in range(4)]
+    doc = Document(page_content="\n\n".join(paragraphs), metadata={"page": 0})
+
+    chunks = text_processing.split_documents([doc], chunk_size=100, chunk_overlap=20, splitting_strategy="paragraph",
+                                             length_function=approximate_token_count)
+
+    assert len(chunks) == 4
+    for previous, chunk in zip(chunks, chunks[1:]):
+        overlap = chunk.page_content.split("\n\n")[0]
+        assert previous.page_content.endswith(overlap)
+        # Whole words, as many as fit in the token budget
+        assert overlap.split()[0] in previous.page_content.split()
+        assert 15 <= approximate_token_count(overlap) <= 20
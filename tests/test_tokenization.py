@@ -0,0 +1,53 @@
+import sys
+
+import pytest
+
+from src import ingestion, text_processing, tokenization
+
+
+def test_approximate_token_count_splits_punctuation_and_long_words():
+    assert tokenization.approximate_token_count("") == 0
+    assert tokenization.approximate_token_count("Hello, world!") == 4
+    # "tokenization" is counted as two six-character pieces
+    assert tokenization.approximate_token_count("tokenization") == 2
+
+
+def test_get_length_function():
+    assert tokenization.get_length_function("chars") is len
+    assert tokenization.get_length_function("approx_tokens") is tokenization.approximate_token_count
+    with pytest.raises(ValueError):
+        tokenization.get_length_function("words")
+
+
+def test_tokens_without_transformers_raise(monkeypatch):
+    monkeypatch.setitem(sys.modules, "transformers", None)
+    tokenization.get_tokenizer.cache_clear()
+    tokenization.token_counter.cache_clear()
+    try:
+        with pytest.raises(RuntimeError):
+            tokenization.get_length_function("tokens", tokenizer_name="missing-tokenizer")
+    finally:
+        tokenization.get_tokenizer.cache_clear()
+        tokenization.token_counter.cache_clear()
+
+
+def test_token_budget_packs_chunks():
+    from src import loaders
+
+    pages = loaders.load_pdf("pdf_files/2306.13549v4.pdf")
+    count = tokenization.approximate_token_count
+
+    chunks = text_processing.split_documents(pages, chunk_size=256, chunk_overlap=32, length_function=count)
+    assert all(count(chunk.page_content) <= 256 for chunk in chunks)
+
+    packed = ingestion.split_page_window(pages, "hybrid", chunk_size=512, chunk_overlap=64, target_length=384,
+                                         length_unit="approx_tokens")
+    by_chars = ingestion.split_page_window(pages, "hybrid")
+    assert all(count(chunk.page_content) <= 384 * 1.5 for chunk in packed)
+    assert len(packed) < len(by_chars)
+
+
+def test_length_unit_is_part_of_the_manifest_key():
+    chars = ingestion.manifest_key("h", "hybrid", 1000, 200, 800, "model", "docs")
+    assert chars == "h|hybrid|1000|200|800|model|docs"
+    assert ingestion.manifest_key("h", "hybrid", 1000, 200, 800, "model", "docs", "approx_tokens") != chars
@@ -0,0 +1,119 @@
+import threading
+import time
+
+import pytest
+from langchain_core.documents import Document
+
+from src import vector_store
+
+
+class FlakyStore:
+    """Stand-in vector store that fails the first attempt of one batch."""
+
+    def __init__(self, fail_first_of=None):
+        self.fail_first_of = fail_first_of
+        self.attempts = {}
+        self.stored = {}
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+
+    def add_documents(self, documents, ids):
+        first_text = documents[0].page_content
+        with self._lock:
+            self.attempts[first_text] = self.attempts.get(first_text, 0) + 1
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        try:
+            time.sleep(0.01)
+            if first_text == self.fail_first_of and self.attempts[first_text] == 1:
+                raise ConnectionError("embedding server unavailable")
+            with self._lock:
+                self.stored.update(zip(ids, documents))
+            return ids
+        finally:
+            with self._lock:
+                self.active -= 1
+
+
+def make_documents(count):
+    return [Document(page_content=f"chunk {i}", metadata={"page": i}) for i in range(count)]
+
+
+def test_batches_are_bounded_retried_and_returned_in_order():
+    store = FlakyStore(fail_first_of="chunk 3")
+    progress = []
+
+    ids = vector_store.add_documents_to_store(
+        store, iter(make_documents(10)), batch_size=3, max_workers=2,
+        retry_delay=0, progress_callback=progress.append
+    )
+
+    assert len(ids) == 10 and len(set(ids)) == 10
+    assert [store.stored[doc_id].page_content for doc_id in ids] == [f"chunk {i}" for i in range(10)]
+    assert store.attempts["chunk 3"] == 2
+    assert store.max_active <= 2
+    assert progress[-1]["done"] == 10
+    assert progress[-1]["chunks_per_sec"] > 0
+
+
+def test_failed_batch_raises_and_is_not_counted_as_done():
+    store = FlakyStore(fail_first_of="chunk 3")
+    progress = []
+
+    with pytest.raises(ConnectionError):
+        vector_store.add_documents_to_store(
+            store, make_documents(9), batch_size=3, max_workers=1, max_retries=0,
+            progress_callback=progress.append
+        )
+
+    assert [report["done"] for report in progress] == [3]
+    assert len(store.stored) == 3
+
+
+def test_filtered_search_returns_k_results_from_requested_source(tmp_path, keyword_embeddings):
+    vs = vector_store.create_vector_store(keyword_embeddings, "filter_test", str(tmp_path))
+    documents = [
+        Document(page_content=f"authors authors {i}", metadata={"source": "a.pdf", "page": i})
+        for i in range(6)
+    ] + [
+        Document(page_content=f"authors method {i}", metadata={"source": "b.pdf", "page": i})
+        for i in range(6)
+    ]
+    vector_store.add_documents_to_store(vs, documents)
+    query = keyword_embeddings.embed_query("authors method")
+
+    unfiltered = vector_store.similarity_search(vs, query, k=3)
+    filtered = vector_store.similarity_search(vs, query, k=3, source="a.pdf", page_range=(1, 4))
+
+    assert {doc.metadata["source"] for doc in unfiltered} == {"b.pdf"}
+    assert len(filtered) == 3
+    assert all(doc.metadata["source"] == "a.pdf" and 1 <= doc.metadata["page"] <= 4 for doc in filtered)
+
+
+def test_metadata_filter_combines_conditions():
+    assert vector_store.build_metadata_filter() is None
+    assert vector_store.build_metadata_filter(source="a.pdf") == {"source": "a.pdf"}
+    assert vector_store.build_metadata_filter(source=["a.pdf"], page_range=(None, 3), strategy="section") == {
+        "$and": [
+            {"source": {"$in": ["a.pdf"]}},
+            {"page": {"$lte": 3}},
+            {"splitting_strategy": "section"},
+        ]
+    }
+
+
+def test_batch_search_matches_one_search_per_query(tmp_path, keyword_embeddings):
+    vs = vector_store.create_vector_store(keyword_embeddings, "batch_test", str(tmp_path))
+    documents = [
+        Document(page_content=text, metadata={"source": "a.pdf", "page": i})
+        for i, text in enumerate(["authors", "results results", "method", "authors method", "results of method"])
+    ]
+    vector_store.add_documents_to_store(vs, documents)
+    queries = [keyword_embeddings.embed_query(text) for text in ["authors", "method", "results"]]
+
+    batch = vector_store.similarity_search_batch(vs, queries, k=2, page_range=(0, 3))
+    single = [vector_store.similarity_search(vs, query, k=2, page_range=(0, 3)) for query in queries]
+
+    assert [[doc.page_content for doc in results] for results in batch] == \
+        [[doc.page_content for doc in results] for results in single]